@@ -1,6 +1,137 @@
 import sqlite3
+import threading
+import uuid
+from itertools import islice
+from contextlib import contextmanager
 from error import *
 
+DATABASE = "baza_proizvodnja.db"
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+    "busy_timeout": 30000,
+}
+
+_local = threading.local()
+_settings_version = 0
+
+
+class ManagedConnection(sqlite3.Connection):
+    """
+    A connection returned by get_connection.
+
+    Inside a transaction block commit() is deferred until the outermost block ends,
+    so helpers that commit on their own can be grouped into a single transaction.
+    """
+    transaction_depth = 0
+
+    def commit(self):
+        if self.transaction_depth == 0:
+            super().commit()
+
+
+def configure_database(db_file: str = None, **pragmas):
+    """
+    Changes the database file and the pragmas used by get_connection.
+
+    Connections that were already opened are replaced the next time get_connection
+    is called from their thread.
+
+    Args:
+        db_file (str, optional): The path to the SQLite database file. Defaults to None, which keeps the current file.
+        **pragmas: Pragma values to set on new connections, for example journal_mode="WAL",
+            synchronous="NORMAL", cache_size=-64000 or mmap_size=268435456.
+    """
+    global DATABASE, _settings_version
+
+    if db_file is not None:
+        DATABASE = db_file
+    PRAGMAS.update(pragmas)
+    _settings_version += 1
+
+def get_connection(db_file: str = None) -> ManagedConnection:
+    """
+    Returns the cached connection of the current thread to an SQLite database.
+
+    Every thread gets one connection per database file, which is opened on the first call
+    with the pragmas from PRAGMAS and reused afterwards. Connections should not be closed
+    by the caller. With WAL journal mode and a busy timeout, an ingest running in one thread
+    and a report running in another do not fail with "database is locked".
+
+    Args:
+        db_file (str, optional): The path to the SQLite database file. Defaults to DATABASE.
+
+    Returns:
+        ManagedConnection: The connection object to the SQLite database.
+    """
+    db_file = DATABASE if db_file is None else db_file
+    connections = getattr(_local, "connections", None)
+    if connections is None or getattr(_local, "settings_version", None) != _settings_version:
+        close_connections()
+        connections = _local.connections = {}
+        _local.settings_version = _settings_version
+
+    connection = connections.get(db_file)
+    if connection is None:
+        connection = sqlite3.connect(
+            db_file,
+            timeout=PRAGMAS.get("busy_timeout", 30000) / 1000,
+            factory=ManagedConnection,
+        )
+        for name, value in PRAGMAS.items():
+            connection.execute(f"PRAGMA {name} = {value}")
+        connections[db_file] = connection
+
+    return connection
+
+def close_connections():
+    """
+    Closes the cached connections of the current thread.
+    """
+    for connection in getattr(_local, "connections", {}).values():
+        connection.close()
+    _local.connections = {}
+
+@contextmanager
+def transaction(connection: sqlite3.Connection = None):
+    """
+    Runs a block of database operations as a single transaction.
+
+    The outermost block starts a write transaction with BEGIN IMMEDIATE, so concurrent
+    writers wait for each other instead of failing halfway through. It commits when the
+    block ends and rolls back if the block raises. Nested blocks join the outer transaction.
+
+    Args:
+        connection (sqlite3.Connection, optional): A connection returned by get_connection.
+            Defaults to the connection of the current thread.
+
+    Yields:
+        ManagedConnection: The connection the transaction runs on.
+    """
+    connection = get_connection() if connection is None else connection
+
+    if connection.transaction_depth == 0:
+        if connection.in_transaction:
+            sqlite3.Connection.commit(connection)
+        connection.execute("BEGIN IMMEDIATE")
+    connection.transaction_depth += 1
+
+    try:
+        yield connection
+    except BaseException:
+        connection.transaction_depth -= 1
+        if connection.transaction_depth == 0:
+            connection.rollback()
+        raise
+
+    connection.transaction_depth -= 1
+    if connection.transaction_depth == 0:
+        connection.commit()
+
 
 def create_connection(db_file: str) -> sqlite3.Connection:
     """
@@ -61,8 +192,7 @@ def insert_into_table(
     
     try:
         cursor = sql_connection.cursor()
-        for item in data:
-            cursor.execute(insert_sql, (item,))
+        cursor.executemany(insert_sql, ((item,) for item in data))
         sql_connection.commit()
         cursor.close()
         return True
@@ -70,7 +200,140 @@ def insert_into_table(
     except sqlite3.Error as error_msg:
         error(error_msg)
         return False
+
+_SQL_TYPES = {"i": "INTEGER", "u": "INTEGER", "b": "INTEGER", "f": "REAL", "M": "TIMESTAMP"}
+_CONFLICT_VERBS = {"abort": "INSERT", "ignore": "INSERT OR IGNORE", "replace": "INSERT OR REPLACE", "update": "INSERT"}
+
+def _dataframe_rows(dataframe):
+    """
+    Yields the rows of a DataFrame as tuples of values SQLite can store.
+
+    Datetime columns are written as "YYYY-MM-DD HH:MM:SS" text and missing values as NULL.
+
+    Args:
+        dataframe (pd.DataFrame): The DataFrame whose rows are yielded.
+
+    Yields:
+        tuple: One row of the DataFrame.
+    """
+    import pandas as pd
+
+    dataframe = dataframe.copy()
+    for column in dataframe.columns:
+        if pd.api.types.is_datetime64_any_dtype(dataframe[column]):
+            dataframe[column] = dataframe[column].dt.strftime("%Y-%m-%d %H:%M:%S")
+        if dataframe[column].dtype.kind not in "iufb":
+            dataframe[column] = dataframe[column].astype(object).where(dataframe[column].notna(), None)
+
+    yield from zip(*(dataframe.iloc[:, i].tolist() for i in range(dataframe.shape[1])))
+
+def create_table_for_dataframe(connection: sqlite3.Connection, table_name: str, dataframe, replace: bool = False):
+    """
+    Creates a table with the columns of a DataFrame.
+
+    Column types follow the DataFrame dtypes the same way pandas to_sql maps them:
+    integers and booleans become INTEGER, floats REAL, datetimes TIMESTAMP and everything else TEXT.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+        dataframe (pd.DataFrame): The DataFrame whose columns are used.
+        replace (bool, optional): Drop the table first if it exists. Defaults to False.
+    """
+    column_list = ", ".join(
+        f'"{column}" {_SQL_TYPES.get(dtype.kind, "TEXT")}' for column, dtype in dataframe.dtypes.items()
+    )
+    if replace:
+        connection.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+    connection.execute(f'CREATE TABLE IF NOT EXISTS "{table_name}" ({column_list})')
+    connection.commit()
+
+def insert_rows(
+    connection: sqlite3.Connection,
+    table_name: str,
+    rows,
+    columns: list = None,
+    batch_size: int = 10000,
+    on_conflict: str = "abort",
+    conflict_columns: list = None,
+) -> int:
+    """
+    Inserts many rows with many columns into a table in a single transaction.
+
+    Rows are sent to SQLite with executemany in batches of batch_size, so Python only
+    loops over the batches and not over the rows.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+        rows: A DataFrame, a two-dimensional NumPy array or an iterable of tuples.
+        columns (list, optional): The names of the columns the values are inserted into.
+            Defaults to the columns of the DataFrame; required for other kinds of rows.
+        batch_size (int, optional): Number of rows sent to SQLite at once. Defaults to 10000.
+        on_conflict (str, optional): What happens when a row violates a unique constraint:
+            "abort" raises an error, "ignore" skips the row, "replace" deletes the old row
+            and "update" updates the non-key columns of the old row. Defaults to "abort".
+        conflict_columns (list, optional): The unique columns checked by "update". Required for "update".
+
+    Raises:
+        ValueError: If on_conflict is not one of the values above, if it is "update" without conflict_columns,
+            or if columns is missing for rows that are not a DataFrame.
+
+    Returns:
+        int: The number of rows sent to the database.
+    """
+    if on_conflict not in _CONFLICT_VERBS:
+        raise ValueError(f"on_conflict must be one of {', '.join(_CONFLICT_VERBS)}, not {on_conflict!r}")
+    if on_conflict == "update" and not conflict_columns:
+        raise ValueError('on_conflict="update" requires conflict_columns')
+
+    if hasattr(rows, "itertuples"):
+        columns = list(rows.columns) if columns is None else columns
+        rows = _dataframe_rows(rows)
+    elif getattr(rows, "ndim", None) == 2:
+        rows = rows.tolist()
+    if columns is None:
+        raise ValueError("columns is required unless the rows are a DataFrame")
+
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    placeholders = ", ".join("?" * len(columns))
+    verb = _CONFLICT_VERBS[on_conflict]
+    insert_sql = f'{verb} INTO "{table_name}" ({column_list}) VALUES ({placeholders})'
+
+    if on_conflict == "update":
+        updated = [column for column in columns if column not in conflict_columns]
+        keys = ", ".join(f'"{column}"' for column in conflict_columns)
+        if updated:
+            assignments = ", ".join(f'"{column}" = excluded."{column}"' for column in updated)
+            insert_sql += f" ON CONFLICT ({keys}) DO UPDATE SET {assignments}"
+        else:
+            insert_sql += f" ON CONFLICT ({keys}) DO NOTHING"
+
+    rows = iter(rows)
+    inserted = 0
+    with transaction(connection):
+        cursor = connection.cursor()
+        while batch := list(islice(rows, batch_size)):
+            cursor.executemany(insert_sql, batch)
+            inserted += len(batch)
+        cursor.close()
+
+    return inserted
     
+def in_condition(column_name: str, values: list) -> tuple:
+    """
+    Builds a parameterized "column IN (...)" condition.
+
+    Args:
+        column_name (str): The name of the column.
+        values (list): The allowed values. An empty list matches no rows.
+
+    Returns:
+        tuple: The SQL condition and the list of its parameters.
+    """
+    values = list(values)
+    return f'"{column_name}" IN ({", ".join("?" * len(values))})', values
+
 def get_all_data(
     sql_connection: sqlite3.Connection, 
     search_sql: str,
@@ -111,7 +374,7 @@ def get_sql_column_names(connection: sqlite3.Connection, table_name: str):
     cursor.execute(f"PRAGMA table_info({table_name})")
     columns_info = cursor.fetchall()
     column_names = [col[1] for col in columns_info]
-    connection.close()
+    cursor.close()
     
     return column_names
 
@@ -120,7 +383,171 @@ def remove_table(connection: sqlite3.Connection, table_name:str):
     cursor = connection.cursor()
     cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
     connection.commit()
-    connection.close()
+    cursor.close()
     
 
 
+def table_exists(connection: sqlite3.Connection, table_name: str) -> bool:
+    """
+    Checks whether a table exists in the SQLite database.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+
+    Returns:
+        bool: True if the table exists, False otherwise.
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+    exists = cursor.fetchone() is not None
+    cursor.close()
+
+    return exists
+
+def create_index(connection: sqlite3.Connection, table_name: str, columns: list, unique: bool = False):
+    """
+    Creates an index on the given columns of a table if it does not exist yet.
+
+    The index is named after the table and the indexed columns, so calling this
+    function repeatedly is cheap and does not create duplicate indexes.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the indexed table.
+        columns (list): The names of the indexed columns.
+        unique (bool, optional): Whether the index enforces unique values. Defaults to False.
+    """
+    index_name = f"idx_{table_name}_{'_'.join(columns)}"
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    cursor = connection.cursor()
+    cursor.execute(
+        f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS "{index_name}" ON "{table_name}" ({column_list})'
+    )
+    connection.commit()
+    cursor.close()
+
+def get_max_value(connection: sqlite3.Connection, table_name: str, column_name: str):
+    """
+    Returns the largest value stored in a column.
+
+    With an index on the column SQLite answers this from the end of the index,
+    so the cost does not depend on the number of rows in the table.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+        column_name (str): The name of the column.
+
+    Returns:
+        The largest value in the column, or None if the table is empty.
+    """
+    cursor = connection.cursor()
+    cursor.execute(f'SELECT MAX("{column_name}") FROM "{table_name}"')
+    result = cursor.fetchone()[0]
+    cursor.close()
+
+    return result
+
+def get_existing_values(connection: sqlite3.Connection, table_name: str, column_name: str, values: list, chunk_size: int = 500) -> set:
+    """
+    Returns the subset of the given values that is already stored in a column.
+
+    The lookup is done in chunks of parameterized IN queries, so with an index on
+    the column the cost grows with the number of searched values and not with
+    the size of the table.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+        column_name (str): The name of the searched column.
+        values (list): The values to look up.
+        chunk_size (int, optional): Number of values per query. Defaults to 500.
+
+    Returns:
+        set: The values that already exist in the column.
+    """
+    existing = set()
+    cursor = connection.cursor()
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(f'SELECT "{column_name}" FROM "{table_name}" WHERE "{column_name}" IN ({placeholders})', chunk)
+        existing.update(row[0] for row in cursor.fetchall())
+    cursor.close()
+
+    return existing
+
+def add_column(connection: sqlite3.Connection, table_name: str, column_name: str, column_type: str):
+    """
+    Adds a column to an existing table.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+        column_name (str): The name of the new column.
+        column_type (str): The SQLite type of the new column.
+    """
+    cursor = connection.cursor()
+    cursor.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "{column_name}" {column_type}')
+    connection.commit()
+    cursor.close()
+
+def get_data_version(connection: sqlite3.Connection, table_name: str) -> int:
+    """
+    Returns the version number of the data in a table.
+
+    The number is increased by bump_data_version every time rows are written to the table,
+    so anything computed from the table can be cached under it.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+
+    Returns:
+        int: The version number, 0 if the table was never written.
+    """
+    if not table_exists(connection, "Verzije_Podataka"):
+        return 0
+    row = connection.execute('SELECT "Verzija" FROM "Verzije_Podataka" WHERE "Tablica" = ?', (table_name,)).fetchone()
+    return row[0] if row else 0
+
+def get_data_generation(connection: sqlite3.Connection, table_name: str) -> str:
+    """
+    Returns the random identifier of the version counter of a table.
+
+    The identifier is chosen when the counter starts, so a database that is deleted and
+    created again gets a new one, even though its version numbers start again at 1.
+    Anything cached on disk under a data version should be named after both.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+
+    Returns:
+        str: The identifier, an empty string if the table was never written.
+    """
+    if not table_exists(connection, "Verzije_Podataka") or "Generacija" not in get_sql_column_names(connection, "Verzije_Podataka"):
+        return ""
+    row = connection.execute('SELECT "Generacija" FROM "Verzije_Podataka" WHERE "Tablica" = ?', (table_name,)).fetchone()
+    return row[0] if row and row[0] else ""
+
+def bump_data_version(connection: sqlite3.Connection, table_name: str):
+    """
+    Increases the version number of the data in a table.
+
+    It should be called in the same transaction that changes the table. The first call
+    for a table also chooses the identifier returned by get_data_generation.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+    """
+    connection.execute('CREATE TABLE IF NOT EXISTS "Verzije_Podataka" ("Tablica" TEXT PRIMARY KEY, "Verzija" INTEGER NOT NULL, "Generacija" TEXT)')
+    if "Generacija" not in get_sql_column_names(connection, "Verzije_Podataka"):
+        connection.execute('ALTER TABLE "Verzije_Podataka" ADD COLUMN "Generacija" TEXT')
+    connection.execute("""
+        INSERT INTO "Verzije_Podataka" ("Tablica", "Verzija", "Generacija") VALUES (?, 1, ?)
+        ON CONFLICT ("Tablica") DO UPDATE SET "Verzija" = "Verzija" + 1, "Generacija" = COALESCE("Generacija", excluded."Generacija")
+    """, (table_name, uuid.uuid4().hex))
+    connection.commit()
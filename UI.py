@@ -1,73 +1,168 @@
 import customtkinter as ctk
-from functions import excel_to_dateframe, generate_report,add_data_to_database, pull_data_from_database, unique_values
+from functions import stream_file_to_database, generate_report,add_data_to_database, pull_data_from_database, unique_values, get_selected_workers, get_worker_names, save_worker_selection
 from customtkinter import filedialog
-from error import error
+from error import error, info
+from background import run_in_background, cancel_job, is_cancelled
 import customtkinter as ctk
 from CTkMessagebox import CTkMessagebox
 import os
 import pandas as pd
 from DB_manager import remove_table
+from worker_list import VirtualCheckList
+from data_preview import PreviewTable
 
-def save_selected_workers(checkboxes: list):
+def save_selected_workers(worker_list: VirtualCheckList):
     
-    dataframe = []
-    
-    for checkbox in checkboxes:
-        
-        if checkbox.get() == 1:
-            text = checkbox.cget("text")
-            dataframe.append(text)
-        else:
-            pass
-    dataframe = pd.DataFrame(dataframe)
-    add_data_to_database(dataframe, "Radnici")
+    added, removed = save_worker_selection(worker_list.get_selected())
+    info(f"Selection saved ({added} added, {removed} removed)")
             
-def reset_selected_workers(checkboxes: list):
+def reset_selected_workers(worker_list: VirtualCheckList):
 
-    for checkbox in checkboxes:
-        checkbox.deselect()
+    worker_list.clear()
         
-def check_all_workers(checkboxes):
-    for var in checkboxes:
-        var.toggle()
+def check_all_workers(worker_list: VirtualCheckList):
 
-def worker_selection_screen(root_workers, data):
+    worker_list.select_all()
+
+def worker_selection_screen(root_workers, worker_names: list):
    
-    worker_names = unique_values(data, "Ime")
-    checkbox_frame = ctk.CTkScrollableFrame(master=root_workers)
-    checkbox_frame.pack(padx = 5, pady = 5)
+    worker_list = VirtualCheckList(root_workers, worker_names, selected=get_selected_workers() or ())
+    worker_list.pack(padx = 5, pady = 5)
 
     button_frame = ctk.CTkFrame(master=root_workers)
     button_frame.pack(padx = 5, pady = 5)
 
-    checkboxes = []
-
-    for index, worker in worker_names.itertuples():
-        var = ctk.BooleanVar(value=False) 
-        checkbox = ctk.CTkCheckBox(checkbox_frame, text = worker, width=300, onvalue=1, offvalue=0, variable=var)
-        checkbox.grid(row = index , column = 0, padx = 5, pady = 5)
-        checkboxes.append(checkbox)
-
-    save_button = ctk.CTkButton(button_frame, text="Save selection", command=lambda: save_selected_workers(checkboxes))
+    save_button = ctk.CTkButton(button_frame, text="Save selection", command=lambda: save_selected_workers(worker_list))
     save_button.grid(row = 0, column = 0, padx = 5, pady = 5)
 
-    select_all_worker = ctk.CTkButton(button_frame, text="Select all workers", command=lambda: check_all_workers(checkboxes))
+    select_all_worker = ctk.CTkButton(button_frame, text="Select all workers", command=lambda: check_all_workers(worker_list))
     select_all_worker.grid(row = 0, column = 1, padx = 5, pady = 5)
 
-    reset_button = ctk.CTkButton(button_frame, text="Reset Selection", command=lambda: reset_selected_workers(checkboxes))
+    reset_button = ctk.CTkButton(button_frame, text="Reset Selection", command=lambda: reset_selected_workers(worker_list))
     reset_button.grid(row = 0, column = 2, padx = 5, pady = 5)
 
 def open_worker_selection_screen():
-    data = pull_data_from_database("Brzina_Radnika")
+    worker_names = get_worker_names()
     
-    if data is None:
+    if worker_names is None:
         error("Database is not selected")
     else:
         root_workers = ctk.CTkToplevel()
         root_workers.title("Worker list")
-        worker_selection_screen(root_workers, data)
+        worker_selection_screen(root_workers, worker_names)
         root_workers.mainloop()
 
+def open_preview_screen(root: ctk.CTk):
+
+    root_preview = ctk.CTkToplevel(root)
+    root_preview.title("Preview podataka")
+    preview = PreviewTable(root_preview, root)
+    preview.pack(padx = 5, pady = 5, fill = "both", expand = True)
+
+def progress_frame(master: ctk.CTkFrame, job_name: str):
+    """Adds a progress bar, a status label and a cancel button for a background job.
+
+    Args:
+        master (ctk.CTkFrame): The frame the widgets are added to.
+        job_name (str): The name of the background job the cancel button stops.
+
+    Returns:
+        tuple: The frame holding the widgets and a function that takes (done, total) and updates them.
+    """
+    frame = ctk.CTkFrame(master)
+    frame.pack(padx = 5, pady = 5)
+
+    progress_bar = ctk.CTkProgressBar(frame, width=300)
+    progress_bar.set(0)
+    progress_bar.grid(row = 0, column = 0, padx = 5, pady = 5)
+
+    status_label = ctk.CTkLabel(frame, text="")
+    status_label.grid(row = 0, column = 1, padx = 5, pady = 5)
+
+    cancel_button = ctk.CTkButton(frame, text="Cancel", command=lambda: cancel_job(job_name))
+    cancel_button.grid(row = 0, column = 2, padx = 5, pady = 5)
+
+    def update(done: int, total: int = None):
+        if total:
+            progress_bar.set(min(done / total, 1))
+            status_label.configure(text=f"{done}/{total}")
+        else:
+            status_label.configure(text=str(done))
+
+    return frame, update
+
+def start_upload(root: ctk.CTk, master: ctk.CTkFrame, filepath: str):
+
+    frame, update = progress_frame(master, "upload")
+
+    def done(rows_added: int):
+        frame.destroy()
+        info(f"{rows_added} new rows were added")
+        selection_screen(root)
+
+    started = run_in_background(root, "upload", stream_file_to_database, filepath,
+                                on_done=done, on_progress=update,
+                                on_error=lambda exception: (frame.destroy(), error(str(exception))),
+                                on_cancel=lambda: (frame.destroy(), info("Upload cancelled")))
+    if not started:
+        frame.destroy()
+        info("The file is already being uploaded")
+
+def watch_folder(directory: str, progress) -> int:
+    """Ingests the files dropped into a directory until the watch is cancelled.
+
+    Args:
+        directory (str): The directory that is watched.
+        progress (callable): Called with the number of files ingested so far.
+
+    Returns:
+        int: The number of files that were ingested.
+    """
+    from watcher import FolderWatcher
+
+    ingested = 0
+    earlier_scans = 0
+    # scan reports the files ingested so far in the current scan, once per batch of files.
+    def file_done(done, total, failed):
+        nonlocal ingested, earlier_scans
+        ingested = earlier_scans + done
+        if done + failed == total:
+            earlier_scans = ingested
+        progress(ingested)
+
+    FolderWatcher(directory).watch(progress=file_done, stop=lambda: is_cancelled("watch"))
+    return ingested
+
+def start_watch(root: ctk.CTk, master: ctk.CTkFrame):
+
+    directory = filedialog.askdirectory()
+    if not directory:
+        return
+
+    frame, update = progress_frame(master, "watch")
+
+    started = run_in_background(root, "watch", watch_folder, directory,
+                                on_done=lambda files: (frame.destroy(), info(f"Watching stopped, {files} files were ingested")),
+                                on_progress=update,
+                                on_error=lambda exception: (frame.destroy(), error(str(exception))),
+                                on_cancel=lambda: (frame.destroy(), info("Watching stopped")))
+    if not started:
+        frame.destroy()
+        info("A folder is already being watched")
+
+def start_report(root: ctk.CTk, master: ctk.CTkFrame, *checkbox_states, **filters):
+
+    frame, update = progress_frame(master, "report")
+
+    started = run_in_background(root, "report", generate_report, *checkbox_states, **filters,
+                                on_done=lambda _: (frame.destroy(), info("Report generated")),
+                                on_progress=update,
+                                on_error=lambda exception: (frame.destroy(), error(str(exception))),
+                                on_cancel=lambda: (frame.destroy(), info("Report cancelled")))
+    if not started:
+        frame.destroy()
+        info("A report is already being generated")
+
 def select_file(file_path_entry: ctk.CTkEntry, root: ctk.CTk):
 
     file_types = [("Excel files", "*xlsx"), ("CSV files", "*csv")]
@@ -82,7 +177,7 @@ def select_file(file_path_entry: ctk.CTkEntry, root: ctk.CTk):
             upload_data_button_frame = ctk.CTkFrame(root)
             upload_data_button_frame.pack(padx = 5, pady = 5)
 
-            upload_data_button = ctk.CTkButton(upload_data_button_frame, text = "Upload file", command= lambda: (excel_to_dateframe(filepath), selection_screen(root)))
+            upload_data_button = ctk.CTkButton(upload_data_button_frame, text = "Upload file", command= lambda: start_upload(root, upload_data_button_frame, filepath))
             upload_data_button.pack(padx = 5, pady = 5)
 
         else:
@@ -115,10 +210,51 @@ def selection_screen(root: ctk.CTk):
     checkbox6 = ctk.CTkCheckBox(checkbox_frame, text = "Najgori radnici po procesu", width=300, onvalue=1, offvalue=0)
     checkbox6.grid(row = 2, column = 1, padx = 5, pady = 5)
 
+    checkbox7 = ctk.CTkCheckBox(checkbox_frame, text = "Prosjeci po mjesecima", width=300, onvalue=1, offvalue=0)
+    checkbox7.grid(row = 3, column = 0, padx = 5, pady = 5)
+
+    checkbox8 = ctk.CTkCheckBox(checkbox_frame, text = "Pomični prosjek radnika", width=300, onvalue=1, offvalue=0)
+    checkbox8.grid(row = 3, column = 1, padx = 5, pady = 5)
+
+    checkbox9 = ctk.CTkCheckBox(checkbox_frame, text = "Napredak radnika", width=300, onvalue=1, offvalue=0)
+    checkbox9.grid(row = 4, column = 0, padx = 5, pady = 5)
+
+    checkbox10 = ctk.CTkCheckBox(checkbox_frame, text = "Grafovi", width=300, onvalue=1, offvalue=0)
+    checkbox10.grid(row = 4, column = 1, padx = 5, pady = 5)
+
+    date_frame = ctk.CTkFrame(root)
+    date_frame.pack(padx = 5, pady = 5)
+
+    date_from_entry = ctk.CTkEntry(date_frame, placeholder_text="Od (YYYY-MM-DD)", width=300)
+    date_from_entry.grid(row = 0, column = 0, padx = 5, pady = 5)
+
+    date_to_entry = ctk.CTkEntry(date_frame, placeholder_text="Do (YYYY-MM-DD)", width=300)
+    date_to_entry.grid(row = 0, column = 1, padx = 5, pady = 5)
+
+    compare_from_entry = ctk.CTkEntry(date_frame, placeholder_text="Usporedba od (YYYY-MM-DD)", width=300)
+    compare_from_entry.grid(row = 1, column = 0, padx = 5, pady = 5)
+
+    compare_to_entry = ctk.CTkEntry(date_frame, placeholder_text="Usporedba do (YYYY-MM-DD)", width=300)
+    compare_to_entry.grid(row = 1, column = 1, padx = 5, pady = 5)
+
+    top_entry = ctk.CTkEntry(date_frame, placeholder_text="Broj najbržih/najsporijih radnika (svi)", width=300)
+    top_entry.grid(row = 2, column = 0, padx = 5, pady = 5)
+
     button_frame = ctk.CTkFrame(root)
     button_frame.pack(padx = 5, pady = 5)
 
-    generate_report_button = ctk.CTkButton(button_frame, text = "Generate report", command= lambda: generate_report(checkbox1.get(), checkbox2.get(), checkbox3.get(), checkbox4.get(), checkbox5.get(), checkbox6.get()))
+    format_menu = ctk.CTkOptionMenu(button_frame, values=["docx", "xlsx", "pdf"])
+    format_menu.pack(padx = 5, pady = 5)
+
+    appendix_checkbox = ctk.CTkCheckBox(button_frame, text = "Prilog sa sirovim podacima (xlsx, pdf)", width=300, onvalue=1, offvalue=0)
+    appendix_checkbox.pack(padx = 5, pady = 5)
+
+    generate_report_button = ctk.CTkButton(button_frame, text = "Generate report", command= lambda: start_report(root, button_frame, checkbox1.get(), checkbox2.get(), checkbox3.get(), checkbox4.get(), checkbox5.get(), checkbox6.get(),
+                                                                                                               checkbox7.get(), checkbox8.get(), checkbox9.get(), checkbox10.get(),
+                                                                                                               workers=get_selected_workers(), date_from=date_from_entry.get() or None, date_to=date_to_entry.get() or None,
+                                                                                                               compare_from=compare_from_entry.get() or None, compare_to=compare_to_entry.get() or None,
+                                                                                                               output_path=f"test.{format_menu.get()}", raw_appendix=appendix_checkbox.get() == 1,
+                                                                                                               top_n=int(top_entry.get()) if top_entry.get().strip().isdigit() else None))
     generate_report_button.pack(padx = 5, pady = 5)
 
 def show_main_screen(root: ctk.ctk_tk):
@@ -135,6 +271,12 @@ def show_main_screen(root: ctk.ctk_tk):
     select_file_button = ctk.CTkButton(main_frame, text="Select file", command=lambda: select_file(file_path_entry, root))
     select_file_button.grid(row = 1, column = 1, padx = 5, pady = 5)
 
+    preview_button = ctk.CTkButton(main_frame, text="Preview", command=lambda: open_preview_screen(root))
+    preview_button.grid(row = 2, column = 1, padx = 5, pady = 5)
+
+    watch_button = ctk.CTkButton(main_frame, text="Watch folder", command=lambda: start_watch(root, root))
+    watch_button.grid(row = 3, column = 1, padx = 5, pady = 5)
+
 def app():
 
     root = ctk.CTk()
@@ -0,0 +1,197 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+AGGREGATE_COLUMNS = ["count", "sum", "sum_sq", "min", "max"]
+
+def aggregate_speeds(df: pd.DataFrame, by: list = None) -> pd.DataFrame:
+    """
+    Calculates the count, sum, sum of squares, minimum and maximum of 'Brzina'
+    for every 'Ime' and 'Sirovina' combination in a single groupby pass.
+
+    Every report section can be derived from the result, so the raw data only has to be
+    grouped once per report no matter how many sections are selected.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame. It should have columns 'Ime', 'Sirovina', and 'Brzina'.
+        by (list, optional): The columns to group by. Defaults to ['Ime', 'Sirovina'].
+
+    Returns:
+        pd.DataFrame: A DataFrame with the grouping columns and 'count', 'sum', 'sum_sq', 'min' and 'max',
+        one row per group.
+    """
+    by = ["Ime", "Sirovina"] if by is None else by
+    speeds = df["Brzina"].astype("float64")
+    grouped = df[by].assign(Brzina=speeds, Brzina_sq=speeds * speeds).groupby(by, observed=True)
+
+    aggregate = grouped.agg(
+        count=("Brzina", "count"),
+        sum=("Brzina", "sum"),
+        sum_sq=("Brzina_sq", "sum"),
+        min=("Brzina", "min"),
+        max=("Brzina", "max"),
+    )
+    return aggregate.reset_index()
+
+def _variance(count: pd.Series, total: pd.Series, total_sq: pd.Series) -> pd.Series:
+    """
+    Calculates the sample variance from a count, sum and sum of squares.
+
+    Args:
+        count (pd.Series): Number of values.
+        total (pd.Series): Sum of the values.
+        total_sq (pd.Series): Sum of the squared values.
+
+    Returns:
+        pd.Series: The sample variance, NaN where there are fewer than two values.
+    """
+    variance = (total_sq - total * total / count) / (count - 1)
+    return variance.clip(lower=0).where(count > 1, np.nan)
+
+def person_averages(aggregate: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculates the average 'Brzina' for each 'Ime' and 'Sirovina' combination from an aggregate.
+
+    Args:
+        aggregate (pd.DataFrame): The result of aggregate_speeds.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Ime', 'Sirovina' and 'Brzina', where 'Brzina' is rounded to 2 decimal places.
+    """
+    result = aggregate[["Ime", "Sirovina"]].copy()
+    result["Brzina"] = (aggregate["sum"] / aggregate["count"]).round(2)
+    return result
+
+def process_totals(aggregate: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rolls an aggregate up from 'Ime' and 'Sirovina' combinations to 'Sirovina' alone.
+
+    Args:
+        aggregate (pd.DataFrame): The result of aggregate_speeds.
+
+    Returns:
+        pd.DataFrame: A DataFrame indexed by 'Sirovina' with columns 'count', 'sum', 'sum_sq', 'min' and 'max'.
+    """
+    return aggregate.groupby("Sirovina", observed=True).agg(
+        count=("count", "sum"),
+        sum=("sum", "sum"),
+        sum_sq=("sum_sq", "sum"),
+        min=("min", "min"),
+        max=("max", "max"),
+    )
+
+def process_averages(aggregate: pd.DataFrame) -> pd.Series:
+    """
+    Calculates the average 'Brzina' for each process from an aggregate.
+
+    Args:
+        aggregate (pd.DataFrame): The result of aggregate_speeds, or per-process totals indexed by 'Sirovina'.
+
+    Returns:
+        pd.Series: A Series named 'Brzina' indexed by 'Sirovina', rounded to 2 decimal places.
+    """
+    totals = process_totals(aggregate) if "Ime" in aggregate.columns else aggregate
+    return (totals["sum"] / totals["count"]).round(2).rename("Brzina")
+
+def process_standard_deviations(aggregate: pd.DataFrame) -> pd.Series:
+    """
+    Calculates the standard deviation of 'Brzina' for each process from an aggregate.
+
+    Args:
+        aggregate (pd.DataFrame): The result of aggregate_speeds, or per-process totals indexed by 'Sirovina'.
+
+    Returns:
+        pd.Series: A Series named 'Brzina' indexed by 'Sirovina'.
+    """
+    totals = process_totals(aggregate) if "Ime" in aggregate.columns else aggregate
+    return np.sqrt(_variance(totals["count"], totals["sum"], totals["sum_sq"])).rename("Brzina")
+
+def worker_differences(person_average: pd.DataFrame, process_average: pd.Series) -> pd.DataFrame:
+    """
+    Calculates the difference between each worker's average speed and the process average.
+
+    Args:
+        person_average (pd.DataFrame): The result of person_averages.
+        process_average (pd.Series): The result of process_averages.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Ime', 'Sirovina', 'Prosječna brzina', 'Brzina',
+        'Difference' and 'Difference %'.
+    """
+    merged_df = pd.merge(person_average, process_average, on="Sirovina")
+    merged_df['Difference'] = (merged_df['Brzina_x'] - merged_df['Brzina_y']).round(2)
+    merged_df["Difference %"] = ((merged_df["Difference"]/merged_df["Brzina_y"])*100).round(2)
+    merged_df = merged_df.rename(columns={"Brzina_x": "Brzina" ,"Brzina_y": "Prosječna brzina"})
+
+    return merged_df[['Ime', 'Sirovina', "Prosječna brzina","Brzina",'Difference', "Difference %"]]
+
+def workers_by_process(person_average: pd.DataFrame, ascending: bool, top_n: int = None) -> dict:
+    """
+    Splits the per-person averages by process and sorts each process by speed.
+
+    With top_n only the top_n fastest (or slowest) workers of every process are kept. They are
+    picked with a heap of top_n entries instead of sorting the whole process, so a process with
+    g workers costs O(g log top_n). Workers with the same speed keep their order in person_average.
+
+    Args:
+        person_average (pd.DataFrame): The result of person_averages.
+        ascending (bool): Sort slowest first if True, fastest first if False.
+        top_n (int, optional): The number of workers kept per process. Defaults to None, which keeps all of them.
+
+    Returns:
+        dict: A dictionary where each key is a process and the value is a DataFrame of its workers sorted by 'Brzina'.
+    """
+    if top_n is None:
+        ordered = person_average.sort_values(by=["Sirovina", "Brzina"], ascending=[True, ascending], kind="stable")
+        return {process: group for process, group in ordered.groupby("Sirovina", sort=False, observed=True)}
+
+    # Missing averages sort last, as they do in sort_values.
+    missing = np.inf if ascending else -np.inf
+    speeds = np.nan_to_num(person_average["Brzina"].to_numpy(dtype="float64"), nan=missing)
+    select = heapq.nsmallest if ascending else heapq.nlargest
+
+    result = {}
+    for process, positions in person_average.groupby("Sirovina", sort=True, observed=True).indices.items():
+        chosen = select(max(top_n, 0), positions.tolist(), key=speeds.__getitem__)
+        result[process] = person_average.iloc[chosen]
+    return result
+
+def period_differences(first: pd.DataFrame, second: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """
+    Compares the average speeds of two periods.
+
+    Args:
+        first (pd.DataFrame): The averages of the first period, with the key columns and 'Brzina'.
+        second (pd.DataFrame): The averages of the second period, with the key columns and 'Brzina'.
+        keys (list): The columns the two periods are matched on, for example ['Ime', 'Sirovina'].
+
+    Returns:
+        pd.DataFrame: A DataFrame with the key columns, 'Prvo razdoblje', 'Drugo razdoblje', 'Difference'
+        and 'Difference %'. Keys present in only one period have NaN for the other one.
+    """
+    merged_df = pd.merge(first[keys + ["Brzina"]], second[keys + ["Brzina"]], on=keys, how="outer")
+    merged_df = merged_df.rename(columns={"Brzina_x": "Prvo razdoblje", "Brzina_y": "Drugo razdoblje"})
+    merged_df["Difference"] = (merged_df["Drugo razdoblje"] - merged_df["Prvo razdoblje"]).round(2)
+    merged_df["Difference %"] = ((merged_df["Difference"] / merged_df["Prvo razdoblje"]) * 100).round(2)
+
+    return merged_df.sort_values(keys, kind="stable").reset_index(drop=True)
+
+def compare_aggregates(first_aggregate: pd.DataFrame, first_total: pd.DataFrame,
+                       second_aggregate: pd.DataFrame, second_total: pd.DataFrame) -> tuple:
+    """
+    Compares the per-worker and per-process averages of two periods.
+
+    Args:
+        first_aggregate (pd.DataFrame): The per-worker aggregate of the first period (see aggregate_speeds).
+        first_total (pd.DataFrame): The per-process totals of the first period (see process_totals).
+        second_aggregate (pd.DataFrame): The per-worker aggregate of the second period.
+        second_total (pd.DataFrame): The per-process totals of the second period.
+
+    Returns:
+        tuple: The per-worker and the per-process comparison (see period_differences).
+    """
+    per_worker = period_differences(person_averages(first_aggregate), person_averages(second_aggregate), ["Ime", "Sirovina"])
+    per_process = period_differences(
+        process_averages(first_total).reset_index(), process_averages(second_total).reset_index(), ["Sirovina"]
+    )
+    return per_worker, per_process
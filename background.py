@@ -0,0 +1,126 @@
+import queue
+import threading
+from DB_manager import close_connections
+from error import error, show_pending_messages
+
+_running = {}
+
+
+class JobCancelled(Exception):
+    """Raised inside a background job when its cancel button was pressed."""
+
+
+def is_running(name: str) -> bool:
+    """
+    Checks whether a background job with the given name is running.
+
+    Args:
+        name (str): The name of the job.
+
+    Returns:
+        bool: True if the job is running, False otherwise.
+    """
+    return name in _running
+
+def cancel_job(name: str):
+    """
+    Asks a running background job to stop.
+
+    The job stops the next time it reports progress. Work that was already committed
+    to the database, such as the chunks of an upload, is kept.
+
+    Args:
+        name (str): The name of the job.
+    """
+    if name in _running:
+        _running[name].set()
+
+def is_cancelled(name: str) -> bool:
+    """
+    Checks whether cancel_job was called for a running background job.
+
+    Jobs that do not report progress, such as a folder watch waiting for files, use it to stop.
+
+    Args:
+        name (str): The name of the job.
+
+    Returns:
+        bool: True if the job is running and was asked to stop.
+    """
+    return name in _running and _running[name].is_set()
+
+def run_in_background(root, name: str, target, *args, on_done=None, on_progress=None, on_error=None,
+                      on_cancel=None, poll_ms: int = 100, **kwargs) -> bool:
+    """
+    Runs a function on a worker thread without blocking the Tk mainloop.
+
+    The function is called with an additional progress keyword argument. Everything it passes
+    to progress is put on a queue, which is polled from the mainloop with root.after, so the
+    callbacks always run on the main thread. Only one job with a given name can run at a time.
+    The database connections the function opened with get_connection are closed when it ends.
+
+    Args:
+        root: The Tk window whose mainloop polls the queue.
+        name (str): The name of the job, used to prevent two runs of the same job.
+        target (callable): The function to run.
+        *args: Positional arguments for the function.
+        on_done (callable, optional): Called with the return value of the function. Defaults to None.
+        on_progress (callable, optional): Called with the values passed to progress. Defaults to None.
+        on_error (callable, optional): Called with the exception raised by the function.
+            Defaults to None, which shows the exception in an error popup.
+        on_cancel (callable, optional): Called when the job stopped after cancel_job. Defaults to None.
+        poll_ms (int, optional): How often the queue is polled, in milliseconds. Defaults to 100.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        bool: True if the job was started, False if a job with the same name is already running.
+    """
+    if name in _running:
+        return False
+
+    cancel_event = threading.Event()
+    messages = queue.Queue()
+    _running[name] = cancel_event
+
+    def progress(*values):
+        if cancel_event.is_set():
+            raise JobCancelled()
+        messages.put(("progress", values))
+
+    def work():
+        try:
+            messages.put(("done", target(*args, progress=progress, **kwargs)))
+        except JobCancelled:
+            messages.put(("cancelled", None))
+        except Exception as exception:
+            messages.put(("error", exception))
+        finally:
+            close_connections()
+
+    def poll():
+        show_pending_messages()
+        while True:
+            try:
+                kind, value = messages.get_nowait()
+            except queue.Empty:
+                root.after(poll_ms, poll)
+                return
+
+            if kind == "progress":
+                if on_progress is not None:
+                    on_progress(*value)
+                continue
+
+            del _running[name]
+            if kind == "done" and on_done is not None:
+                on_done(value)
+            elif kind == "cancelled" and on_cancel is not None:
+                on_cancel()
+            elif kind == "error":
+                (on_error or (lambda exception: error(str(exception))))(value)
+            show_pending_messages()
+            return
+
+    threading.Thread(target=work, name=name, daemon=True).start()
+    root.after(poll_ms, poll)
+    return True
@@ -0,0 +1,223 @@
+import datetime
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import DB_manager
+import charts
+from DB_manager import configure_database
+from aggregation import aggregate_speeds, process_totals, compare_aggregates
+from functions import build_report_data, parse_date
+from export import export_report
+from snapshot import load_production_data
+
+_snapshot = None
+
+def _filter_rows(data: pd.DataFrame, workers: list = None, materials: list = None, date_from=None, date_to=None) -> pd.DataFrame:
+    """
+    Selects the snapshot rows matching the report filters.
+
+    Args:
+        data (pd.DataFrame): The production data snapshot.
+        workers (list, optional): Only rows of these workers are kept. Defaults to None.
+        materials (list, optional): Only rows of these processes are kept. Defaults to None.
+        date_from (optional): The first day of the date range, inclusive. Defaults to None.
+        date_to (optional): The last day of the date range, inclusive. Defaults to None.
+
+    Returns:
+        pd.DataFrame: The matching rows.
+    """
+    mask = pd.Series(True, index=data.index)
+    if workers is not None:
+        mask &= data["Ime"].isin(workers)
+    if materials is not None:
+        mask &= data["Sirovina"].isin(materials)
+    if date_from is not None:
+        mask &= data["Datum"] >= parse_date(date_from).normalize()
+    if date_to is not None:
+        mask &= data["Datum"] < parse_date(date_to).normalize() + pd.Timedelta(days=1)
+    return data[mask]
+
+def snapshot_aggregates(data: pd.DataFrame, workers: list = None, materials: list = None, date_from=None, date_to=None) -> tuple:
+    """
+    Calculates the aggregates of a report from the production data snapshot.
+
+    The result has the same form as load_report_aggregates. The per-process totals are not
+    limited to the selected workers.
+
+    Args:
+        data (pd.DataFrame): The production data snapshot.
+        workers (list, optional): Only these workers are included. Defaults to None.
+        materials (list, optional): Only these processes are included. Defaults to None.
+        date_from (optional): The first day of the date range, inclusive. Defaults to None.
+        date_to (optional): The last day of the date range, inclusive. Defaults to None.
+
+    Returns:
+        tuple: The per-worker aggregate and the per-process totals.
+    """
+    in_range = _filter_rows(data, None, materials, date_from, date_to)
+    process_total = process_totals(aggregate_speeds(in_range))
+    selected = in_range if workers is None else in_range[in_range["Ime"].isin(workers)]
+    aggregate = aggregate_speeds(selected).sort_values(["Ime", "Sirovina"], kind="stable").reset_index(drop=True)
+    return aggregate, process_total
+
+def render_report(spec: dict, data: pd.DataFrame, created_at: datetime.datetime = None) -> str:
+    """
+    Generates one report of a batch from the production data snapshot.
+
+    Args:
+        spec (dict): The report specification. It must have an 'output_path', whose extension selects the format, and can have 'states'
+            (the states of the ten report checkboxes), 'workers', 'materials', 'date_from', 'date_to',
+            'compare_from', 'compare_to' and 'top_n', with the same meaning as in generate_report.
+        data (pd.DataFrame): The production data snapshot.
+        created_at (datetime.datetime, optional): The time written in the heading. Defaults to None, which uses the current time.
+
+    Returns:
+        str: The path of the saved document.
+    """
+    workers, materials = spec.get("workers"), spec.get("materials")
+    date_from, date_to = spec.get("date_from"), spec.get("date_to")
+    compare_from, compare_to = spec.get("compare_from"), spec.get("compare_to")
+
+    aggregate, process_total = snapshot_aggregates(data, workers, materials, date_from, date_to)
+
+    compare = None
+    if compare_from is not None or compare_to is not None:
+        compare = lambda: compare_aggregates(
+            aggregate, process_total, *snapshot_aggregates(data, workers, materials, compare_from, compare_to)
+        )
+
+    data_dict = build_report_data(
+        spec.get("states", [1, 1, 1, 1, 0, 0]), aggregate, process_total,
+        lambda: _filter_rows(data, workers, materials, date_from, date_to), compare, top_n=spec.get("top_n"),
+    )
+    return export_report(data_dict, spec["output_path"], created_at)
+
+def _init_worker(database: str):
+    """
+    Loads the production data snapshot once in every process of the pool.
+
+    Args:
+        database (str): The path of the database the parent process uses.
+    """
+    global _snapshot
+    configure_database(database)
+    charts.MAX_WORKERS = 1
+    _snapshot = load_production_data()
+
+def _render_in_worker(spec: dict, created_at: datetime.datetime) -> str:
+    """
+    Generates one report inside a pool process.
+
+    Args:
+        spec (dict): The report specification (see render_report).
+        created_at (datetime.datetime): The time written in the heading.
+
+    Returns:
+        str: The path of the saved document.
+    """
+    return render_report(spec, _snapshot, created_at)
+
+def generate_reports(specs: list, max_workers: int = None, created_at: datetime.datetime = None, progress=None) -> list:
+    """
+    Generates a batch of reports in parallel across a pool of processes.
+
+    The snapshot of Brzina_Radnika is written once before the pool starts. Every process
+    memory-maps the same read-only Feather file, so the data is shared through the operating
+    system's page cache instead of being copied to each process. All reports get the same
+    heading time, so a batch run twice on the same data produces the same documents.
+    The reports are calculated from the stored rows only, so archived months are not included.
+
+    Args:
+        specs (list): The report specifications (see render_report). Every spec needs its own 'output_path'.
+        max_workers (int, optional): The number of processes. Defaults to None, which uses the number of CPUs.
+            With 1 the reports are generated in the calling process.
+        created_at (datetime.datetime, optional): The time written in the headings. Defaults to the start of the batch.
+        progress (callable, optional): Called with the number of finished reports and the total. Defaults to None.
+
+    Raises:
+        ValueError: If two specs have the same output path. Nothing is generated then.
+
+    Returns:
+        list: The paths of the saved documents, in the order of the specs.
+    """
+    paths = [spec["output_path"] for spec in specs]
+    if len(set(os.path.normcase(os.path.abspath(path)) for path in paths)) != len(paths):
+        raise ValueError("Every report in a batch needs its own output path")
+
+    created_at = datetime.datetime.now() if created_at is None else created_at
+    data = load_production_data()
+    if data is None or not specs:
+        return []
+
+    max_workers = os.cpu_count() if max_workers is None else max_workers
+    if max_workers <= 1 or len(specs) == 1:
+        for number, spec in enumerate(specs, start=1):
+            render_report(spec, data, created_at)
+            if progress is not None:
+                progress(number, len(specs))
+        return paths
+
+    del data
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(specs)), mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(os.path.abspath(DB_manager.DATABASE),)) as executor:
+        futures = [executor.submit(_render_in_worker, spec, created_at) for spec in specs]
+        for number, future in enumerate(as_completed(futures), start=1):
+            future.result()
+            if progress is not None:
+                progress(number, len(specs))
+
+    return paths
+
+def _file_name(value: str) -> str:
+    """
+    Replaces the characters that are not allowed in file names.
+
+    Args:
+        value (str): A worker or process name.
+
+    Returns:
+        str: The name with every disallowed character replaced by an underscore.
+    """
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", str(value)).strip("_") or "_"
+
+def month_end_specs(month: str, directory: str, states: list = None) -> list:
+    """
+    Builds the specifications of the month end batch: one report per worker and one per process.
+
+    Args:
+        month (str): The month in "YYYY-MM" form.
+        directory (str): The directory the reports are saved to.
+        states (list, optional): The states of the ten report checkboxes. Defaults to None,
+            which includes the averages, the differences and the standard deviations.
+
+    Returns:
+        list: The report specifications, workers first, both in alphabetical order. When two names
+        give the same file name, the later report gets a numbered suffix, so no report overwrites another.
+    """
+    start = pd.Timestamp(f"{month}-01")
+    date_from, date_to = start.strftime("%Y-%m-%d"), (start + pd.offsets.MonthEnd(0)).strftime("%Y-%m-%d")
+    data = load_production_data()
+    if data is None:
+        return []
+
+    in_month = _filter_rows(data, date_from=date_from, date_to=date_to)
+    states = [1, 1, 1, 1, 0, 0] if states is None else states
+    os.makedirs(directory, exist_ok=True)
+
+    specs, used = [], set()
+    for column, key, prefix in (("Ime", "workers", "radnik"), ("Sirovina", "materials", "proces")):
+        for value in sorted(in_month[column].dropna().unique()):
+            base = f"{month}_{prefix}_{_file_name(value)}"
+            name, number = base, 1
+            # Compared case-insensitively, because Windows does not tell "Ana" from "ANA" in file names.
+            while name.casefold() in used:
+                number += 1
+                name = f"{base}_{number}"
+            used.add(name.casefold())
+            specs.append({
+                "output_path": os.path.join(directory, f"{name}.docx"),
+                "states": states, key: [value], "date_from": date_from, "date_to": date_to,
+            })
+    return specs
@@ -0,0 +1,72 @@
+"""
+Compares insert throughput of DB_manager.insert_rows with pandas to_sql and
+with the per-item cursor.execute loop that insert_into_table used before.
+
+Usage:
+    python benchmarks/bench_bulk_insert.py [--rows 100000] [--batch-size 10000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from DB_manager import configure_database, create_table_for_dataframe, get_connection, insert_rows
+
+
+def make_rows(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Datum": pd.date_range("2024-01-01", periods=rows, freq="min"),
+        "Ime": rng.choice([f"Radnik {i}" for i in range(500)], rows),
+        "Sirovina": rng.choice([f"Sirovina {i}" for i in range(40)], rows),
+        "Brzina": rng.normal(100, 15, rows),
+    })
+
+def execute_per_item(connection, insert_sql: str, data: list):
+    cursor = connection.cursor()
+    for item in data:
+        cursor.execute(insert_sql, (item,))
+    connection.commit()
+    cursor.close()
+
+def rows_per_second(insert, dataframe: pd.DataFrame) -> float:
+    connection = get_connection()
+    create_table_for_dataframe(connection, "Bench", dataframe, replace=True)
+    start = time.perf_counter()
+    insert(connection, dataframe)
+    return len(dataframe) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    dataframe = make_rows(args.rows)
+    with tempfile.TemporaryDirectory() as directory:
+        configure_database(os.path.join(directory, "bench.db"))
+
+        results = {
+            "pandas to_sql": rows_per_second(
+                lambda connection, df: df.to_sql("Bench", connection, if_exists="append", index=False), dataframe),
+            "insert_rows (DataFrame)": rows_per_second(
+                lambda connection, df: insert_rows(connection, "Bench", df, batch_size=args.batch_size), dataframe),
+        }
+
+        names = dataframe[["Ime"]]
+        results["execute per item (one column)"] = rows_per_second(
+            lambda connection, df: execute_per_item(connection, 'INSERT INTO "Bench" ("Ime") VALUES (?)', df["Ime"].tolist()), names)
+        results["insert_rows (one column)"] = rows_per_second(
+            lambda connection, df: insert_rows(connection, "Bench", df, batch_size=args.batch_size), names)
+
+    for name, speed in results.items():
+        print(f"{name:<32} {speed:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
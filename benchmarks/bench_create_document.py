@@ -0,0 +1,67 @@
+"""
+Compares the time needed to render a report table row by row with python-docx
+and with report_generation.add_dataframe_table.
+
+Usage:
+    python benchmarks/bench_create_document.py [--rows 1000 10000 100000] [--skip-legacy-above 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from docx import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_generation import add_dataframe_table
+
+
+def make_section(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Ime": rng.choice([f"Radnik {i}" for i in range(500)], rows),
+        "Sirovina": rng.choice([f"Sirovina {i}" for i in range(40)], rows),
+        "Brzina": rng.normal(100, 15, rows).round(2),
+    })
+
+def legacy_table(document: Document, dataframe: pd.DataFrame):
+    table = document.add_table(rows=1, cols=len(dataframe.columns))
+    table.style = 'Table Grid'
+
+    hdr_cells = table.rows[0].cells
+    for i, column_name in enumerate(dataframe.columns):
+        hdr_cells[i].text = column_name
+
+    for _, row in dataframe.iterrows():
+        row_cells = table.add_row().cells
+        for i, item in enumerate(row):
+            row_cells[i].text = str(item)
+
+def time_render(render, dataframe: pd.DataFrame) -> float:
+    document = Document()
+    start = time.perf_counter()
+    render(document, dataframe)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--skip-legacy-above", type=int, default=None,
+                        help="do not time the row-by-row renderer for sections larger than this")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'row by row [s]':>16} {'bulk [s]':>10} {'speedup':>8}")
+    for rows in args.rows:
+        dataframe = make_section(rows)
+        bulk = time_render(add_dataframe_table, dataframe)
+        if args.skip_legacy_above is not None and rows > args.skip_legacy_above:
+            print(f"{rows:>8} {'-':>16} {bulk:>10.3f} {'-':>8}")
+            continue
+        legacy = time_render(legacy_table, dataframe)
+        print(f"{rows:>8} {legacy:>16.3f} {bulk:>10.3f} {legacy / bulk:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
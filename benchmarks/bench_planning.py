@@ -0,0 +1,76 @@
+"""
+Times planning.assign_workers on synthetic speed matrices, with SciPy's
+linear_sum_assignment and with the NumPy Hungarian fallback, and checks that
+both find a plan with the same total speed.
+
+Usage:
+    python benchmarks/bench_planning.py [--workers 100 300 500] [--processes 40] [--trained 0.3] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import planning
+
+
+def make_speeds(workers: int, processes: int, trained: float) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    speeds = rng.normal(100, 15, (workers, processes)).round(2)
+    speeds[rng.random((workers, processes)) > trained] = np.nan
+    return pd.DataFrame(speeds, index=[f"Radnik {i}" for i in range(workers)],
+                        columns=[f"Sirovina {i}" for i in range(processes)])
+
+def make_capacity(workers: int, processes: int) -> dict:
+    # Roughly one place per available worker, spread unevenly over the processes.
+    rng = np.random.default_rng(1)
+    shares = rng.dirichlet(np.ones(processes))
+    return {f"Sirovina {i}": max(1, int(round(share * workers))) for i, share in enumerate(shares)}
+
+def time_plan(speeds: pd.DataFrame, capacity: dict, solver, repeat: int) -> tuple:
+    original = planning.linear_sum_assignment
+    planning.linear_sum_assignment = solver
+    try:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            plan = planning.assign_workers(speeds, capacity)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        planning.linear_sum_assignment = original
+    return best, plan
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[100, 300, 500])
+    parser.add_argument("--processes", type=int, default=40)
+    parser.add_argument("--trained", type=float, default=0.3,
+                        help="share of worker and process pairs with a known average speed")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    solvers = [("numpy", None)]
+    if planning.linear_sum_assignment is not None:
+        solvers.insert(0, ("scipy", planning.linear_sum_assignment))
+
+    print(f"{'workers':>8} {'places':>7} {'filled':>7} " + " ".join(f"{name + ' [s]':>10}" for name, _ in solvers) + f" {'total':>12}")
+    for workers in args.workers:
+        speeds = make_speeds(workers, args.processes, args.trained)
+        capacity = make_capacity(workers, args.processes)
+        timings, totals = [], []
+        for _, solver in solvers:
+            seconds, plan = time_plan(speeds, capacity, solver, args.repeat)
+            timings.append(seconds)
+            totals.append(plan["Brzina"].sum())
+        if not np.allclose(totals, totals[0]):
+            raise SystemExit(f"the solvers disagree for {workers} workers: {totals}")
+        print(f"{workers:>8} {len(plan):>7} {plan['Ime'].notna().sum():>7} "
+              + " ".join(f"{seconds:>10.3f}" for seconds in timings) + f" {totals[0]:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
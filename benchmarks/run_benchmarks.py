@@ -0,0 +1,209 @@
+"""
+Times every stage of the pipeline end to end on synthetic production data.
+
+The stages are reading and storing an Excel file, bulk storing a DataFrame, reading it
+back, every aggregation used by the reports, rendering the document and a whole report.
+Each stage runs --repeat times against a temporary database and the fastest and the
+median time are written as JSON. With --compare the results are compared to an earlier
+run and every stage that got slower than --threshold is reported as a regression.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--rows 100000] [--workers 50] [--materials 10] [--output results.json]
+    python benchmarks/run_benchmarks.py --compare baseline.json [--threshold 0.2]
+    python benchmarks/run_benchmarks.py --compare baseline.json --against results.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_data import generate_production_data, write_production_file
+
+
+def time_stage(run, setup=None, repeat: int = 3) -> dict:
+    """
+    Times a stage.
+
+    Args:
+        run (callable): The stage. Called with the value returned by setup.
+        setup (callable, optional): Prepares one run of the stage, untimed. Defaults to None.
+        repeat (int, optional): The number of timed runs. Defaults to 3.
+
+    Returns:
+        dict: The fastest and the median time in seconds and the time of every run,
+        or the error message if the stage failed.
+    """
+    runs = []
+    try:
+        for _ in range(repeat):
+            argument = setup() if setup is not None else None
+            start = time.perf_counter()
+            run(argument)
+            runs.append(time.perf_counter() - start)
+    except Exception as exception:
+        return {"error": f"{type(exception).__name__}: {exception}"}
+    return {"seconds": min(runs), "median": statistics.median(runs), "runs": runs}
+
+def run_suite(rows: int, workers: int, materials: int, months: int, repeat: int, directory: str) -> dict:
+    """
+    Runs every benchmark stage on newly generated data.
+
+    Args:
+        rows (int): The number of generated measurements.
+        workers (int): The number of generated workers.
+        materials (int): The number of generated processes.
+        months (int): The number of months the data covers.
+        repeat (int): The number of timed runs of each stage.
+        directory (str): A temporary directory for the data file and the databases.
+
+    Returns:
+        dict: The results of every stage, keyed by the name of the stage.
+    """
+    from error import set_handler, console_handler
+    set_handler(console_handler)
+
+    import functions
+    from DB_manager import configure_database, close_connections
+    from report_cache import report_cache
+    from report_generation import create_document
+
+    data = generate_production_data(rows, workers, materials, months=months)
+    path = os.path.join(directory, "podaci.xlsx")
+    write_production_file(data, path)
+    databases = iter(range(10 ** 6))
+
+    def fresh_database():
+        close_connections()
+        configure_database(os.path.join(directory, f"bench_{next(databases)}.db"))
+
+    results = {}
+    results["excel_to_dateframe"] = time_stage(lambda _: functions.excel_to_dateframe(path), fresh_database, repeat)
+    results["stream_file_to_database"] = time_stage(lambda _: functions.stream_file_to_database(path), fresh_database, repeat)
+
+    fresh_database()
+    functions.stream_file_to_database(path)
+    results["add_data_to_database"] = time_stage(lambda _: functions.add_data_to_database(data, "Benchmark"), repeat=repeat)
+    results["pull_data_from_database"] = time_stage(lambda _: functions.pull_data_from_database("Brzina_Radnika"), repeat=repeat)
+
+    stored = functions.pull_data_from_database("Brzina_Radnika")
+    rows_frame = functions.load_report_rows()
+    aggregations = {
+        "averages_per_person": lambda: functions.averages_per_person(stored),
+        "averages_per_process": lambda: functions.averages_per_process(stored),
+        "calculate_difference": lambda: functions.calculate_difference(stored),
+        "standard_deviation_per_process": lambda: functions.standard_deviation_per_process(stored),
+        "sort_workers": lambda: functions.sort_workers(stored, False),
+        "count_workers_in_process": lambda: functions.count_workers_in_process(stored),
+        "worker_speed_best_all_time": lambda: functions.worker_speed_best_all_time(stored),
+        "worker_speed_best_all_time_top_5": lambda: functions.worker_speed_best_all_time(stored, 5),
+        "load_worker_ranking": lambda: functions.load_worker_ranking(5),
+        "load_report_aggregates": lambda: functions.load_report_aggregates(),
+        "monthly_averages_per_worker": lambda: functions.monthly_averages_per_worker(rows_frame),
+        "latest_rolling_averages": lambda: functions.latest_rolling_averages(rows_frame),
+        "worker_trends": lambda: functions.worker_trends(rows_frame),
+    }
+    for name, aggregation in aggregations.items():
+        results[name] = time_stage(lambda _, aggregation=aggregation: aggregation(), repeat=repeat)
+
+    aggregate, process_total = functions.load_report_aggregates()
+    report_data = functions.build_report_data([1] * 9, aggregate, process_total, lambda: rows_frame)
+    document_path = os.path.join(directory, "izvjestaj.docx")
+    results["create_document"] = time_stage(lambda _: create_document(report_data, document_path), repeat=repeat)
+    results["generate_report"] = time_stage(
+        lambda _: functions.generate_report(*[1] * 9, output_path=document_path),
+        lambda: report_cache.invalidate(), repeat,
+    )
+
+    close_connections()
+    return results
+
+def compare_results(baseline: dict, current: dict, threshold: float, min_seconds: float) -> tuple:
+    """
+    Finds the stages that got slower between two runs.
+
+    A stage is a regression if its fastest time grew by more than the threshold and by
+    more than min_seconds, so that noise on very fast stages is not reported.
+
+    Args:
+        baseline (dict): The earlier results.
+        current (dict): The new results.
+        threshold (float): The allowed relative slowdown, for example 0.2 for 20 %.
+        min_seconds (float): The smallest absolute slowdown that is reported.
+
+    Returns:
+        tuple: One line of text per stage with regressions marked, and the number of regressions.
+    """
+    lines, regressions = [], 0
+    for stage, result in current["stages"].items():
+        before = baseline["stages"].get(stage, {})
+        if "seconds" not in result or "seconds" not in before:
+            lines.append(f"  {stage:32} {'n/a':>10}  {result.get('error', 'new stage') if 'seconds' not in result else 'no baseline'}")
+            continue
+
+        change = result["seconds"] / before["seconds"] - 1 if before["seconds"] else 0.0
+        regression = change > threshold and result["seconds"] - before["seconds"] > min_seconds
+        regressions += regression
+        marker = "REGRESSION" if regression else ("faster" if change < -threshold else "")
+        lines.append(f"  {stage:32} {before['seconds']:9.4f}s -> {result['seconds']:9.4f}s {change:+8.1%}  {marker}")
+    return lines, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--materials", type=int, default=10)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare the results with an earlier JSON file.")
+    parser.add_argument("--against", metavar="RESULTS", help="Compare this JSON file with the baseline instead of running the suite.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown before a stage is a regression.")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="Smallest absolute slowdown that is a regression.")
+    args = parser.parse_args()
+
+    if args.against is not None:
+        with open(args.against, encoding="utf-8") as file:
+            current = json.load(file)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            stages = run_suite(args.rows, args.workers, args.materials, args.months, args.repeat, directory)
+        current = {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "parameters": {"rows": args.rows, "workers": args.workers, "materials": args.materials,
+                           "months": args.months, "repeat": args.repeat},
+            "environment": {"python": platform.python_version(), "pandas": pd.__version__,
+                            "platform": platform.platform(), "cpus": os.cpu_count()},
+            "stages": stages,
+        }
+        for stage, result in stages.items():
+            print(f"  {stage:32} " + (f"{result['seconds']:9.4f}s" if "seconds" in result else result["error"]))
+
+        if args.output is not None:
+            with open(args.output, "w", encoding="utf-8") as file:
+                json.dump(current, file, indent=2)
+
+    if args.compare is None:
+        return 0
+
+    with open(args.compare, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline.get("parameters") != current.get("parameters"):
+        print(f"Warning: the runs used different parameters: {baseline.get('parameters')} and {current.get('parameters')}")
+
+    lines, regressions = compare_results(baseline, current, args.threshold, args.min_seconds)
+    print("\n".join(lines))
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Generates realistic synthetic production data for the benchmarks.
+
+Every worker has a skill level and a learning rate and works on a few processes
+only. Every process has its own base speed. The measurements are taken on working
+days during two shifts and are sorted by date, like the exports from production.
+
+Usage:
+    python benchmarks/synthetic_data.py output.xlsx [--rows 100000] [--workers 50] [--materials 10] [--months 12]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+def generate_production_data(rows: int = 100000, workers: int = 50, materials: int = 10, start: str = "2024-01-01",
+                             months: int = 12, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates synthetic production data.
+
+    Args:
+        rows (int, optional): The number of measurements. Defaults to 100000.
+        workers (int, optional): The number of workers. Defaults to 50.
+        materials (int, optional): The number of processes. Defaults to 10.
+        start (str, optional): The first day of the data. Defaults to "2024-01-01".
+        months (int, optional): The number of months the data covers. Defaults to 12.
+        seed (int, optional): The seed of the random generator, so the same arguments give the same data. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Datum', 'Ime', 'Sirovina' and 'Brzina', sorted by 'Datum'.
+    """
+    rng = np.random.default_rng(seed)
+    worker_names = np.array([f"Radnik {number:03d}" for number in range(1, workers + 1)])
+    material_names = np.array([f"Sirovina {number:02d}" for number in range(1, materials + 1)])
+
+    skill = rng.normal(1.0, 0.12, workers).clip(0.6, 1.5)
+    learning = rng.normal(0.01, 0.01, workers)
+    base_speed = rng.uniform(40, 160, materials)
+
+    per_worker = min(materials, 5)
+    assignments = np.array([rng.choice(materials, size=per_worker, replace=False) for _ in range(workers)])
+
+    days = pd.bdate_range(start, pd.Timestamp(start) + pd.DateOffset(months=months) - pd.Timedelta(days=1))
+    day = rng.integers(0, len(days), rows)
+    seconds = rng.integers(6 * 3600, 22 * 3600, rows)
+    dates = days.to_numpy()[day] + seconds.astype("timedelta64[s]")
+
+    worker = rng.integers(0, workers, rows)
+    material = assignments[worker, rng.integers(0, per_worker, rows)]
+    elapsed_months = (dates - days.to_numpy()[0]) / np.timedelta64(30, "D")
+
+    speed = base_speed[material] * skill[worker] * (1 + learning[worker] * elapsed_months) * rng.lognormal(0, 0.08, rows)
+
+    data = pd.DataFrame({
+        "Datum": pd.to_datetime(dates).floor("s"),
+        "Ime": worker_names[worker],
+        "Sirovina": material_names[material],
+        "Brzina": speed.round(2),
+    })
+    return data.sort_values("Datum", kind="stable").reset_index(drop=True)
+
+def write_production_file(data: pd.DataFrame, path: str):
+    """
+    Writes production data as an .xlsx or a .csv file, depending on the extension of the path.
+
+    Args:
+        data (pd.DataFrame): The data returned by generate_production_data.
+        path (str): The path of the file.
+    """
+    if path.lower().endswith(".csv"):
+        data.to_csv(path, sep=";", decimal=",", index=False, date_format="%d.%m.%Y %H:%M:%S")
+        return
+
+    try:
+        import xlsxwriter
+        engine = "xlsxwriter"
+    except ImportError:
+        engine = "openpyxl"
+    data.to_excel(path, index=False, engine=engine)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--materials", type=int, default=10)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = generate_production_data(args.rows, args.workers, args.materials, months=args.months, seed=args.seed)
+    write_production_file(data, args.path)
+    print(f"{len(data)} rows written to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
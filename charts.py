@@ -0,0 +1,188 @@
+import atexit
+import glob
+import hashlib
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import DB_manager
+
+CHART_DIR = "charts"
+CHART_VERSION = 1
+MAX_CACHED_CHARTS = 500
+MAX_WORKERS = None
+
+_executor = None
+
+def chart_path(kind: str, title: str, data) -> str:
+    """
+    Returns the cache path of a chart.
+
+    The file name is a hash of the kind of chart, its title and the values it is drawn from,
+    so a chart whose data did not change is found in the cache and not drawn again.
+
+    Args:
+        kind (str): The kind of chart, one of the keys of _DRAW.
+        title (str): The title of the chart.
+        data (pd.DataFrame or pd.Series): The values the chart is drawn from.
+
+    Returns:
+        str: The path of the PNG file in the CHART_DIR directory next to the database.
+    """
+    digest = hashlib.sha256(f"{CHART_VERSION}\0{kind}\0{title}\0".encode("utf-8"))
+    columns = data.columns if hasattr(data, "columns") else [data.name]
+    digest.update("\0".join(map(str, columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    directory = os.path.join(os.path.dirname(os.path.abspath(DB_manager.DATABASE)), CHART_DIR)
+    return os.path.join(directory, f"{kind}-{digest.hexdigest()[:32]}.png")
+
+def _draw_worker_comparison(axes, title: str, data: pd.DataFrame):
+
+    data = data.sort_values("Brzina")
+    axes.barh(data["Ime"].astype(str), data["Brzina"], color="#4c72b0")
+    average = data["Prosječna brzina"].iloc[0]
+    axes.axvline(average, color="#c44e52", linestyle="--", label=f"Prosjek procesa ({average:.2f})")
+    axes.set_xlabel("Brzina")
+    axes.legend(loc="lower right")
+
+def _draw_process_comparison(axes, title: str, data: pd.DataFrame):
+
+    axes.bar(data["Sirovina"].astype(str), data["Brzina"], yerr=data["Standardna devijacija"].fillna(0),
+             color="#55a868", capsize=4)
+    axes.set_ylabel("Brzina")
+    axes.tick_params(axis="x", labelrotation=45)
+
+_DRAW = {
+    "radnici": _draw_worker_comparison,
+    "procesi": _draw_process_comparison,
+}
+
+def draw_chart(kind: str, title: str, data: pd.DataFrame, path: str) -> str:
+    """
+    Draws a chart with the non-interactive Agg backend and saves it as a PNG.
+
+    The file is written under a temporary name and renamed, so a cached file is never
+    seen half written, also when two processes draw the same chart.
+
+    Args:
+        kind (str): The kind of chart, one of the keys of _DRAW.
+        title (str): The title of the chart.
+        data (pd.DataFrame): The values the chart is drawn from.
+        path (str): The path of the PNG file.
+
+    Returns:
+        str: The path of the PNG file.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    height = max(3.0, 0.25 * len(data) + 1.5) if kind == "radnici" else 4.5
+    figure = Figure(figsize=(8, height), dpi=100)
+    # Fixed margins instead of tight_layout, which draws the whole figure an extra time.
+    figure.subplots_adjust(left=0.25 if kind == "radnici" else 0.1, right=0.97,
+                           top=1 - 0.5 / height, bottom=0.6 / height if kind == "radnici" else 0.25)
+    axes = figure.add_subplot()
+    _DRAW[kind](axes, title, data)
+    axes.set_title(title)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    figure.savefig(temporary_path, format="png")
+    os.replace(temporary_path, path)
+    return path
+
+def _get_executor(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Returns the process pool charts are drawn in, starting it on the first call.
+
+    The pool is kept for the lifetime of the application, so matplotlib is only imported
+    once per process and not for every report.
+
+    Args:
+        max_workers (int): The number of processes.
+
+    Returns:
+        ProcessPoolExecutor: The pool.
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        atexit.register(_executor.shutdown, wait=False, cancel_futures=True)
+    return _executor
+
+def prune_chart_cache(max_files: int = MAX_CACHED_CHARTS):
+    """
+    Removes the least recently used charts when the cache holds more than max_files.
+
+    Args:
+        max_files (int, optional): The number of charts that are kept. Defaults to MAX_CACHED_CHARTS.
+    """
+    directory = os.path.join(os.path.dirname(os.path.abspath(DB_manager.DATABASE)), CHART_DIR)
+    paths = sorted(glob.glob(os.path.join(directory, "*.png")), key=os.path.getmtime, reverse=True)
+    for path in paths[max_files:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def render_charts(charts: list, max_workers: int = None) -> list:
+    """
+    Returns the PNG files of charts, drawing only those that are not cached.
+
+    Missing charts are drawn in parallel in a pool of processes; a single missing chart,
+    or max_workers of 1, is drawn in the calling process.
+
+    Args:
+        charts (list): Tuples of the kind, the title and the data of every chart.
+        max_workers (int, optional): The number of processes. Defaults to MAX_WORKERS, or the number of CPUs if that is None.
+
+    Returns:
+        list: The paths of the PNG files, in the order of the charts.
+    """
+    max_workers = max_workers or MAX_WORKERS or os.cpu_count() or 1
+    paths = [chart_path(kind, title, data) for kind, title, data in charts]
+
+    missing = []
+    for chart, path in zip(charts, paths):
+        if os.path.exists(path):
+            os.utime(path)
+        elif path not in [missing_path for _, missing_path in missing]:
+            missing.append((chart, path))
+
+    if len(missing) == 1 or max_workers == 1:
+        for (kind, title, data), path in missing:
+            draw_chart(kind, title, data, path)
+    elif missing:
+        executor = _get_executor(max_workers)
+        futures = [executor.submit(draw_chart, kind, title, data, path) for (kind, title, data), path in missing]
+        for future in futures:
+            future.result()
+
+    if missing:
+        prune_chart_cache()
+    return paths
+
+def report_charts(person_average: pd.DataFrame, process_average: pd.Series, process_deviation: pd.Series) -> list:
+    """
+    Builds the charts of a report: the process comparison and every worker compared to the average of their process.
+
+    Args:
+        person_average (pd.DataFrame): The result of person_averages.
+        process_average (pd.Series): The result of process_averages.
+        process_deviation (pd.Series): The result of process_standard_deviations.
+
+    Returns:
+        list: Tuples of the kind, the title and the data of every chart (see render_charts).
+    """
+    processes = pd.DataFrame({"Brzina": process_average, "Standardna devijacija": process_deviation})
+    processes = processes.rename_axis("Sirovina").reset_index()
+    charts = [("procesi", "Usporedba procesa", processes)]
+
+    workers = person_average.merge(process_average.rename("Prosječna brzina"), left_on="Sirovina", right_index=True)
+    for process, group in workers.groupby("Sirovina", sort=True):
+        charts.append(("radnici", f"{process} - radnici u odnosu na prosjek",
+                       group[["Ime", "Brzina", "Prosječna brzina"]].reset_index(drop=True)))
+    return charts
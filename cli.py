@@ -0,0 +1,247 @@
+"""Command line interface for running the application without a display.
+
+Examples:
+    python main.py ingest podaci.xlsx
+    python main.py watch ulaz --jobs 4
+    python main.py report --sections 1 2 3 4 --from 2024-01-01 --to 2024-01-31 --output sijecanj.docx
+    python main.py report --output sijecanj.xlsx --appendix
+    python main.py batch 2024-01 --directory izvjestaji --jobs 4
+    python main.py rank --top 5 --slowest --from 2024-01-01 --to 2024-03-31
+    python main.py plan "Sirovina 01=3" "Sirovina 02=2" --workers Ana Ivan Marko Petra Luka --from 2024-01-01
+    python main.py archive 2023-01
+
+pandas, python-docx and the database modules are only imported by the command that needs
+them, so --help starts without loading them and no GUI module is ever imported.
+"""
+import argparse
+import sys
+
+SECTION_COUNT = 10
+
+def _sections(values: list) -> list:
+    """
+    Converts the section numbers given on the command line into checkbox states.
+
+    Args:
+        values (list): Section numbers from 1 to SECTION_COUNT.
+
+    Returns:
+        list: SECTION_COUNT states, 1 for every selected section and 0 otherwise.
+    """
+    return [1 if number in values else 0 for number in range(1, SECTION_COUNT + 1)]
+
+def ingest(arguments: argparse.Namespace) -> int:
+    """Appends a file to the database."""
+    from functions import stream_file_to_database
+
+    rows_added = stream_file_to_database(arguments.path, arguments.table, arguments.chunk_size)
+    print(f"{rows_added} new rows were added")
+    return 0
+
+def watch(arguments: argparse.Namespace) -> int:
+    """Ingests the files dropped into a directory."""
+    from watcher import FolderWatcher
+
+    watcher = FolderWatcher(arguments.directory, arguments.table, arguments.jobs, arguments.chunk_size)
+    if arguments.once:
+        try:
+            files, rows_added = watcher.scan()
+        finally:
+            watcher.close()
+        print(f"{len(files)} files were ingested, {rows_added} new rows were added")
+        return 0
+
+    def progress(done, total, failed):
+        print(f"{done}/{total} files ingested" + (f", {failed} failed" if failed else ""))
+
+    try:
+        watcher.watch(arguments.interval, progress)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def report(arguments: argparse.Namespace) -> int:
+    """Generates one report."""
+    from functions import generate_report
+
+    output_path = generate_report(
+        *_sections(arguments.sections),
+        workers=arguments.workers, materials=arguments.materials,
+        date_from=arguments.date_from, date_to=arguments.date_to,
+        compare_from=arguments.compare_from, compare_to=arguments.compare_to,
+        output_path=arguments.output, raw_appendix=arguments.appendix, top_n=arguments.top,
+    )
+    print(output_path)
+    return 0
+
+def batch(arguments: argparse.Namespace) -> int:
+    """Generates the month end batch of reports."""
+    from batch_reports import generate_reports, month_end_specs
+
+    specs = month_end_specs(arguments.month, arguments.directory, _sections(arguments.sections))
+    for spec in specs:
+        spec["top_n"] = arguments.top
+    for output_path in generate_reports(specs, max_workers=arguments.jobs):
+        print(output_path)
+    return 0
+
+def rank(arguments: argparse.Namespace) -> int:
+    """Prints the fastest or slowest workers of every process."""
+    from functions import load_worker_ranking
+
+    ranking = load_worker_ranking(arguments.top, not arguments.slowest, arguments.workers, arguments.materials,
+                                  arguments.date_from, arguments.date_to)
+    print(ranking.to_string(index=False))
+    return 0
+
+def _places(value: str) -> tuple:
+    """
+    Converts a PROCESS=N argument into the process and its number of places.
+
+    Args:
+        value (str): The argument, for example "Sirovina 01=3".
+
+    Returns:
+        tuple: The process and the number of places.
+    """
+    process, separator, places = value.rpartition("=")
+    if not separator or not process or not places.isdigit():
+        raise argparse.ArgumentTypeError(f"expected PROCESS=N, got {value!r}")
+    return process, int(places)
+
+def plan(arguments: argparse.Namespace) -> int:
+    """Prints the assignment of workers to processes with the highest total speed."""
+    from planning import plan_production
+
+    production_plan = plan_production(dict(arguments.places), arguments.workers, arguments.date_from, arguments.date_to)
+    print(production_plan.to_string(index=False))
+    print(f"Ukupna brzina: {production_plan['Brzina'].sum():.2f}")
+    return 0
+
+def archive(arguments: argparse.Namespace) -> int:
+    """Moves old months into the archive database."""
+    from partitions import archive_partitions
+
+    print(f"{archive_partitions(arguments.before_month, arguments.table)} rows were archived")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the parser of the command line arguments.
+
+    Returns:
+        argparse.ArgumentParser: The parser, with one subcommand per operation.
+    """
+    parser = argparse.ArgumentParser(prog="main.py", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="Path of the SQLite database. Defaults to baza_proizvodnja.db.")
+    parser.add_argument("--profile", action="append", metavar="STAGE",
+                        help="Run a stage (for example ingest or report.render, or * for all) under cProfile. Can be repeated.")
+    parser.add_argument("--trace-memory", action="store_true", help="Measure the peak memory of every stage with tracemalloc (slow).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser("ingest", help="Append the new rows of an Excel or CSV file to the database.")
+    ingest_parser.add_argument("path", help="Path of the .xlsx or .csv file.")
+    ingest_parser.add_argument("--table", default="Brzina_Radnika", help="Table the rows are appended to.")
+    ingest_parser.add_argument("--chunk-size", type=int, default=50000, help="Number of rows read and written at a time.")
+    ingest_parser.set_defaults(run=ingest)
+
+    watch_parser = commands.add_parser("watch", help="Ingest the .xlsx and .csv files dropped into a directory.")
+    watch_parser.add_argument("directory", help="The directory that is watched.")
+    watch_parser.add_argument("--table", default="Brzina_Radnika", help="Table the rows are appended to.")
+    watch_parser.add_argument("--jobs", type=int, help="Number of processes parsing files. Defaults to the number of CPUs.")
+    watch_parser.add_argument("--chunk-size", type=int, default=50000, help="Number of rows read at a time.")
+    watch_parser.add_argument("--interval", type=float, default=5.0, help="Seconds between scans of the directory.")
+    watch_parser.add_argument("--once", action="store_true", help="Ingest the files that are there and exit.")
+    watch_parser.set_defaults(run=watch)
+
+    def add_report_arguments(command_parser, default_sections):
+        command_parser.add_argument("--sections", type=int, nargs="+", default=default_sections,
+                                    choices=range(1, SECTION_COUNT + 1), metavar="N",
+                                    help="Report sections in the order of the checkboxes on the selection screen (1-10).")
+        command_parser.add_argument("--top", type=int, metavar="N",
+                                    help="Only list the N fastest and slowest workers of every process (sections 5 and 6).")
+
+    report_parser = commands.add_parser("report", help="Generate one report.")
+    add_report_arguments(report_parser, [1, 2, 3, 4])
+    report_parser.add_argument("--output", default="test.docx", help="Path of the generated document. The extension (.docx, .xlsx or .pdf) selects the format.")
+    report_parser.add_argument("--appendix", action="store_true", help="Add the matching raw rows as an appendix (.xlsx and .pdf only).")
+    def add_filter_arguments(command_parser):
+        command_parser.add_argument("--workers", nargs="+", help="Only include these workers.")
+        command_parser.add_argument("--materials", nargs="+", help="Only include these processes.")
+        command_parser.add_argument("--from", dest="date_from", help="First day of the date range (YYYY-MM-DD).")
+        command_parser.add_argument("--to", dest="date_to", help="Last day of the date range (YYYY-MM-DD).")
+
+    add_filter_arguments(report_parser)
+    report_parser.add_argument("--compare-from", help="First day of the range to compare with (YYYY-MM-DD).")
+    report_parser.add_argument("--compare-to", help="Last day of the range to compare with (YYYY-MM-DD).")
+    report_parser.set_defaults(run=report)
+
+    batch_parser = commands.add_parser("batch", help="Generate one report per worker and one per process for a month.")
+    batch_parser.add_argument("month", help="The month (YYYY-MM).")
+    batch_parser.add_argument("--directory", default="izvjestaji", help="Directory the reports are saved to.")
+    batch_parser.add_argument("--jobs", type=int, help="Number of processes. Defaults to the number of CPUs.")
+    add_report_arguments(batch_parser, [1, 2, 3, 4])
+    batch_parser.set_defaults(run=batch)
+
+    rank_parser = commands.add_parser("rank", help="Print the fastest or slowest workers of every process.")
+    rank_parser.add_argument("--top", type=int, default=10, metavar="N", help="Number of workers per process.")
+    rank_parser.add_argument("--slowest", action="store_true", help="Rank the slowest workers first.")
+    add_filter_arguments(rank_parser)
+    rank_parser.set_defaults(run=rank)
+
+    plan_parser = commands.add_parser("plan", help="Assign the available workers to processes by their average speeds.")
+    plan_parser.add_argument("places", type=_places, nargs="+", metavar="PROCESS=N",
+                             help="A process and the number of workers it needs.")
+    plan_parser.add_argument("--workers", nargs="+", help="The available workers. Defaults to every worker with stored data.")
+    plan_parser.add_argument("--from", dest="date_from", help="First day of the range the averages are calculated from (YYYY-MM-DD).")
+    plan_parser.add_argument("--to", dest="date_to", help="Last day of the range the averages are calculated from (YYYY-MM-DD).")
+    plan_parser.set_defaults(run=plan)
+
+    archive_parser = commands.add_parser("archive", help="Move the months before a month into the archive database.")
+    archive_parser.add_argument("before_month", help="The first month that is kept (YYYY-MM).")
+    archive_parser.add_argument("--table", default="Brzina_Radnika", help="Table whose months are archived.")
+    archive_parser.set_defaults(run=archive)
+
+    return parser
+
+def main(argv: list = None) -> int:
+    """
+    Runs the command given on the command line.
+
+    Messages that the GUI shows in message boxes are written to stdout and stderr instead.
+
+    Args:
+        argv (list, optional): The arguments without the program name. Defaults to None, which uses sys.argv.
+
+    Returns:
+        int: The exit code, 1 if the command failed or reported an error and 0 otherwise.
+    """
+    arguments = build_parser().parse_args(argv)
+
+    from error import set_handler, console_handler
+
+    errors = []
+    def handler(title, text):
+        if title == "Error":
+            errors.append(text)
+        console_handler(title, text)
+    set_handler(handler)
+
+    if arguments.database is not None:
+        from DB_manager import configure_database
+        configure_database(arguments.database)
+
+    if arguments.profile is not None or arguments.trace_memory:
+        from instrumentation import configure_instrumentation
+        configure_instrumentation(trace_memory=arguments.trace_memory, profile=arguments.profile)
+
+    try:
+        exit_code = arguments.run(arguments)
+    except Exception as exception:
+        console_handler("Error", str(exception))
+        return 1
+
+    return 1 if errors else exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+from tkinter import ttk
+import customtkinter as ctk
+from background import run_in_background
+from error import error
+from functions import fetch_preview_page, PREVIEW_SORT_COLUMNS
+
+class PageWindow:
+    """
+    Keeps track of the pages of a keyset-paginated table that are on screen.
+
+    At most max_pages consecutive pages are kept. The cursor every page was read with is
+    remembered, so a page that was dropped at either end can be read again when the view
+    scrolls back to it, while the memory used does not grow with the size of the table.
+    """
+
+    def __init__(self, max_pages: int = 5):
+        self.max_pages = max_pages
+        self.cursors = [None]
+        self.pages = []
+        self.last_page = None
+
+    def next_page(self) -> int:
+        """
+        Returns the number of the page after the ones on screen.
+
+        Returns:
+            int: The page number, or None if the last page is on screen.
+        """
+        if not self.pages:
+            return 0
+        index = self.pages[-1][0] + 1
+        return index if index < len(self.cursors) else None
+
+    def previous_page(self) -> int:
+        """
+        Returns the number of the page before the ones on screen.
+
+        Returns:
+            int: The page number, or None if the first page is on screen.
+        """
+        return self.pages[0][0] - 1 if self.pages and self.pages[0][0] > 0 else None
+
+    def cursor(self, index: int) -> tuple:
+        """
+        Returns the cursor a page is read with (see fetch_preview_page).
+
+        Args:
+            index (int): The page number.
+
+        Returns:
+            tuple: The cursor, None for the first page.
+        """
+        return self.cursors[index]
+
+    def add(self, index: int, items: list, next_cursor: tuple) -> list:
+        """
+        Adds a page that was read next to the pages on screen and drops the page at the other end if there are too many.
+
+        Args:
+            index (int): The page number, next_page() or previous_page().
+            items (list): What is shown for the page, such as the ids of its rows in a Treeview.
+            next_cursor (tuple): The cursor returned with the page.
+
+        Returns:
+            list: The items of the page that was dropped, empty if none was.
+        """
+        if next_cursor is None:
+            self.last_page = index
+        elif index + 1 == len(self.cursors):
+            self.cursors.append(next_cursor)
+
+        if self.pages and index < self.pages[0][0]:
+            self.pages.insert(0, (index, items))
+            dropped = self.pages.pop() if len(self.pages) > self.max_pages else None
+        else:
+            self.pages.append((index, items))
+            dropped = self.pages.pop(0) if len(self.pages) > self.max_pages else None
+        return [] if dropped is None else dropped[1]
+
+    def first_page(self) -> int:
+        """
+        Returns the number of the first page on screen, 0 if there is none.
+        """
+        return self.pages[0][0] if self.pages else 0
+
+class PreviewTable(ctk.CTkFrame):
+    """
+    A table showing Brzina_Radnika page by page.
+
+    The first page is read when the table is opened, the next one when the view is scrolled
+    close to the end of the rows shown and the previous one when it is scrolled close to the
+    start. Only max_pages pages are kept in the table (see PageWindow), so scrolling through a
+    large table does not load all of it into the widget. Pages are read on a background
+    thread, so the window keeps responding while a page is loading.
+    """
+
+    def __init__(self, master, root, table_name: str = "Brzina_Radnika", page_size: int = 200, max_pages: int = 5, **kwargs):
+        super().__init__(master, **kwargs)
+        self.root = root
+        self.table_name = table_name
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.job_name = f"preview-{id(self)}"
+        self.window = PageWindow(max_pages)
+        self.loading = False
+        self.generation = 0
+
+        controls = ctk.CTkFrame(self)
+        controls.pack(padx = 5, pady = 5, fill = "x")
+
+        ctk.CTkLabel(controls, text="Sortiraj po").grid(row = 0, column = 0, padx = 5, pady = 5)
+        self.sort_menu = ctk.CTkOptionMenu(controls, values=PREVIEW_SORT_COLUMNS, command=lambda _: self.reload())
+        self.sort_menu.grid(row = 0, column = 1, padx = 5, pady = 5)
+
+        self.descending = ctk.CTkCheckBox(controls, text="Silazno", onvalue=1, offvalue=0, command=self.reload)
+        self.descending.grid(row = 0, column = 2, padx = 5, pady = 5)
+
+        self.status_label = ctk.CTkLabel(controls, text="")
+        self.status_label.grid(row = 0, column = 3, padx = 5, pady = 5)
+
+        table_frame = ctk.CTkFrame(self)
+        table_frame.pack(padx = 5, pady = 5, fill = "both", expand = True)
+
+        self.tree = ttk.Treeview(table_frame, show="headings", height=25)
+        self.scrollbar = ctk.CTkScrollbar(table_frame, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.tree.pack(side = "left", fill = "both", expand = True)
+        self.scrollbar.pack(side = "right", fill = "y")
+
+        self.reload()
+
+    def reload(self):
+        """
+        Clears the table and loads the first page with the selected sort order.
+        """
+        self.generation += 1
+        self.window = PageWindow(self.max_pages)
+        self.loading = False
+        self.tree.delete(*self.tree.get_children())
+        self.load_page(0)
+
+    def load_next_page(self):
+        """
+        Starts reading the page after the rows shown, unless it is the end of the table.
+        """
+        index = self.window.next_page()
+        if index is not None:
+            self.load_page(index)
+
+    def load_previous_page(self):
+        """
+        Starts reading the page before the rows shown, unless it is the start of the table.
+        """
+        index = self.window.previous_page()
+        if index is not None:
+            self.load_page(index)
+
+    def load_page(self, index: int):
+        """
+        Starts reading a page on a background thread, unless one is already loading.
+
+        Args:
+            index (int): The page number, next to the pages shown.
+        """
+        if self.loading:
+            return
+
+        self.loading = True
+        generation = self.generation
+        sort_column, descending, cursor = self.sort_menu.get(), self.descending.get() == 1, self.window.cursor(index)
+        self.status_label.configure(text="Učitavanje...")
+        started = run_in_background(
+            self.root, self.job_name,
+            lambda progress: fetch_preview_page(self.table_name, sort_column, descending, cursor, self.page_size),
+            on_done=lambda page: self._show_page(page, generation, index),
+            on_error=lambda exception: (self._stop_loading(), error(str(exception))),
+        )
+        if not started:
+            self.loading = False
+            self.after(100, lambda: self.load_page(index) if generation == self.generation else None)
+
+    def _stop_loading(self):
+
+        self.loading = False
+        self.status_label.configure(text="")
+
+    def _show_page(self, page: tuple, generation: int, index: int):
+
+        self.loading = False
+        if generation != self.generation:
+            self.load_page(0)
+            return
+
+        columns, rows, next_cursor = page
+        if tuple(self.tree["columns"]) != tuple(columns):
+            self.tree.configure(columns=columns)
+            for column in columns:
+                self.tree.heading(column, text=column)
+                self.tree.column(column, width=150, anchor="w")
+
+        # The row at the top of the view stays there while pages are added and dropped around it.
+        shown = self.tree.get_children()
+        visible = shown[min(int(self.tree.yview()[0] * len(shown)), len(shown) - 1)] if shown else None
+
+        at_start = index < self.window.first_page()
+        position = 0 if at_start else "end"
+        items = [self.tree.insert("", position, values=["" if value is None else value for value in row])
+                 for row in (reversed(rows) if at_start else rows)]
+        if at_start:
+            items.reverse()
+
+        dropped = self.window.add(index, items, next_cursor)
+        if dropped:
+            self.tree.delete(*dropped)
+        shown = self.tree.get_children()
+        if visible is not None and self.tree.exists(visible):
+            self.tree.yview_moveto(self.tree.index(visible) / len(shown))
+
+        first_row = self.window.first_page() * self.page_size
+        finished = self.window.next_page() is None
+        text = f"Redci {first_row + 1}-{first_row + len(shown)}" if shown else "Učitano 0 redaka"
+        self.status_label.configure(text=text + ("" if finished else "+"))
+
+    def _on_scroll(self, first, last):
+
+        self.scrollbar.set(first, last)
+        if float(last) > 0.9:
+            self.load_next_page()
+        elif float(first) < 0.1:
+            self.load_previous_page()
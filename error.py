@@ -1,9 +1,62 @@
-from CTkMessagebox import CTkMessagebox
+import queue
+import sys
+import threading
+
+_pending = queue.Queue()
+_handler = None
+
+def set_handler(handler):
+    """
+    Replaces the message boxes with another way of reporting messages.
+
+    Args:
+        handler (callable): Called with the title ("Error" or "Info") and the text of every message.
+            None restores the message boxes.
+    """
+    global _handler
+    _handler = handler
+
+def console_handler(title: str, text: str):
+    """
+    Writes errors to stderr and other messages to stdout, for use without a display.
+
+    Args:
+        title (str): The title of the message.
+        text (str): The text of the message.
+    """
+    stream = sys.stderr if title == "Error" else sys.stdout
+    print(f"{title}: {text}", file=stream, flush=True)
+
+def _message_box(title: str, text: str):
+
+    from CTkMessagebox import CTkMessagebox
+    CTkMessagebox(title= title, message= text)
+
+def _show(title: str, text: str):
+
+    if _handler is not None:
+        _handler(title, text)
+        return
+
+    if threading.current_thread() is not threading.main_thread():
+        _pending.put((title, text))
+        return
+
+    _message_box(title, text)
+
+def show_pending_messages():
+
+    while True:
+        try:
+            title, text = _pending.get_nowait()
+        except queue.Empty:
+            return
+        _message_box(title, text)
 
 def error(text: str):
 
-    CTkMessagebox(title= "Error", message= text)
+    _show("Error", text)
 
 def info(text: str):
 
-    CTkMessagebox(title= "Info", message= text)
\ No newline at end of file
+    _show("Info", text)
@@ -0,0 +1,577 @@
+import datetime
+import math
+import os
+import re
+import unicodedata
+import zlib
+import pandas as pd
+
+EXCEL_MAX_ROWS = 1048576
+SHEET_NAME_LENGTH = 31
+APPENDIX_TITLE = "Prilog - sirovi podaci"
+
+PAGE_WIDTH, PAGE_HEIGHT = 842, 595
+MARGIN = 36
+FONT_SIZE = 8
+ROW_HEIGHT = 11
+HEADING_SIZE = 12
+TITLE_SIZE = 16
+
+_INVALID_SHEET_CHARACTERS = re.compile(r"[\[\]:*?/\\]")
+_FOLDED = {"ß": "ss", "ł": "l", "Ł": "L"}
+# The Croatian letters missing from Windows-1252 and the glyphs the built-in fonts draw them with.
+# They use codes Windows-1252 leaves empty, and 0x88 instead of the rarely used "ˆ".
+_EXTRA_GLYPHS = {"Ć": (0x81, "Cacute"), "đ": (0x88, "dcroat"), "Č": (0x8D, "Ccaron"),
+                 "Đ": (0x8F, "Dcroat"), "ć": (0x90, "cacute"), "č": (0x9D, "ccaron")}
+_PDF_DIFFERENCES = " ".join(f"{code} /{glyph}" for code, glyph in sorted(_EXTRA_GLYPHS.values()))
+
+def _is_chart(value) -> bool:
+
+    return isinstance(value, str) and value.lower().endswith(".png")
+
+def _section_rows(value) -> tuple:
+    """
+    Returns the header and the rows of a table section.
+
+    Args:
+        value (pd.DataFrame or pd.Series): The section, in the form create_document accepts.
+
+    Returns:
+        tuple: The list of column names and an iterator of row tuples.
+    """
+    if isinstance(value, pd.Series):
+        value = value.to_frame(name="Values").reset_index()
+    columns = [value.iloc[:, i].tolist() for i in range(len(value.columns))]
+    return [str(column) for column in value.columns], zip(*columns)
+
+def _text(value) -> str:
+    """
+    Converts a cell value to the text written in the PDF.
+
+    Args:
+        value: The cell value.
+
+    Returns:
+        str: An empty string for missing values, the value with two decimals for floats and str(value) otherwise.
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NaT:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+def _sheet_name(title: str, used: set) -> str:
+    """
+    Makes a valid worksheet name from a section title.
+
+    Excel allows at most 31 characters, no []:*?/\\ and no two sheets whose names differ only in case.
+
+    Args:
+        title (str): The section title.
+        used (set): The casefolded names already in the workbook. The new name is added to it.
+
+    Returns:
+        str: The worksheet name.
+    """
+    base = _INVALID_SHEET_CHARACTERS.sub("_", title).strip("'") or "Sekcija"
+    name, number = base[:SHEET_NAME_LENGTH], 1
+    while name.casefold() in used:
+        number += 1
+        suffix = f" ({number})"
+        name = base[:SHEET_NAME_LENGTH - len(suffix)] + suffix
+    used.add(name.casefold())
+    return name
+
+def export_xlsx(dictionary: dict, output_path: str = "test.xlsx", created_at: datetime.datetime = None, appendix: tuple = None) -> str:
+    """
+    Writes the report sections to an Excel workbook, one worksheet per section.
+
+    The workbook is written with xlsxwriter in constant-memory mode: every row is written to
+    the file as soon as the next one starts, so memory does not grow with the number of rows.
+    For the same reason the rows of a worksheet are only ever written top to bottom. The first
+    worksheet lists the sections, because worksheet names are limited to 31 characters.
+
+    Args:
+        dictionary (dict): The report sections (see build_report_data).
+        output_path (str, optional): The path of the workbook. Defaults to "test.xlsx".
+        created_at (datetime.datetime, optional): The time written in the heading. Defaults to None, which uses the current time.
+        appendix (tuple, optional): The column names and the row batches of the raw data appendix (see iter_report_rows).
+            Defaults to None, which writes no appendix.
+
+    Returns:
+        str: The path of the saved workbook.
+    """
+    import xlsxwriter
+
+    created_at = datetime.datetime.now() if created_at is None else created_at
+    workbook = xlsxwriter.Workbook(output_path, {"constant_memory": True, "nan_inf_to_errors": True,
+                                                 "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+    try:
+        bold = workbook.add_format({"bold": True})
+        title_format = workbook.add_format({"bold": True, "font_size": 14})
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+        used = set()
+
+        contents = workbook.add_worksheet(_sheet_name("Sadržaj", used))
+        contents.write_string(0, 0, f"Izvještaj prosjeka čišćenja {created_at}", title_format)
+        contents.write_row(2, 0, ["Sekcija", "List"], bold)
+        contents.set_column(0, 0, 50)
+        contents.set_column(1, 1, 35)
+
+        titles = list(dictionary) + ([APPENDIX_TITLE] if appendix is not None else [])
+        sheet_names = [_sheet_name(title, used) for title in titles]
+        for row, (title, name) in enumerate(zip(titles, sheet_names), start=3):
+            contents.write_string(row, 0, title)
+            quoted = name.replace("'", "''")
+            contents.write_url(row, 1, f"internal:'{quoted}'!A1", string=name)
+
+        for (title, value), name in zip(dictionary.items(), sheet_names):
+            worksheet = workbook.add_worksheet(name)
+            worksheet.write_string(0, 0, title, bold)
+            if _is_chart(value):
+                worksheet.insert_image(2, 0, value)
+                continue
+
+            header, rows = _section_rows(value)
+            worksheet.write_row(2, 0, header, bold)
+            worksheet.set_column(0, max(len(header) - 1, 0), 18)
+            for row_number, row in enumerate(rows, start=3):
+                _write_row(worksheet, row_number, row, date_format)
+
+        if appendix is not None:
+            _write_appendix(workbook, sheet_names[-1], used, appendix, bold, date_format)
+    finally:
+        workbook.close()
+    return output_path
+
+def _write_row(worksheet, row_number: int, row: tuple, date_format):
+    """
+    Writes one row of values, choosing the cell type from the value.
+
+    Args:
+        worksheet: The xlsxwriter worksheet.
+        row_number (int): The zero-based row.
+        row (tuple): The values.
+        date_format: The format of date cells.
+    """
+    for column, value in enumerate(row):
+        if value is None or value is pd.NaT:
+            continue
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            worksheet.write_datetime(row_number, column, value, date_format)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if not (isinstance(value, float) and math.isnan(value)):
+                worksheet.write_number(row_number, column, value)
+        else:
+            worksheet.write_string(row_number, column, str(value))
+
+def _write_appendix(workbook, name: str, used: set, appendix: tuple, bold, date_format):
+    """
+    Writes the raw data appendix batch by batch, continuing on a new worksheet when one is full.
+
+    Dates stored as text in the database are written as Excel dates.
+
+    Args:
+        workbook: The xlsxwriter workbook.
+        name (str): The name of the first appendix worksheet.
+        used (set): The casefolded worksheet names already in the workbook.
+        appendix (tuple): The column names and the row batches (see iter_report_rows).
+        bold: The format of the header row.
+        date_format: The format of date cells.
+    """
+    columns, batches = appendix
+    date_columns = [index for index, column in enumerate(columns) if column == "Datum"]
+
+    def new_sheet(sheet_name):
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, columns, bold)
+        worksheet.set_column(0, max(len(columns) - 1, 0), 20)
+        worksheet.freeze_panes(1, 0)
+        return worksheet
+
+    worksheet, row_number = new_sheet(name), 1
+    for batch in batches:
+        for row in batch:
+            if row_number == EXCEL_MAX_ROWS:
+                worksheet, row_number = new_sheet(_sheet_name(APPENDIX_TITLE, used)), 1
+            if date_columns:
+                row = list(row)
+                for index in date_columns:
+                    if isinstance(row[index], str):
+                        try:
+                            row[index] = datetime.datetime.fromisoformat(row[index])
+                        except ValueError:
+                            pass
+            _write_row(worksheet, row_number, row, date_format)
+            row_number += 1
+
+def _pdf_encoding() -> dict:
+    """
+    Builds the str.translate table from characters to the codes of the PDF font encoding.
+
+    Characters from 0x00 to 0xFF other than 0x80-0x9F have the same code in Windows-1252 as
+    in Latin-1, so only the characters at 0x80-0x9F and the _EXTRA_GLYPHS need an entry;
+    after translating, the text can be encoded as Latin-1.
+
+    Returns:
+        dict: The translation table.
+    """
+    table = {}
+    for code in range(0x80, 0xA0):
+        try:
+            table[ord(bytes([code]).decode("cp1252"))] = chr(code)
+        except UnicodeDecodeError:
+            pass
+    for character, (code, _) in _EXTRA_GLYPHS.items():
+        table = {key: value for key, value in table.items() if value != chr(code)}
+        table[ord(character)] = chr(code)
+    return table
+
+_PDF_ENCODING = _pdf_encoding()
+
+def _pdf_text(value: str) -> bytes:
+    """
+    Encodes text for the built-in PDF fonts and escapes it for a string literal.
+
+    The text is encoded as Windows-1252 extended with the Croatian letters in _EXTRA_GLYPHS
+    (see the font encoding written by PdfWriter.close). Other characters outside it are folded
+    to their closest ASCII form (ő becomes o, ß becomes ss) and anything left becomes "?".
+
+    Args:
+        value (str): The text.
+
+    Returns:
+        bytes: The escaped bytes, without the surrounding parentheses.
+    """
+    try:
+        encoded = value.translate(_PDF_ENCODING).encode("latin-1")
+    except UnicodeEncodeError:
+        characters = []
+        for character in value.translate(_PDF_ENCODING):
+            if ord(character) > 0xFF:
+                character = _FOLDED.get(character) or "".join(
+                    part for part in unicodedata.normalize("NFKD", character) if not unicodedata.combining(part)
+                ).translate(_PDF_ENCODING)
+            characters.append(character)
+        encoded = "".join(characters).encode("latin-1", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"").replace(b"\n", b" ")
+
+def _fit(text: str, width: float, size: float) -> str:
+    """
+    Shortens text that is wider than a table column.
+
+    The width of Helvetica is estimated at 0.55 of the font size per character, which is
+    enough for names, dates and numbers.
+
+    Args:
+        text (str): The text.
+        width (float): The width of the column in points.
+        size (float): The font size.
+
+    Returns:
+        str: The text, ending in "..." if it was shortened.
+    """
+    characters = int(width / (size * 0.55))
+    return text if len(text) <= characters else text[:max(characters - 3, 0)] + "..."
+
+class PdfWriter:
+    """
+    Writes a PDF file object by object, without keeping the document in memory.
+
+    Every page is compressed and written to the file when it is finished. Only the byte
+    offsets of the written objects and the numbers of the pages are kept until the cross
+    reference table is written at the end. Text uses the built-in Helvetica fonts, so no
+    font file is embedded; their encoding adds the Croatian letters Windows-1252 lacks (see _pdf_text).
+    """
+
+    CATALOG, PAGES, FONT, BOLD_FONT = 1, 2, 3, 4
+
+    def __init__(self, path: str):
+        self.file = open(path, "wb")
+        self.offsets = {}
+        self.next_number = 5
+        self.pages = []
+        self.content = []
+        self.images = {}
+        self.page_images = set()
+        self.y = PAGE_HEIGHT - MARGIN
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _reserve(self) -> int:
+
+        number = self.next_number
+        self.next_number += 1
+        return number
+
+    def _write_object(self, number: int, body: bytes, stream: bytes = None):
+
+        self.offsets[number] = self.file.tell()
+        self.file.write(f"{number} 0 obj\n".encode("ascii") + body)
+        if stream is not None:
+            self.file.write(b"\nstream\n" + stream + b"\nendstream")
+        self.file.write(b"\nendobj\n")
+
+    def text(self, x: float, text: str, size: float = FONT_SIZE, bold: bool = False):
+        """
+        Writes a line of text at the current position of the page.
+
+        Args:
+            x (float): The distance from the left edge in points.
+            text (str): The text.
+            size (float, optional): The font size. Defaults to FONT_SIZE.
+            bold (bool, optional): Whether the bold font is used. Defaults to False.
+        """
+        font = b"/F2" if bold else b"/F1"
+        self.content.append(b"BT " + font + f" {size} Tf {x:.2f} {self.y:.2f} Td (".encode("ascii")
+                            + _pdf_text(text) + b") Tj ET")
+
+    def line(self, x1: float, x2: float):
+        """
+        Draws a horizontal line just below the current position of the page.
+
+        Args:
+            x1 (float): The start of the line in points from the left edge.
+            x2 (float): The end of the line in points from the left edge.
+        """
+        y = self.y - 3
+        self.content.append(f"0.5 w {x1:.2f} {y:.2f} m {x2:.2f} {y:.2f} l S".encode("ascii"))
+
+    def image_size(self, path: str) -> tuple:
+        """
+        Embeds a PNG image in the file, if it is not embedded yet, and returns its size.
+
+        The image is composited onto white, because the PDF transparency of the PNG alpha
+        channel is not needed for charts. An image used twice is embedded once.
+
+        Args:
+            path (str): The PNG file.
+
+        Returns:
+            tuple: The width and the height in pixels.
+        """
+        if path not in self.images:
+            pixels = _read_rgb(path)
+            number = self._reserve()
+            stream = zlib.compress(pixels.tobytes())
+            self._write_object(number, (
+                f"<< /Type /XObject /Subtype /Image /Width {pixels.shape[1]} /Height {pixels.shape[0]}"
+                f" /ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode /Length {len(stream)} >>"
+            ).encode("ascii"), stream)
+            self.images[path] = (f"Im{len(self.images) + 1}", number, pixels.shape[1], pixels.shape[0])
+        return self.images[path][2:]
+
+    def image(self, path: str, width: float, height: float):
+        """
+        Draws a PNG image with its top edge at the current position of the page.
+
+        Args:
+            path (str): The PNG file.
+            width (float): The drawn width in points.
+            height (float): The drawn height in points.
+        """
+        self.image_size(path)
+        name = self.images[path][0]
+        self.page_images.add(path)
+        self.content.append(f"q {width:.2f} 0 0 {height:.2f} {MARGIN} {self.y - height:.2f} cm /{name} Do Q".encode("ascii"))
+        self.y -= height
+
+    def space(self, height: float) -> bool:
+        """
+        Checks whether the page has room for something of the given height below the current position.
+
+        Args:
+            height (float): The height in points.
+
+        Returns:
+            bool: True if it fits on the current page.
+        """
+        return self.y - height >= MARGIN
+
+    def new_page(self):
+        """
+        Writes the current page to the file and starts an empty one.
+        """
+        stream = zlib.compress(b"\n".join(self.content))
+        content_number, page_number = self._reserve(), self._reserve()
+        self._write_object(content_number, f"<< /Filter /FlateDecode /Length {len(stream)} >>".encode("ascii"), stream)
+
+        images = "".join(f" /{self.images[path][0]} {self.images[path][1]} 0 R" for path in sorted(self.page_images))
+        self._write_object(page_number, (
+            f"<< /Type /Page /Parent {self.PAGES} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}]"
+            f" /Resources << /Font << /F1 {self.FONT} 0 R /F2 {self.BOLD_FONT} 0 R >> /XObject <<{images} >> >>"
+            f" /Contents {content_number} 0 R >>"
+        ).encode("ascii"))
+        self.pages.append(page_number)
+        self.content = []
+        self.page_images = set()
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def close(self):
+        """
+        Writes the last page, the page tree, the fonts and the cross reference table and closes the file.
+        """
+        if self.content or not self.pages:
+            self.new_page()
+
+        kids = " ".join(f"{number} 0 R" for number in self.pages)
+        self._write_object(self.PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>".encode("ascii"))
+        self._write_object(self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>".encode("ascii"))
+        for number, font in ((self.FONT, "Helvetica"), (self.BOLD_FONT, "Helvetica-Bold")):
+            self._write_object(number, (
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{font} /Encoding"
+                f" << /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [{_PDF_DIFFERENCES}] >> >>"
+            ).encode("ascii"))
+
+        xref = self.file.tell()
+        lines = [f"xref\n0 {self.next_number}\n", "0000000000 65535 f \n"]
+        lines += [f"{self.offsets[number]:010d} 00000 n \n" for number in range(1, self.next_number)]
+        self.file.write("".join(lines).encode("ascii"))
+        self.file.write(f"trailer\n<< /Size {self.next_number} /Root {self.CATALOG} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
+        self.file.close()
+
+def _read_rgb(path: str):
+    """
+    Reads a PNG file as 8-bit RGB pixels on a white background.
+
+    Args:
+        path (str): The PNG file.
+
+    Returns:
+        np.ndarray: The pixels, with shape (height, width, 3).
+    """
+    import numpy as np
+    from matplotlib.image import imread
+
+    pixels = imread(path)
+    if pixels.dtype != np.uint8:
+        pixels = pixels * 255
+    pixels = pixels.astype(np.float32)
+    if pixels.ndim == 2:
+        pixels = np.repeat(pixels[:, :, None], 3, axis=2)
+    if pixels.shape[2] == 4:
+        alpha = pixels[:, :, 3:] / 255
+        pixels = pixels[:, :, :3] * alpha + 255 * (1 - alpha)
+    return np.ascontiguousarray(pixels.round().clip(0, 255).astype(np.uint8))
+
+def _pdf_table(pdf: PdfWriter, header: list, rows, title: str):
+    """
+    Writes a table row by row, starting a new page when the current one is full.
+
+    The header row is repeated at the top of every page the table continues on.
+
+    Args:
+        pdf (PdfWriter): The writer.
+        header (list): The column names.
+        rows: An iterable of row tuples.
+        title (str): The section title, repeated on continued pages.
+    """
+    width = (PAGE_WIDTH - 2 * MARGIN) / max(len(header), 1)
+
+    def write_header(continued=False):
+        if continued:
+            pdf.text(MARGIN, f"{title} (nastavak)", HEADING_SIZE, bold=True)
+            pdf.y -= HEADING_SIZE + 6
+        for index, column in enumerate(header):
+            pdf.text(MARGIN + index * width, _fit(column, width - 4, FONT_SIZE), bold=True)
+        pdf.line(MARGIN, PAGE_WIDTH - MARGIN)
+        pdf.y -= ROW_HEIGHT + 2
+
+    write_header()
+    for row in rows:
+        if not pdf.space(ROW_HEIGHT):
+            pdf.new_page()
+            write_header(continued=True)
+        for index, value in enumerate(row):
+            text = _text(value)
+            if text:
+                pdf.text(MARGIN + index * width, _fit(text, width - 4, FONT_SIZE))
+        pdf.y -= ROW_HEIGHT
+    pdf.y -= ROW_HEIGHT
+
+def export_pdf(dictionary: dict, output_path: str = "test.pdf", created_at: datetime.datetime = None, appendix: tuple = None) -> str:
+    """
+    Writes the report sections to a landscape A4 PDF.
+
+    Pages are written to the file as soon as they are full (see PdfWriter), so memory does
+    not grow with the number of rows. Charts are scaled to the width of the page.
+
+    Args:
+        dictionary (dict): The report sections (see build_report_data).
+        output_path (str, optional): The path of the PDF. Defaults to "test.pdf".
+        created_at (datetime.datetime, optional): The time written in the heading. Defaults to None, which uses the current time.
+        appendix (tuple, optional): The column names and the row batches of the raw data appendix (see iter_report_rows).
+            Defaults to None, which writes no appendix.
+
+    Returns:
+        str: The path of the saved PDF.
+    """
+    created_at = datetime.datetime.now() if created_at is None else created_at
+    pdf = PdfWriter(output_path)
+    try:
+        pdf.y -= TITLE_SIZE
+        pdf.text(MARGIN, f"Izvještaj prosjeka čišćenja {created_at}", TITLE_SIZE, bold=True)
+        pdf.y -= TITLE_SIZE
+
+        sections = list(dictionary.items())
+        if appendix is not None:
+            columns, batches = appendix
+            sections.append((APPENDIX_TITLE, (columns, (row for batch in batches for row in batch))))
+
+        for title, value in sections:
+            if _is_chart(value):
+                width, height = pdf.image_size(value)
+                drawn_width = PAGE_WIDTH - 2 * MARGIN
+                drawn_height = drawn_width * height / width
+                if drawn_height > PAGE_HEIGHT - 2 * MARGIN - 2 * HEADING_SIZE:
+                    drawn_height = PAGE_HEIGHT - 2 * MARGIN - 2 * HEADING_SIZE
+                    drawn_width = drawn_height * width / height
+                if not pdf.space(2 * HEADING_SIZE + drawn_height):
+                    pdf.new_page()
+                pdf.y -= HEADING_SIZE
+                pdf.text(MARGIN, title, HEADING_SIZE, bold=True)
+                pdf.y -= HEADING_SIZE
+                pdf.image(value, drawn_width, drawn_height)
+                pdf.y -= HEADING_SIZE
+                continue
+
+            header, rows = value if isinstance(value, tuple) else _section_rows(value)
+            if not pdf.space(2 * HEADING_SIZE + 3 * ROW_HEIGHT):
+                pdf.new_page()
+            pdf.y -= HEADING_SIZE
+            pdf.text(MARGIN, title, HEADING_SIZE, bold=True)
+            pdf.y -= HEADING_SIZE + 4
+            _pdf_table(pdf, header, rows, title)
+    finally:
+        pdf.close()
+    return output_path
+
+EXPORTERS = {
+    ".xlsx": export_xlsx,
+    ".pdf": export_pdf,
+}
+
+def export_report(dictionary: dict, output_path: str = "test.docx", created_at: datetime.datetime = None, appendix: tuple = None) -> str:
+    """
+    Saves the report sections in the format given by the extension of the output path.
+
+    .xlsx and .pdf are streamed to the file (see export_xlsx and export_pdf); anything else
+    is saved as a Word document with create_document.
+
+    Args:
+        dictionary (dict): The report sections (see build_report_data).
+        output_path (str, optional): The path of the report. Defaults to "test.docx".
+        created_at (datetime.datetime, optional): The time written in the heading. Defaults to None, which uses the current time.
+        appendix (tuple, optional): The column names and the row batches of the raw data appendix (see iter_report_rows).
+            Only .xlsx and .pdf reports can have one. Defaults to None.
+
+    Returns:
+        str: The path of the saved report.
+    """
+    exporter = EXPORTERS.get(os.path.splitext(output_path)[1].lower())
+    if exporter is not None:
+        return exporter(dictionary, output_path, created_at, appendix)
+
+    if appendix is not None:
+        raise ValueError("The raw data appendix can only be exported to .xlsx or .pdf")
+    from report_generation import create_document
+    return create_document(dictionary, output_path, created_at)
@@ -1,8 +1,22 @@
+import csv
 import pandas as pd
 from DB_manager import *
-from report_generation import create_document
+from aggregation import *
+from summaries import *
+from report_cache import report_cache
+from snapshot import load_production_data, compact_dataframe, SNAPSHOT_COLUMNS
+from time_series import *
+from partitions import PARTITION_COLUMN, partition_keys, ensure_partition_column, archived_values
+from instrumentation import stage
+from charts import report_charts, render_charts
 
-def excel_to_dateframe(path_to_excel: str, sort: str = None) -> pd.DataFrame: 
+DATE_COLUMN = "Datum"
+FINGERPRINT_COLUMN = "Otisak"
+TEXT_COLUMNS = ["Ime", "Sirovina"]
+NUMERIC_COLUMNS = ["Brzina"]
+LAST_STORED_DATE = object()
+
+def excel_to_dateframe(path_to_excel: str, sort: str = None, incremental: bool = True) -> pd.DataFrame: 
     """   This function reads an Excel file and converts into a pandas DataFrame. 
         It also sorts the DataFrame based on a specified column if provided.
 
@@ -10,17 +24,222 @@ def excel_to_dateframe(path_to_excel: str, sort: str = None) -> pd.DataFrame:
         path_to_excel (str): The path to the Excel file
         sheet (str): The name of the sheet to be converted into a DataFrame
         sort (str, optional): The column name to sort the DataFrame by. Defaults to None.
+        incremental (bool, optional): If True, only new rows are appended to the database,
+            otherwise the whole table is replaced. Defaults to True.
 
     Returns:
         pd.DataFrame: The DataFrame obtained from the specified sheet of the Excel file, sorted by the specified column if provided
     """
-    dataframe = pd.read_excel(path_to_excel)
-    if sort is not None:
-        dataframe = dataframe.sort_values(by=sort)
-        
-    add_data_to_database(dataframe, "Brzina_Radnika")
+    with stage("ingest", path=path_to_excel) as record:
+        with stage("ingest.read") as read:
+            dataframe = pd.read_excel(path_to_excel)
+            if sort is not None:
+                dataframe = dataframe.sort_values(by=sort)
+            read["rows"] = len(dataframe)
+
+        if dataframe.empty:
+            info("No data was selected")
+            record["rows"] = 0
+        elif incremental:
+            record["rows"] = append_data_to_database(dataframe, "Brzina_Radnika")
+        else:
+            add_data_to_database(dataframe, "Brzina_Radnika")
+            rebuild_summary_tables()
+            record["rows"] = len(dataframe)
     return dataframe
 
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Converts a Series of dates written in ISO or day-first form into datetimes.
+
+    Values that start like "YYYY-MM-DD" are parsed as ISO dates, everything else day first
+    ("31.01.2024", "31/01/2024"). Values that cannot be parsed become NaT.
+
+    Args:
+        values (pd.Series): The values to convert.
+
+    Returns:
+        pd.Series: A datetime Series with the same index.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    text = values.astype("string").str.strip()
+    iso = text.str.match(r"\d{4}-\d{2}-\d{2}").fillna(False).astype(bool)
+    dates = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    if iso.any():
+        dates[iso] = pd.to_datetime(text[iso], format="ISO8601", errors="coerce")
+    if (~iso).any():
+        dates[~iso] = pd.to_datetime(text[~iso], dayfirst=True, errors="coerce")
+    return dates
+
+def parse_date(value) -> pd.Timestamp:
+    """Converts a single date written in ISO or day-first form into a Timestamp.
+
+    Args:
+        value: A date, datetime or a date string.
+
+    Returns:
+        pd.Timestamp: The parsed date.
+    """
+    date = parse_dates(pd.Series([value], dtype=object))[0]
+    if pd.isna(date):
+        raise ValueError(f"Invalid date: {value}")
+    return date
+
+def count_file_rows(path: str) -> int:
+    """Returns the number of data rows in an .xlsx or .csv file without loading it.
+
+    For .xlsx files the number comes from the sheet dimensions stored in the file, for .csv
+    files the line breaks are counted in binary blocks.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        int: The number of rows below the header, or None if it cannot be determined cheaply.
+    """
+    if path.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        max_row = workbook.active.max_row
+        workbook.close()
+        return max_row - 1 if max_row else None
+
+    lines = 0
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return max(lines - 1, 0)
+
+def read_file_in_chunks(path: str, chunk_size: int = 50000):
+    """Reads an .xlsx or .csv file as a sequence of DataFrames with at most chunk_size rows.
+
+    .xlsx files are read with openpyxl in read-only mode row by row, .csv files with pandas
+    in chunks, so only one chunk is held in memory at a time. The CSV delimiter is detected
+    from the start of the file.
+
+    Args:
+        path (str): The path to the file.
+        chunk_size (int, optional): The maximum number of rows per chunk. Defaults to 50000.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows with the header of the file as column names.
+    """
+    if path.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(column).strip() for column in header]
+
+            chunk = []
+            for row in rows:
+                if any(value is not None for value in row):
+                    chunk.append(row)
+                if len(chunk) == chunk_size:
+                    yield pd.DataFrame(chunk, columns=columns)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=columns)
+        finally:
+            workbook.close()
+        return
+
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        sample = file.read(64 * 1024)
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+    except csv.Error:
+        delimiter = ","
+
+    for chunk in pd.read_csv(path, sep=delimiter, chunksize=chunk_size, encoding="utf-8-sig"):
+        chunk.columns = [str(column).strip() for column in chunk.columns]
+        yield chunk
+
+def coerce_types(df: pd.DataFrame, date_column: str = DATE_COLUMN) -> pd.DataFrame:
+    """Converts the known columns of a chunk to their expected types.
+
+    'Ime' and 'Sirovina' become stripped strings, 'Brzina' becomes a float (a decimal comma
+    is accepted) and the date column becomes a datetime. Values that cannot be converted
+    become missing values.
+
+    Args:
+        df (pd.DataFrame): A chunk returned by read_file_in_chunks.
+        date_column (str, optional): The name of the date column. Defaults to DATE_COLUMN.
+
+    Returns:
+        pd.DataFrame: The chunk with converted columns.
+    """
+    df = df.copy()
+    for column in TEXT_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("string").str.strip().astype(object).where(df[column].notna(), None)
+
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns and not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column].astype("string").str.replace(",", ".", regex=False), errors="coerce")
+        if column in df.columns:
+            df[column] = df[column].astype("float64")
+
+    if date_column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[date_column]):
+        df[date_column] = parse_dates(df[date_column])
+
+    return df
+
+def stream_file_to_database(path: str, table_name: str = "Brzina_Radnika", chunk_size: int = 50000, progress=None) -> int:
+    """Appends an .xlsx or .csv file to the database chunk by chunk.
+
+    Every chunk is converted with coerce_types and written by append_data_to_database in its
+    own transaction, so the memory used does not depend on the size of the file. The last
+    stored date is read once before the first chunk, so rows of an unsorted file are not
+    skipped because a previous chunk of the same file moved it forward. The fingerprints are
+    calculated over the whole file, so repeated rows in different chunks are all stored.
+
+    Args:
+        path (str): The path to the .xlsx or .csv file.
+        table_name (str, optional): The name of the table the data is appended to. Defaults to "Brzina_Radnika".
+        chunk_size (int, optional): The maximum number of rows per chunk. Defaults to 50000.
+        progress (callable, optional): Called after every chunk with the number of rows read so far
+            and the total number of rows (or None if it is unknown). Defaults to None.
+
+    Returns:
+        int: The number of rows that were added to the table.
+    """
+    with stage("ingest", path=path) as record:
+        database = get_connection()
+        last_date = None
+        if table_exists(database, table_name) and DATE_COLUMN in get_sql_column_names(database, table_name):
+            last_date = get_max_value(database, table_name, DATE_COLUMN)
+
+        total_rows = count_file_rows(path) if progress is not None else None
+        rows_read = 0
+        rows_added = 0
+        chunks = read_file_in_chunks(path, chunk_size)
+        fingerprints = UploadFingerprints()
+
+        while True:
+            with stage("ingest.read") as read:
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    chunk = coerce_types(chunk)
+                    chunk[FINGERPRINT_COLUMN] = fingerprints(chunk)
+                    read["rows"] = len(chunk)
+            if chunk is None:
+                break
+
+            rows_read += len(chunk)
+            rows_added += append_data_to_database(chunk, table_name, watermark=last_date)
+            if progress is not None:
+                progress(rows_read, total_rows)
+
+        record["rows"] = rows_added
+    return rows_added
+
 def get_column_names(dataframe: pd.DataFrame) -> list:
     """This function reads dataframe and returns headers as a list
 
@@ -92,7 +311,7 @@ def averages_per_process(df: pd.DataFrame) -> dict:
         dict: A dictionary where keys are the process names ('Sirovina' values) and values are the corresponding average speeds.
         
     """
-    return df.groupby("Sirovina")["Brzina"].mean().round(2)
+    return process_averages(aggregate_speeds(df))
 
 def averages_per_person(df: pd.DataFrame) -> dict:
     """
@@ -110,8 +329,7 @@ def averages_per_person(df: pd.DataFrame) -> dict:
     keys are the 'Sirovina' values. The values of the inner dictionaries are the average 'Brzina' for the corresponding
     'Ime' and 'Sirovina'.
     """
-    df_grouped = df.groupby(['Ime', 'Sirovina'])['Brzina'].mean().round(2)
-    return df_grouped.reset_index()
+    return person_averages(aggregate_speeds(df))
 
 def filter_material(df: pd.DataFrame, material: str) -> pd.DataFrame:
 
@@ -135,31 +353,34 @@ def filter_material(df: pd.DataFrame, material: str) -> pd.DataFrame:
 
     return searched_material
  
-def worker_speed_best_all_time(df: pd.DataFrame) -> dict:
+def worker_speed_best_all_time(df: pd.DataFrame, top_n: int = None) -> dict:
     
     """  Finds the best worker speeds for each material.
 
     This function takes a DataFrame containing worker speed data and returns a dictionary 
     where the keys are unique materials (from the "Sirovina" column), and the values are 
     DataFrames sorted by the highest worker speed (from the "Brzina" column) in descending order.
+    The rows are split by material in a single groupby pass; with top_n only the fastest rows
+    of each material are selected, without sorting the rest.
 
     Args:
         df (pd.DataFrame): A DataFrame containing at least the following columns:
             - 'Sirovina': The material for which the worker speed is recorded.
             - 'Brzina': The speed of the worker for that material.
+        top_n (int, optional): The number of rows kept per material. Defaults to None, which keeps all rows.
 
     Returns:
         dict: A dictionary where each key is a unique material (from the 'Sirovina' column), 
               and the corresponding value is a DataFrame of rows related to that material,
               sorted by the 'Brzina' column in descending order (best speed first).
     """
-    materials = unique_values(df, "Sirovina")
     result = {}
 
-    for material in materials:
-        df_group = df[df["Sirovina"] == material]
-        df_group = df_group.sort_values(by = "Brzina", ascending=False)
-        result[material] = df_group
+    for material, df_group in df.groupby("Sirovina", sort=False, observed=True):
+        if top_n is None:
+            result[material] = df_group.sort_values(by = "Brzina", ascending=False, kind="stable")
+        else:
+            result[material] = df_group.nlargest(top_n, "Brzina", keep="first")
 
     return result
 
@@ -175,26 +396,631 @@ def add_data_to_database(df: pd.DataFrame, table_name):
     """
     if df.empty:
         info("No data was selected")
+        return
 
-    
-    database = create_connection("baza_proizvodnja.db")
-    df.to_sql(f"{table_name}", database, if_exists="replace", index=False)
+    database = get_connection()
+    with stage("ingest.store", table=table_name, rows=len(df)), transaction(database):
+        create_table_for_dataframe(database, table_name, df, replace=True)
+        insert_rows(database, table_name, df)
+        bump_data_version(database, table_name)
+    if table_name == SOURCE_TABLE:
+        report_cache.invalidate()
 
-def pull_data_from_database(table_name: str):
+def prepare_for_storage(df: pd.DataFrame, date_column: str = DATE_COLUMN) -> pd.DataFrame:
+    """Converts a DataFrame into the form in which it is stored in the database.
 
-    """Fetches all data from a specified database table and converts it to a DataFrame.
+    The date column is parsed and written as "YYYY-MM-DD HH:MM:SS" text, which SQLite
+    compares and sorts chronologically. Every other datetime column is formatted the same way.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be stored.
+        date_column (str, optional): The name of the date column. Defaults to DATE_COLUMN.
+
+    Returns:
+        pd.DataFrame: A copy of the DataFrame with datetime columns converted to text.
+    """
+    df = df.copy()
+    if date_column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[date_column]):
+        df[date_column] = parse_dates(df[date_column])
+
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].dt.strftime("%Y-%m-%d %H:%M:%S")
+
+    return df
+
+def _content_hashes(df: pd.DataFrame) -> pd.Series:
+    """Hashes the values of every row in the form in which they are stored.
+
+    The rows are converted with coerce_types, other datetimes are formatted like in
+    prepare_for_storage, other numbers become floats and missing values None, and the
+    columns are sorted by name, so a row read back from the database hashes the same as
+    the row that was uploaded.
+
+    Args:
+        df (pd.DataFrame): The rows to hash, without the fingerprint and partition columns.
+
+    Returns:
+        pd.Series: A Series of unsigned 64-bit hashes, one per row.
+    """
+    df = coerce_types(df)
+    for column in df.columns:
+        values = df[column]
+        if column == DATE_COLUMN:
+            df[column] = values.astype("datetime64[ns]")
+            continue
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.dt.strftime("%Y-%m-%d %H:%M:%S")
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            df[column] = values.astype("float64")
+        else:
+            values = values.astype(object)
+            df[column] = values.where(values.notna(), None) if values.hasnans else values
+    return pd.util.hash_pandas_object(df[sorted(df.columns)], index=False)
+
+class UploadFingerprints:
+    """Calculates the fingerprints of the rows of one upload, chunk by chunk.
+
+    The first copy of a row gets a hash of its values as fingerprint, the following copies
+    of the same row in the upload, also those in later chunks, a hash of the values and
+    the number of the copy. Repeated measurements in one file are therefore all stored,
+    while uploading the same rows again gives the same fingerprints and adds nothing.
+    """
+
+    def __init__(self):
+        self.copies = pd.Series(dtype="int64")
+
+    def __call__(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Calculates the fingerprints of the next chunk of the upload.
+
+        Args:
+            df (pd.DataFrame): The rows of the chunk.
+
+        Returns:
+            pd.Series: A Series of signed 64-bit integers, one per row, named FINGERPRINT_COLUMN.
+        """
+        hashes = _content_hashes(df.drop(columns=[FINGERPRINT_COLUMN, PARTITION_COLUMN], errors="ignore"))
+        copy = self.copies.reindex(hashes.to_numpy(), fill_value=0).to_numpy() + hashes.groupby(hashes).cumcount().to_numpy()
+        self.copies = self.copies.add(hashes.value_counts(), fill_value=0).astype("int64")
+
+        fingerprints = hashes.to_numpy().copy()
+        repeated = copy > 0
+        if repeated.any():
+            fingerprints[repeated] = pd.util.hash_pandas_object(
+                pd.DataFrame({"hash": fingerprints[repeated], "copy": copy[repeated]}), index=False,
+            ).to_numpy()
+        return pd.Series(fingerprints.view("int64"), index=df.index, name=FINGERPRINT_COLUMN)
+
+def row_fingerprints(df: pd.DataFrame) -> pd.Series:
+    """Calculates a 64-bit fingerprint of every row in the DataFrame.
+
+    The DataFrame is fingerprinted as a single upload (see UploadFingerprints), so the
+    same rows always get the same fingerprints, whether they are uploaded or read back
+    from the database.
+
+    Args:
+        df (pd.DataFrame): The DataFrame whose rows are fingerprinted.
+
+    Returns:
+        pd.Series: A Series of signed 64-bit integers, one per row.
+    """
+    return UploadFingerprints()(df)
+
+def prepare_table_for_append(connection: sqlite3.Connection, table_name: str, date_column: str = DATE_COLUMN):
+    """Makes sure an existing table can be used for incremental appends.
+
+    Tables created by older versions were replaced on every upload and have no
+    fingerprint column or month partition column. The columns are added and filled in
+    once, and the indexes used by append_data_to_database and by the report filters are created.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+        date_column (str, optional): The name of the date column. Defaults to DATE_COLUMN.
+    """
+    columns = get_sql_column_names(connection, table_name)
+
+    if FINGERPRINT_COLUMN not in columns:
+        stored = pd.read_sql(f'SELECT rowid, * FROM "{table_name}" ORDER BY rowid', connection)
+        fingerprints = row_fingerprints(stored.drop(columns=["rowid"]))
+        add_column(connection, table_name, FINGERPRINT_COLUMN, "INTEGER")
+        connection.executemany(
+            f'UPDATE "{table_name}" SET "{FINGERPRINT_COLUMN}" = ? WHERE rowid = ?',
+            zip(fingerprints.tolist(), stored["rowid"].tolist()),
+        )
+        connection.commit()
+
+    create_index(connection, table_name, [FINGERPRINT_COLUMN], unique=True)
+    for column in TEXT_COLUMNS + [date_column]:
+        if column in columns:
+            create_index(connection, table_name, [column])
+    ensure_partition_column(connection, table_name, date_column)
+
+def append_data_to_database(df: pd.DataFrame, table_name: str, date_column: str = DATE_COLUMN, watermark=LAST_STORED_DATE) -> int:
+    """Appends only the new rows of a DataFrame to an SQLite table.
+
+    Rows older than the last date already stored in the table are skipped, and so are
+    rows whose fingerprint is already in the table or in its archive (see archive_partitions).
+    Repeated rows of the DataFrame itself are all stored (see UploadFingerprints); a DataFrame
+    that is one chunk of a larger upload should come with its fingerprint column already set.
+    The last date and the fingerprints are looked up through indexes, so the cost depends on
+    the size of the DataFrame and not on the size of the table.
+
+    Args:
+        df (pd.DataFrame): A DataFrame containing the data to be added to the database.
+        table_name (str): The name of the table the data is appended to.
+        date_column (str, optional): The name of the date column. Defaults to DATE_COLUMN.
+        watermark (str, optional): Rows dated before this "YYYY-MM-DD HH:MM:SS" value are skipped.
+            Defaults to LAST_STORED_DATE, which uses the last date stored in the table.
+            None disables the date filter and only the fingerprints are checked.
+
+    Returns:
+        int: The number of rows that were added to the table, 0 for an empty DataFrame. No message is
+        shown, because the function is called once per chunk; the caller reports the whole upload.
+    """
+    if df.empty:
+        return 0
+
+    database = get_connection()
+    df = prepare_for_storage(df, date_column)
+    if FINGERPRINT_COLUMN not in df.columns:
+        df[FINGERPRINT_COLUMN] = row_fingerprints(df)
+    df = df.drop_duplicates(subset=FINGERPRINT_COLUMN)
+    if date_column in df.columns:
+        df[PARTITION_COLUMN] = partition_keys(df[date_column])
+
+    with stage("ingest.store", table=table_name) as record, transaction(database):
+        if not table_exists(database, table_name):
+            record["rows"] = len(df)
+            create_table_for_dataframe(database, table_name, df)
+            insert_rows(database, table_name, df)
+            bump_data_version(database, table_name)
+            prepare_table_for_append(database, table_name, date_column)
+            if table_name == SOURCE_TABLE:
+                rebuild_summary_tables(database, date_column)
+                report_cache.invalidate()
+            return len(df)
+
+        prepare_table_for_append(database, table_name, date_column)
+
+        if date_column in df.columns:
+            if watermark is LAST_STORED_DATE:
+                watermark = get_max_value(database, table_name, date_column)
+            if watermark is not None:
+                df = df[(df[date_column] >= watermark) | df[date_column].isna()]
+
+        fingerprints = df[FINGERPRINT_COLUMN].tolist()
+        seen = get_existing_values(database, table_name, FINGERPRINT_COLUMN, fingerprints)
+        seen |= archived_values(table_name, FINGERPRINT_COLUMN, fingerprints)
+        df = df[~df[FINGERPRINT_COLUMN].isin(seen)]
+        record["rows"] = len(df)
+        if df.empty:
+            return 0
+        insert_rows(database, table_name, df, on_conflict="ignore")
+        bump_data_version(database, table_name)
+        if table_name == SOURCE_TABLE:
+            with stage("ingest.summaries", rows=len(df)):
+                update_summary_tables(database, df, date_column)
+
+    if table_name == SOURCE_TABLE:
+        report_cache.invalidate()
+    return len(df)
+
+def _date_bound(value, next_day: bool = False) -> str:
+    """Converts a date into the text form used in the database.
+
+    Args:
+        value: A date, datetime or a date string.
+        next_day (bool, optional): Return the start of the following day. Defaults to False.
+
+    Returns:
+        str: The start of the day in "YYYY-MM-DD HH:MM:SS" form.
+    """
+    day = parse_date(value).normalize()
+    if next_day:
+        day += pd.Timedelta(days=1)
+    return day.strftime("%Y-%m-%d %H:%M:%S")
+
+def filter_clause(workers: list = None, materials: list = None, date_from=None, date_to=None, date_column: str = DATE_COLUMN,
+                  group_keys: list = ()) -> tuple:
+    """Builds a parameterized WHERE clause for the report filters.
+
+    Args:
+        workers (list, optional): Only rows of these workers match. Defaults to None, which matches all workers.
+        materials (list, optional): Only rows of these processes match. Defaults to None, which matches all processes.
+        date_from (optional): The first day of the date range, inclusive. Defaults to None.
+        date_to (optional): The last day of the date range, inclusive. Defaults to None.
+        date_column (str, optional): The name of the date column. Defaults to DATE_COLUMN.
+        group_keys (list, optional): Columns the rows are grouped by. Rows where any of them is NULL do not match,
+            like in the summary tables. Defaults to ().
+
+    Returns:
+        tuple: The WHERE clause (an empty string if there are no filters) and the list of its parameters.
+    """
+    conditions = [f'"{column}" IS NOT NULL' for column in group_keys]
+    params = []
+    for column, values in (("Ime", workers), ("Sirovina", materials)):
+        if values is not None:
+            condition, values = in_condition(column, values)
+            conditions.append(condition)
+            params.extend(values)
+
+    if date_from is not None:
+        conditions.append(f'"{date_column}" >= ?')
+        params.append(_date_bound(date_from))
+    if date_to is not None:
+        conditions.append(f'"{date_column}" < ?')
+        params.append(_date_bound(date_to, next_day=True))
+
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+def _month_range(date_from, date_to) -> tuple:
+    """Returns the month range covered by a date range if it starts and ends on month boundaries.
+
+    Args:
+        date_from: The first day of the date range, or None.
+        date_to: The last day of the date range, or None.
+
+    Returns:
+        tuple: The first and last month in "YYYY-MM" form (None for an open end),
+        or None if the range does not consist of whole months.
+    """
+    month_from = month_to = None
+    if date_from is not None:
+        start = parse_date(date_from)
+        if start != start.normalize() or start.day != 1:
+            return None
+        month_from = start.strftime("%Y-%m")
+    if date_to is not None:
+        end = parse_date(date_to)
+        if end != end.normalize() or not end.is_month_end:
+            return None
+        month_to = end.strftime("%Y-%m")
+    return month_from, month_to
+
+def get_selected_workers() -> list:
+    """Returns the workers saved in the Radnici table by the worker selection screen.
+
+    Returns:
+        list: The names of the selected workers, or None if no selection was saved.
+    """
+    database = get_connection()
+    if not table_exists(database, "Radnici"):
+        return None
+    workers = [worker for worker in get_column(database, "Radnici", f'"{get_sql_column_names(database, "Radnici")[0]}"') if worker is not None]
+    return workers or None
+
+PREVIEW_SORT_COLUMNS = ["Datum", "Ime", "Sirovina"]
+
+def _preview_segment(connection: sqlite3.Connection, table_name: str, column_list: str, sort_column: str,
+                     null_values: bool, descending: bool, after, limit: int) -> list:
+    """Reads the next rows of one part of a preview, either the rows with an empty sort column or the others.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+        column_list (str): The quoted columns that are read.
+        sort_column (str): The indexed column the rows are sorted by.
+        null_values (bool): Read the rows whose sort column is empty if True, the others if False.
+        descending (bool): Sort from the largest value to the smallest.
+        after (tuple): The sort value and rowid of the last row already shown in this part, or None.
+        limit (int): The maximum number of rows.
+
+    Returns:
+        list: Tuples of the rowid, the sort value and the values of the columns.
+    """
+    direction, comparison = ("DESC", "<") if descending else ("ASC", ">")
+    order = f'"{sort_column}" {direction}, rowid {direction}'
+    if null_values:
+        queries = [(f'"{sort_column}" IS NULL', [])]
+        if after is not None:
+            queries = [(f'"{sort_column}" IS NULL AND rowid {comparison} ?', [after[1]])]
+    elif after is None:
+        queries = [(f'"{sort_column}" IS NOT NULL', [])]
+    else:
+        # Two seeks instead of one row value comparison: SQLite would seek to the sort value
+        # and then scan every earlier row with the same value to find the rowid.
+        queries = [(f'"{sort_column}" = ? AND rowid {comparison} ?', list(after)),
+                   (f'"{sort_column}" {comparison} ?', [after[0]])]
+
+    rows = []
+    for condition, params in queries:
+        cursor = connection.execute(
+            f'SELECT rowid, "{sort_column}", {column_list} FROM "{table_name}" WHERE {condition} ORDER BY {order} LIMIT ?',
+            params + [limit - len(rows)],
+        )
+        rows += cursor.fetchall()
+        cursor.close()
+        if len(rows) == limit:
+            break
+    return rows
+
+def fetch_preview_page(table_name: str = "Brzina_Radnika", sort_column: str = "Datum", descending: bool = False,
+                       after: tuple = None, page_size: int = 200) -> tuple:
+    """Reads one page of a table for the data preview.
+
+    The pages are read with keyset pagination: every page continues after the sort value and
+    rowid of the last row of the previous page, and the rows are found through the index on the
+    sort column. A page therefore takes the same time at the start and at the end of the table,
+    unlike LIMIT with OFFSET, which reads and skips every earlier row. Rows with an empty sort
+    column are shown first when sorting ascending and last when sorting descending.
+
+    Args:
+        table_name (str, optional): The name of the table. Defaults to "Brzina_Radnika".
+        sort_column (str, optional): One of PREVIEW_SORT_COLUMNS. Defaults to "Datum".
+        descending (bool, optional): Sort from the largest value to the smallest. Defaults to False.
+        after (tuple, optional): The cursor returned with the previous page. Defaults to None, which reads the first page.
+        page_size (int, optional): The maximum number of rows on the page. Defaults to 200.
+
+    Raises:
+        ValueError: If the table cannot be sorted by sort_column.
+
+    Returns:
+        tuple: The column names, the rows as tuples, and the cursor of the next page (None after the last page).
+    """
+    database = get_connection()
+    if not table_exists(database, table_name):
+        return [], [], None
+
+    stored_columns = get_sql_column_names(database, table_name)
+    if sort_column not in PREVIEW_SORT_COLUMNS or sort_column not in stored_columns:
+        raise ValueError(f"The preview cannot be sorted by {sort_column}")
+
+    columns = [column for column in stored_columns if column not in (FINGERPRINT_COLUMN, PARTITION_COLUMN)]
+    column_list = ", ".join(f'"{column}"' for column in columns)
+
+    segments = [True, False] if not descending else [False, True]
+    if after is not None:
+        segments = segments[segments.index(after[0] is None):]
+
+    rows = []
+    for null_values in segments:
+        segment_after = after if after is not None and (after[0] is None) == null_values else None
+        rows += _preview_segment(database, table_name, column_list, sort_column, null_values, descending,
+                                 segment_after, page_size - len(rows))
+        if len(rows) == page_size:
+            break
+
+    next_cursor = (rows[-1][1], rows[-1][0]) if len(rows) == page_size else None
+    return columns, [row[2:] for row in rows], next_cursor
+
+def get_worker_names() -> list:
+    """Returns the name of every worker that has data in the database.
+
+    The names are read with SELECT DISTINCT from the per-worker summary table, whose primary
+    key starts with 'Ime', or from the index on 'Ime' of Brzina_Radnika if there is no summary,
+    so the production rows themselves are never read.
+
+    Returns:
+        list: The worker names in alphabetical order, or None if there is no data.
+    """
+    database = get_connection()
+    for table_name in (PERSON_SUMMARY_TABLE, SOURCE_TABLE):
+        if table_exists(database, table_name):
+            cursor = database.execute(f'SELECT DISTINCT "Ime" FROM "{table_name}" WHERE "Ime" IS NOT NULL ORDER BY "Ime"')
+            names = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+            if names or table_name == SOURCE_TABLE:
+                return names or None
+    return None
+
+def _create_worker_selection_table(connection: sqlite3.Connection):
+    """Creates the Radnici table keyed by 'Ime'.
+
+    A Radnici table saved by older versions has no primary key; its names are kept and
+    it is recreated with one.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+    """
+    if table_exists(connection, "Radnici"):
+        columns = connection.execute('PRAGMA table_info("Radnici")').fetchall()
+        if [column[1] for column in columns if column[5]] == ["Ime"]:
+            return
+        names = [worker for worker in get_column(connection, "Radnici", f'"{columns[0][1]}"') if worker is not None]
+        connection.execute('DROP TABLE "Radnici"')
+    else:
+        names = []
+
+    connection.execute('CREATE TABLE "Radnici" ("Ime" TEXT PRIMARY KEY) WITHOUT ROWID')
+    insert_rows(connection, "Radnici", [(name,) for name in names], columns=["Ime"], on_conflict="ignore")
+
+def save_worker_selection(workers: list) -> tuple:
+    """Saves the workers selected on the worker selection screen.
+
+    Only the differences to the saved selection are written: new names are inserted and
+    names that are no longer selected are deleted.
+
+    Args:
+        workers (list): The names of the selected workers.
+
+    Returns:
+        tuple: The number of names that were added and the number that were removed.
+    """
+    database = get_connection()
+    selected = {worker for worker in workers if worker is not None}
+
+    with transaction(database):
+        _create_worker_selection_table(database)
+        saved = set(get_column(database, "Radnici", '"Ime"'))
+
+        added = sorted(selected - saved)
+        removed = sorted(saved - selected)
+        insert_rows(database, "Radnici", [(name,) for name in added], columns=["Ime"], on_conflict="ignore")
+        for start in range(0, len(removed), 500):
+            condition, params = in_condition("Ime", removed[start:start + 500])
+            database.execute(f'DELETE FROM "Radnici" WHERE {condition}', params)
+
+    return len(added), len(removed)
+
+def load_report_aggregates(workers: list = None, materials: list = None, date_from=None, date_to=None) -> tuple:
+    """Loads the per-worker aggregate and the per-process totals a report is built from.
+
+    Without a date range, or with a range of whole months, the aggregates are read from the
+    summary tables. Otherwise they are calculated by SQLite from the rows of Brzina_Radnika
+    that match the filters, which are found through the indexes on Ime, Sirovina and Datum.
+    Both ways leave out the rows without a name or a process, the per-process totals only
+    the rows without a process. The per-process totals are not limited to the selected
+    workers, so the workers are compared to the average of everyone who worked on the process.
+
+    Args:
+        workers (list, optional): Only these workers are included. Defaults to None, which includes all workers.
+        materials (list, optional): Only these processes are included. Defaults to None, which includes all processes.
+        date_from (optional): The first day of the date range, inclusive. Defaults to None.
+        date_to (optional): The last day of the date range, inclusive. Defaults to None.
+
+    Returns:
+        tuple: The per-worker aggregate (see aggregate_speeds) and the per-process totals (see process_totals).
+    """
+    database = get_connection()
+    months = _month_range(date_from, date_to) if date_from is not None or date_to is not None else (None, None)
+
+    if months is not None:
+        month_from, month_to = months
+        aggregate = summary_person_aggregate(database, workers=workers, materials=materials, month_from=month_from, month_to=month_to)
+        process_total = summary_process_totals(database, materials=materials, month_from=month_from, month_to=month_to)
+        return aggregate, process_total
+
+    aggregates = 'COUNT("Brzina") AS "count", TOTAL("Brzina") AS "sum", TOTAL("Brzina" * "Brzina") AS "sum_sq", MIN("Brzina") AS "min", MAX("Brzina") AS "max"'
+    where, params = filter_clause(workers, materials, date_from, date_to, group_keys=["Ime", "Sirovina"])
+    aggregate = pd.read_sql(
+        f'SELECT "Ime", "Sirovina", {aggregates} FROM "{SOURCE_TABLE}"{where} GROUP BY "Ime", "Sirovina" ORDER BY "Ime", "Sirovina"',
+        database, params=params,
+    )
+    where, params = filter_clause(None, materials, date_from, date_to, group_keys=["Sirovina"])
+    process_total = pd.read_sql(
+        f'SELECT "Sirovina", {aggregates} FROM "{SOURCE_TABLE}"{where} GROUP BY "Sirovina" ORDER BY "Sirovina"',
+        database, params=params, index_col="Sirovina",
+    )
+    return aggregate, process_total
+
+def load_worker_ranking(top_n: int = 10, fastest: bool = True, workers: list = None, materials: list = None,
+                        date_from=None, date_to=None) -> pd.DataFrame:
+    """Ranks the workers of every process by their average speed and keeps the first top_n.
+
+    The ranking is calculated by SQLite with ROW_NUMBER() OVER (PARTITION BY "Sirovina"),
+    over the per-worker averages read the same way as load_report_aggregates: from the summary
+    tables for whole months and from the matching rows of Brzina_Radnika otherwise. Only the
+    ranked rows are returned to Python. SQLite versions without window functions (before 3.25)
+    rank the aggregate with workers_by_process instead.
+
+    Args:
+        top_n (int, optional): The number of workers kept per process. Defaults to 10.
+        fastest (bool, optional): Rank the fastest workers first if True, the slowest if False. Defaults to True.
+        workers (list, optional): Only these workers are ranked. Defaults to None, which ranks all workers.
+        materials (list, optional): Only these processes are ranked. Defaults to None, which ranks all processes.
+        date_from (optional): The first day of the date range, inclusive. Defaults to None.
+        date_to (optional): The last day of the date range, inclusive. Defaults to None.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Sirovina', 'Rang', 'Ime' and 'Brzina', ordered by process and rank.
+        Workers with the same average are ranked by name.
+    """
+    if sqlite3.sqlite_version_info < (3, 25, 0):
+        aggregate, _ = load_report_aggregates(workers, materials, date_from, date_to)
+        ranked = [group.assign(Rang=range(1, len(group) + 1))
+                  for group in workers_by_process(person_averages(aggregate), not fastest, top_n).values()]
+        if not ranked:
+            return pd.DataFrame(columns=["Sirovina", "Rang", "Ime", "Brzina"])
+        return pd.concat(ranked)[["Sirovina", "Rang", "Ime", "Brzina"]].reset_index(drop=True)
+
+    database = get_connection()
+    months = _month_range(date_from, date_to) if date_from is not None or date_to is not None else (None, None)
+
+    if months is not None:
+        averages, params = summary_person_query(database, workers=workers, materials=materials, month_from=months[0], month_to=months[1])
+    else:
+        where, params = filter_clause(workers, materials, date_from, date_to, group_keys=["Ime", "Sirovina"])
+        averages = f'SELECT "Ime", "Sirovina", COUNT("Brzina") AS "count", TOTAL("Brzina") AS "sum" FROM "{SOURCE_TABLE}"{where} GROUP BY "Ime", "Sirovina"'
+
+    order = "DESC" if fastest else "ASC"
+    ranking = pd.read_sql(f"""
+        SELECT "Sirovina", "Rang", "Ime", "Brzina" FROM (
+            SELECT "Sirovina", "Ime", "Brzina",
+                   ROW_NUMBER() OVER (PARTITION BY "Sirovina" ORDER BY "Brzina" {order}, "Ime") AS "Rang"
+            FROM (SELECT "Ime", "Sirovina", "sum" / "count" AS "Brzina" FROM ({averages}) WHERE "count" > 0)
+        ) WHERE "Rang" <= ? ORDER BY "Sirovina", "Rang"
+    """, database, params=params + [top_n])
+    # Rounded by pandas, like person_averages, because SQLite's ROUND rounds some halves differently.
+    ranking["Brzina"] = ranking["Brzina"].round(2)
+    return ranking
+
+def compare_periods(first_from, first_to, second_from, second_to, workers: list = None, materials: list = None) -> tuple:
+    """Compares the average speeds of workers and processes in two date ranges.
+
+    Each range is loaded with load_report_aggregates, so whole months are read from the
+    monthly summary rows and other ranges only from the rows of Brzina_Radnika in that range.
+
+    Args:
+        first_from: The first day of the first range, inclusive.
+        first_to: The last day of the first range, inclusive.
+        second_from: The first day of the second range, inclusive.
+        second_to: The last day of the second range, inclusive.
+        workers (list, optional): Only these workers are compared. Defaults to None, which compares all workers.
+        materials (list, optional): Only these processes are compared. Defaults to None, which compares all processes.
+
+    Returns:
+        tuple: The per-worker comparison and the per-process comparison (see period_differences).
+    """
+    first_aggregate, first_total = load_report_aggregates(workers, materials, first_from, first_to)
+    second_aggregate, second_total = load_report_aggregates(workers, materials, second_from, second_to)
+
+    return compare_aggregates(first_aggregate, first_total, second_aggregate, second_total)
+
+def load_report_rows(workers: list = None, materials: list = None, date_from=None, date_to=None) -> pd.DataFrame:
+    """Loads the production rows the time-based report sections are calculated from.
+
+    Without filters the rows come from the columnar snapshot. With filters only the
+    matching rows are read from SQLite and converted to the same compact form.
+
+    Args:
+        workers (list, optional): Only rows of these workers are loaded. Defaults to None.
+        materials (list, optional): Only rows of these processes are loaded. Defaults to None.
+        date_from (optional): The first day of the date range, inclusive. Defaults to None.
+        date_to (optional): The last day of the date range, inclusive. Defaults to None.
+
+    Returns:
+        pd.DataFrame: Rows with a datetime 'Datum', categorical 'Ime' and 'Sirovina' and a float 'Brzina'.
+    """
+    if workers is None and materials is None and date_from is None and date_to is None:
+        data = load_production_data(SOURCE_TABLE)
+    else:
+        data = pull_data_from_database(SOURCE_TABLE, workers, materials, date_from, date_to)
+        if data is not None:
+            data = compact_dataframe(data[[column for column in SNAPSHOT_COLUMNS if column in data.columns]])
+
+    if data is None:
+        return compact_dataframe(pd.DataFrame({column: pd.Series(dtype=object) for column in SNAPSHOT_COLUMNS}))
+    return data
+
+def pull_data_from_database(table_name: str, workers: list = None, materials: list = None, date_from=None, date_to=None):
+
+    """Fetches the data from a specified database table and converts it to a DataFrame.
+
+    Only the rows matching the filters are read; the filters are applied by SQLite.
 
     Args:
         table_name (str): The name of the database table to retrieve data from.
+        workers (list, optional): Only rows of these workers are read. Defaults to None.
+        materials (list, optional): Only rows of these processes are read. Defaults to None.
+        date_from (optional): The first day of the date range, inclusive. Defaults to None.
+        date_to (optional): The last day of the date range, inclusive. Defaults to None.
 
     Returns:
-        pd.DataFrame: A DataFrame containing all rows from the specified table, 
+        pd.DataFrame: A DataFrame containing the matching rows from the specified table, 
         with columns: "Date", "Name", "Speed", and "Raw material".
     """
 
-    database = create_connection("baza_proizvodnja.db")
-    pull_query = f"SELECT * FROM {table_name}"
-    data = get_all_data(database, pull_query)
+    database = get_connection()
+    where, params = filter_clause(workers, materials, date_from, date_to)
+    pull_query = f"SELECT * FROM {table_name}{where}"
+    with stage("pull", table=table_name) as record:
+        cursor = database.cursor()
+        cursor.execute(pull_query, params)
+        data = cursor.fetchall()
+        cursor.close()
+        record["rows"] = len(data)
     if data:
         columns = get_sql_column_names(database, table_name)
         dataframe = pd.DataFrame(data, columns=columns)
@@ -202,6 +1028,51 @@ def pull_data_from_database(table_name: str):
     else:
         return None
 
+def iter_report_rows(workers: list = None, materials: list = None, date_from=None, date_to=None,
+                     table_name: str = SOURCE_TABLE, batch_size: int = 5000) -> tuple:
+    """Reads the matching rows of a table in batches, without loading them all at once.
+
+    The bookkeeping columns (the fingerprint and the month) are left out and the rows are
+    ordered by date, so they can be written straight into an appendix.
+
+    Args:
+        workers (list, optional): Only rows of these workers are read. Defaults to None.
+        materials (list, optional): Only rows of these processes are read. Defaults to None.
+        date_from (optional): The first day of the date range, inclusive. Defaults to None.
+        date_to (optional): The last day of the date range, inclusive. Defaults to None.
+        table_name (str, optional): The table the rows are read from. Defaults to SOURCE_TABLE.
+        batch_size (int, optional): The number of rows fetched at a time. Defaults to 5000.
+
+    Returns:
+        tuple: The list of column names and a generator of row batches, each a list of tuples.
+    """
+    database = get_connection()
+    if not table_exists(database, table_name):
+        return [], iter(())
+
+    columns = [column for column in get_sql_column_names(database, table_name) if column not in (FINGERPRINT_COLUMN, PARTITION_COLUMN)]
+    order = f' ORDER BY "{DATE_COLUMN}", rowid' if DATE_COLUMN in columns else " ORDER BY rowid"
+    where, params = filter_clause(workers, materials, date_from, date_to)
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    query = f'SELECT {column_list} FROM "{table_name}"{where}{order}'
+
+    def batches():
+        with stage("pull.batches", table=table_name) as record:
+            cursor = database.cursor()
+            try:
+                cursor.execute(query, params)
+                record["rows"] = 0
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    record["rows"] += len(batch)
+                    yield batch
+            finally:
+                cursor.close()
+
+    return columns, batches()
+
 def calculate_difference(df:pd.DataFrame) -> pd.DataFrame:
     """
     Calculates the difference between the worker-specific average speed 
@@ -224,17 +1095,9 @@ def calculate_difference(df:pd.DataFrame) -> pd.DataFrame:
             - "Difference": The difference between the worker's speed and the process average.
             - "Difference %": The percentage difference relative to the worker's speed.
     """
-    process_average = averages_per_process(df)
-    worker_average = averages_per_person(df)
-    
+    aggregate = aggregate_speeds(df)
 
-    merged_df = pd.merge(worker_average, process_average, on="Sirovina")
-    merged_df['Difference'] = (merged_df['Brzina_x'] - merged_df['Brzina_y']).round(2)
-    merged_df["Difference %"] = ((merged_df["Difference"]/merged_df["Brzina_y"])*100).round(2)
-    merged_df = merged_df.rename(columns={"Brzina_x": "Brzina" ,"Brzina_y": "Prosječna brzina"})
-    result_df = merged_df[['Ime', 'Sirovina', "Prosječna brzina","Brzina",'Difference', "Difference %"]]
-    
-    return result_df
+    return worker_differences(person_averages(aggregate), process_averages(aggregate))
             
 def standard_deviation_per_process(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -253,40 +1116,123 @@ def standard_deviation_per_process(df: pd.DataFrame) -> pd.DataFrame:
         pd.Series: A pandas Series where the index corresponds to the unique values in the "Sirovina" column,
         and the values are the standard deviations of the "Brzina" column within each group.
     """
-    return df.groupby("Sirovina")["Brzina"].std()
+    return process_standard_deviations(aggregate_speeds(df))
 
-def sort_workers(df: pd.DataFrame, ascending: bool) -> pd.DataFrame:
-    df_average = averages_per_person(df)
-    process_dfs = {process: group.sort_values(by="Brzina", ascending=ascending) for process, group in df_average.groupby("Sirovina")}    
-    
-    return process_dfs
+def sort_workers(df: pd.DataFrame, ascending: bool, top_n: int = None) -> pd.DataFrame:
+    return workers_by_process(averages_per_person(df), ascending, top_n)
 
-def generate_report(checkbox1_state: int, checkbox2_state: int, checkbox3_state: int, checkbox4_state: int, checkbox5_state: int, checkbox6_state: int):
-    
-    data = pull_data_from_database("Brzina_Radnika")
+def build_report_data(states: list, aggregate: pd.DataFrame, process_total: pd.DataFrame, load_rows, compare=None, section=None,
+                      top_n: int = None) -> dict:
+    """Calculates the sections of a report from its aggregates.
+
+    Chart sections are the paths of PNG files, every other section is a DataFrame or a Series.
+
+    Args:
+        states (list): The states of the ten report checkboxes, 1 for a section that is included.
+        aggregate (pd.DataFrame): The per-worker aggregate (see aggregate_speeds).
+        process_total (pd.DataFrame): The per-process totals (see process_totals).
+        load_rows (callable): Returns the production rows. Only called when a time-based section is included.
+        compare (callable, optional): Returns the per-worker and per-process period comparison.
+            Defaults to None, which leaves the comparison out.
+        section (callable, optional): Called with the name of a section and a function computing it,
+            for example to cache it. Defaults to None, which computes every section directly.
+        top_n (int, optional): The number of workers per process in the fastest and slowest sections.
+            Defaults to None, which lists all workers.
+
+    Returns:
+        dict: The report sections in the order they are written, keyed by their headings.
+    """
+    section = (lambda name, compute: compute()) if section is None else section
+    states = list(states) + [0] * (10 - len(states))
+
+    person_average = section("Prosjek po osobi", lambda: person_averages(aggregate))
+    process_average = section("Prosjek po procesu", lambda: process_averages(process_total))
     data_dict = {}
 
-    if checkbox1_state == 1:
-        data_dict["Prosjek po osobi"] = averages_per_person(data)
-    if checkbox2_state == 1:
-        data_dict["Prosjek po procesu"] = averages_per_process(data)
-    if checkbox3_state == 1:
-        data_dict["Odstupanje radnika od prosjeka"] = calculate_difference(data)
-    if checkbox4_state == 1:
-        data_dict["Standardna devijacija po procesu"] = standard_deviation_per_process(data)
-    if checkbox5_state == 1:
-       process_dict =  sort_workers(data, False)
+    if states[0] == 1:
+        data_dict["Prosjek po osobi"] = person_average
+    if states[1] == 1:
+        data_dict["Prosjek po procesu"] = process_average
+    if states[2] == 1:
+        data_dict["Odstupanje radnika od prosjeka"] = section("Odstupanje radnika od prosjeka", lambda: worker_differences(person_average, process_average))
+    if states[3] == 1:
+        data_dict["Standardna devijacija po procesu"] = section("Standardna devijacija po procesu", lambda: process_standard_deviations(process_total))
+    if states[4] == 1:
+       process_dict =  section("najbrži", lambda: workers_by_process(person_average, False, top_n))
 
        for process, process_df in process_dict.items():
            data_dict[f"{process} - najbrži"] = process_df[["Ime", "Sirovina", "Brzina"]]
 
-    if checkbox6_state == 1:
+    if states[5] == 1:
 
-        process_dict =  sort_workers(data, True)
+        process_dict =  section("najsporiji", lambda: workers_by_process(person_average, True, top_n))
 
         for process, process_df in process_dict.items():
            data_dict[f"{process} - najsporiji"] = process_df[["Ime", "Sirovina", "Brzina"]]
 
-    create_document(data_dict)
+    if 1 in states[6:9]:
+        rows = section("rows", load_rows)
+
+    if states[6] == 1:
+        data_dict["Prosjeci po mjesecima - radnici"] = section("Prosjeci po mjesecima - radnici", lambda: monthly_averages_per_worker(rows))
+        data_dict["Prosjeci po mjesecima - procesi"] = section("Prosjeci po mjesecima - procesi", lambda: monthly_averages_per_process(rows))
+    if states[7] == 1:
+        data_dict["Pomični prosjek radnika (30 dana)"] = section("Pomični prosjek radnika (30 dana)", lambda: latest_rolling_averages(rows))
+    if states[8] == 1:
+        data_dict["Napredak radnika"] = section("Napredak radnika", lambda: worker_trends(rows))
+
+    if states[9] == 1:
+        charts = section("Grafovi", lambda: report_charts(person_average, process_average, process_standard_deviations(process_total)))
+        for (_, title, _), path in zip(charts, render_charts(charts)):
+            data_dict[title] = path
+
+    if compare is not None:
+        per_worker, per_process = section("Usporedba razdoblja", compare)
+        data_dict["Usporedba razdoblja - radnici"] = per_worker
+        data_dict["Usporedba razdoblja - procesi"] = per_process
+
+    return data_dict
+
+def generate_report(checkbox1_state: int, checkbox2_state: int, checkbox3_state: int, checkbox4_state: int, checkbox5_state: int, checkbox6_state: int,
+                    checkbox7_state: int = 0, checkbox8_state: int = 0, checkbox9_state: int = 0, checkbox10_state: int = 0, workers: list = None, materials: list = None, date_from=None, date_to=None,
+                    compare_from=None, compare_to=None, output_path: str = "test.docx", created_at=None, progress=None, raw_appendix: bool = False,
+                    top_n: int = None) -> str:
     
-  
\ No newline at end of file
+    filters = {"workers": workers, "materials": materials, "date_from": date_from, "date_to": date_to,
+               "compare_from": compare_from, "compare_to": compare_to, "top_n": top_n}
+    version = get_data_version(get_connection(), SOURCE_TABLE)
+
+    def section(name, compute):
+        return report_cache.get_or_compute(version, name, filters, compute)
+
+    with stage("report", output_path=output_path) as record:
+        with stage("report.aggregates") as aggregates:
+            aggregate, process_total = section("aggregates", lambda: load_report_aggregates(workers, materials, date_from, date_to))
+            aggregates["rows"] = len(aggregate)
+        if progress is not None:
+            progress(1, 3)
+
+        compare = None
+        if compare_from is not None or compare_to is not None:
+            compare = lambda: compare_periods(date_from, date_to, compare_from, compare_to, workers, materials)
+
+        with stage("report.sections") as sections:
+            data_dict = build_report_data(
+                [checkbox1_state, checkbox2_state, checkbox3_state, checkbox4_state, checkbox5_state, checkbox6_state, checkbox7_state, checkbox8_state, checkbox9_state, checkbox10_state],
+                aggregate, process_total,
+                lambda: load_report_rows(workers, materials, date_from, date_to),
+                compare, section, top_n,
+            )
+            sections["sections"] = len(data_dict)
+        # The last point where a cancel stops the report, so a report that was written is never reported as cancelled.
+        if progress is not None:
+            progress(2, 3)
+
+        from export import export_report
+        with stage("report.render") as render:
+            render["rows"] = sum(len(value) for value in data_dict.values() if not isinstance(value, str))
+            appendix = iter_report_rows(workers, materials, date_from, date_to) if raw_appendix else None
+            export_report(data_dict, output_path, created_at, appendix)
+        record["rows"] = render["rows"]
+
+    return output_path
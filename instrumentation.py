@@ -0,0 +1,227 @@
+import cProfile
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:
+    resource = None
+import DB_manager
+
+LOG_DIR = "logs"
+LOG_FILE = "instrumentation.jsonl"
+PROFILE_DIR = "profiles"
+
+_settings = {
+    "enabled": True,
+    "trace_memory": False,
+    "log_path": None,
+    "max_bytes": 5 * 1024 * 1024,
+    "backup_count": 3,
+    "profile": set(),
+}
+_logger = None
+_logger_lock = threading.Lock()
+_local = threading.local()
+_profiling = threading.Lock()
+_tracing = {"stages": 0}
+_tracing_lock = threading.Lock()
+
+def configure_instrumentation(enabled: bool = None, trace_memory: bool = None, log_path: str = None,
+                              max_bytes: int = None, backup_count: int = None, profile=None):
+    """
+    Changes what the stage instrumentation records and where.
+
+    Args:
+        enabled (bool, optional): Whether stages are timed and logged at all.
+        trace_memory (bool, optional): Whether the peak memory of every stage is measured with tracemalloc.
+            Off by default, because tracing makes ingest several times slower.
+        log_path (str, optional): The JSON-lines file the stages are written to.
+            Defaults to logs/instrumentation.jsonl next to the database.
+        max_bytes (int, optional): The size at which the log file is rotated.
+        backup_count (int, optional): The number of rotated log files that are kept.
+        profile (optional): The names of the stages that are run under cProfile, or "*" for every stage.
+            An empty list turns profiling off.
+
+    Arguments that are None keep their current value.
+    """
+    global _logger
+
+    for name, value in (("enabled", enabled), ("trace_memory", trace_memory), ("log_path", log_path),
+                        ("max_bytes", max_bytes), ("backup_count", backup_count)):
+        if value is not None:
+            _settings[name] = value
+    if profile is not None:
+        _settings["profile"] = {profile} if isinstance(profile, str) else set(profile)
+
+    with _logger_lock:
+        if _logger is not None:
+            for handler in list(_logger.handlers):
+                _logger.removeHandler(handler)
+                handler.close()
+            _logger = None
+
+    if not _settings["trace_memory"] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def _output_path(directory: str, file_name: str) -> str:
+    """
+    Returns a path in a directory next to the database file.
+
+    Args:
+        directory (str): The name of the directory, which is created if needed.
+        file_name (str): The name of the file.
+
+    Returns:
+        str: The path of the file.
+    """
+    directory = os.path.join(os.path.dirname(os.path.abspath(DB_manager.DATABASE)), directory)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, file_name)
+
+def _get_logger() -> logging.Logger:
+    """
+    Returns the logger that writes stage records to the rotating JSON-lines file.
+
+    Returns:
+        logging.Logger: The logger, created on the first call.
+    """
+    global _logger
+
+    with _logger_lock:
+        if _logger is None:
+            path = _settings["log_path"] or _output_path(LOG_DIR, LOG_FILE)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=_settings["max_bytes"], backupCount=_settings["backup_count"], encoding="utf-8", delay=True,
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _logger = logging.getLogger("PRA.instrumentation")
+            _logger.setLevel(logging.INFO)
+            _logger.propagate = False
+            _logger.addHandler(handler)
+        return _logger
+
+def _peak_rss() -> int:
+    """
+    Returns the largest resident memory of the process so far.
+
+    Returns:
+        int: The peak resident set size in bytes, or None where the resource module is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _should_profile(name: str) -> bool:
+
+    return "*" in _settings["profile"] or name in _settings["profile"]
+
+@contextmanager
+def stage(name: str, **details):
+    """
+    Measures a stage of ingest or report generation and writes it to the instrumentation log.
+
+    The wall time, the peak resident memory of the process and the values set on the yielded
+    record are logged as one JSON line when the stage ends, also if it raised. Stages can be
+    nested; the record of a nested stage names its parent. With memory tracing turned on, the
+    peak memory allocated during the stage is measured with tracemalloc as well. It is measured
+    for the whole process, so stages running at the same time in other threads are included
+    in it. Stages selected with configure_instrumentation(profile=...) are run under cProfile
+    and the profile is saved to the profiles directory next to the database.
+
+    Args:
+        name (str): The name of the stage, for example "ingest.store".
+        **details: Additional values written to the record, such as a file path.
+
+    Yields:
+        dict: The record of the stage. Set record["rows"] to log how many rows it processed.
+    """
+    record = {"stage": name, **details}
+    if not _settings["enabled"]:
+        yield record
+        return
+
+    stack = _local.__dict__.setdefault("stack", [])
+    if stack:
+        record["parent"] = stack[-1]["record"]["stage"]
+
+    trace_memory = _settings["trace_memory"]
+    if trace_memory:
+        with _tracing_lock:
+            _tracing["stages"] += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        if stack:
+            stack[-1]["peak"] = max(stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    frame = {"record": record, "peak": 0, "start_memory": tracemalloc.get_traced_memory()[0] if trace_memory else 0}
+    stack.append(frame)
+
+    profiler = None
+    if _should_profile(name) and _profiling.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    started_at = datetime.datetime.now()
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as exception:
+        record["error"] = type(exception).__name__
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 6)
+        if profiler is not None:
+            profiler.disable()
+            path = _output_path(PROFILE_DIR, f"{name}-{started_at:%Y%m%d-%H%M%S-%f}.prof")
+            profiler.dump_stats(path)
+            record["profile"] = path
+            _profiling.release()
+
+        stack.pop()
+        if trace_memory and tracemalloc.is_tracing():
+            peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+            record["peak_memory_bytes"] = max(peak - frame["start_memory"], 0)
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+        if trace_memory:
+            with _tracing_lock:
+                _tracing["stages"] -= 1
+                if _tracing["stages"] == 0 and tracemalloc.is_tracing():
+                    tracemalloc.stop()
+
+        peak_rss = _peak_rss()
+        if peak_rss is not None:
+            record["process_peak_rss_bytes"] = peak_rss
+        record["time"] = started_at.isoformat(timespec="milliseconds")
+        record["thread"] = threading.current_thread().name
+        try:
+            _get_logger().info(json.dumps(record, default=str, ensure_ascii=False))
+        except OSError:
+            pass
+
+def read_stage_log(path: str = None) -> list:
+    """
+    Reads the records written by stage.
+
+    Args:
+        path (str, optional): The log file. Defaults to the current log file.
+
+    Returns:
+        list: The records as dictionaries, oldest first. Rotated files are not read.
+    """
+    path = path or _settings["log_path"] or _output_path(LOG_DIR, LOG_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
@@ -1,4 +1,9 @@
-from UI import app
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from cli import main
+        sys.exit(main())
+
+    from UI import app
     app()
@@ -0,0 +1,150 @@
+import os
+import pandas as pd
+import DB_manager
+from DB_manager import *
+from summaries import SOURCE_TABLE, rebuild_summary_tables
+
+PARTITION_COLUMN = "Mjesec"
+ARCHIVE_PREFIX = "arhiva_"
+ARCHIVE_SCHEMA = "arhiva"
+
+def partition_keys(dates: pd.Series) -> pd.Series:
+    """
+    Returns the month partition of every stored date.
+
+    Args:
+        dates (pd.Series): Dates in the "YYYY-MM-DD HH:MM:SS" text form used in the database.
+
+    Returns:
+        pd.Series: The months in "YYYY-MM" form, or None for missing dates.
+    """
+    return dates.str[:7]
+
+def ensure_partition_column(connection: sqlite3.Connection, table_name: str, date_column: str = "Datum"):
+    """
+    Adds the month partition column to a table and indexes it.
+
+    Rows stored before the column existed get their month from the date column once.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+        date_column (str, optional): The name of the date column. Defaults to "Datum".
+    """
+    columns = get_sql_column_names(connection, table_name)
+    if date_column not in columns:
+        return
+
+    if PARTITION_COLUMN not in columns:
+        add_column(connection, table_name, PARTITION_COLUMN, "TEXT")
+        connection.execute(f'UPDATE "{table_name}" SET "{PARTITION_COLUMN}" = substr("{date_column}", 1, 7)')
+        connection.commit()
+
+    create_index(connection, table_name, [PARTITION_COLUMN])
+
+def list_partitions(connection: sqlite3.Connection, table_name: str) -> pd.DataFrame:
+    """
+    Lists the month partitions of a table.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Mjesec' and 'Broj redaka', ordered by month.
+    """
+    return pd.read_sql(
+        f'SELECT "{PARTITION_COLUMN}", COUNT(*) AS "Broj redaka" FROM "{table_name}" '
+        f'WHERE "{PARTITION_COLUMN}" IS NOT NULL GROUP BY "{PARTITION_COLUMN}" ORDER BY "{PARTITION_COLUMN}"',
+        connection,
+    )
+
+def archive_path() -> str:
+    """
+    Returns the path of the archive database of the configured database.
+
+    The archive is kept next to the database and named after it with ARCHIVE_PREFIX in place
+    of a "baza_" prefix, so baza_proizvodnja.db is archived to arhiva_proizvodnja.db and two
+    databases in the same directory never share an archive.
+
+    Returns:
+        str: The path of the archive database file.
+    """
+    database = os.path.abspath(DB_manager.DATABASE)
+    name = os.path.basename(database)
+    return os.path.join(os.path.dirname(database), ARCHIVE_PREFIX + name.removeprefix("baza_"))
+
+def archived_values(table_name: str, column_name: str, values: list, archive_file: str = None) -> set:
+    """
+    Returns the subset of the given values that is stored in a column of an archived table.
+
+    The column is indexed in the archive on the first lookup, so later lookups cost as much
+    as get_existing_values on the main table.
+
+    Args:
+        table_name (str): The name of the table.
+        column_name (str): The name of the searched column.
+        values (list): The values to look up.
+        archive_file (str, optional): The path of the archive database. Defaults to archive_path().
+
+    Returns:
+        set: The values that are in the archive, empty if nothing was archived.
+    """
+    archive_file = archive_path() if archive_file is None else archive_file
+    if not values or not os.path.exists(archive_file):
+        return set()
+
+    archive = get_connection(archive_file)
+    if not table_exists(archive, table_name) or column_name not in get_sql_column_names(archive, table_name):
+        return set()
+    create_index(archive, table_name, [column_name])
+    return get_existing_values(archive, table_name, column_name, values)
+
+def archive_partitions(before_month: str, table_name: str = "Brzina_Radnika", archive_file: str = None) -> int:
+    """
+    Moves every month partition older than before_month into the archive database.
+
+    The rows are copied into a table with the same name in the archive database and deleted
+    from the main table through the partition index, so the rest of the table is not rewritten.
+    The freed pages are reused by later uploads. Archived months are left out of every report:
+    when rows of Brzina_Radnika are moved, its summary tables are rebuilt in the same transaction,
+    so all-time and whole-month reports agree with the reports that read the rows themselves,
+    and with any later rebuild.
+
+    Args:
+        before_month (str): The first month that is kept, in "YYYY-MM" form.
+        table_name (str, optional): The name of the table. Defaults to "Brzina_Radnika".
+        archive_file (str, optional): The path of the archive database. Defaults to archive_path().
+
+    Returns:
+        int: The number of rows that were moved.
+    """
+    database = get_connection()
+    if not table_exists(database, table_name) or PARTITION_COLUMN not in get_sql_column_names(database, table_name):
+        return 0
+
+    archive_file = archive_path() if archive_file is None else archive_file
+    columns = ", ".join(f'"{column}"' for column in get_sql_column_names(database, table_name))
+
+    database.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (archive_file,))
+    try:
+        with transaction(database):
+            database.execute(f'CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}."{table_name}" AS SELECT {columns} FROM main."{table_name}" WHERE 0')
+            for column in get_sql_column_names(database, table_name):
+                if column not in [row[1] for row in database.execute(f'PRAGMA {ARCHIVE_SCHEMA}.table_info("{table_name}")')]:
+                    database.execute(f'ALTER TABLE {ARCHIVE_SCHEMA}."{table_name}" ADD COLUMN "{column}"')
+
+            database.execute(
+                f'INSERT INTO {ARCHIVE_SCHEMA}."{table_name}" ({columns}) '
+                f'SELECT {columns} FROM main."{table_name}" WHERE "{PARTITION_COLUMN}" < ?',
+                (before_month,),
+            )
+            moved = database.execute(f'DELETE FROM main."{table_name}" WHERE "{PARTITION_COLUMN}" < ?', (before_month,)).rowcount
+            if moved:
+                bump_data_version(database, table_name)
+                if table_name == SOURCE_TABLE:
+                    rebuild_summary_tables(database)
+    finally:
+        database.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+
+    return moved
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+from aggregation import person_averages
+from functions import load_report_aggregates
+
+def speed_matrix(person_average: pd.DataFrame) -> pd.DataFrame:
+    """
+    Arranges the per-person averages as a matrix of workers and processes.
+
+    Args:
+        person_average (pd.DataFrame): The result of person_averages.
+
+    Returns:
+        pd.DataFrame: The average 'Brzina' of every worker (rows, 'Ime') on every process (columns, 'Sirovina'),
+        NaN where the worker has not worked on the process.
+    """
+    return person_average.pivot_table(index="Ime", columns="Sirovina", values="Brzina", aggfunc="first", observed=True)
+
+def _hungarian(cost: np.ndarray) -> tuple:
+    """
+    Solves the assignment problem with the Hungarian algorithm (shortest augmenting paths).
+
+    Every row is added with one shortest path search, in which the reduced costs of all
+    columns are updated at once with NumPy, so the Python loop runs once per column on the
+    path and not once per cell. When several columns are equally close a free one is taken,
+    which ends the search early for the identical columns of a process with several places.
+    Used when SciPy is not installed.
+
+    Args:
+        cost (np.ndarray): A finite cost matrix with no more rows than columns.
+
+    Returns:
+        tuple: The row indices and the column index assigned to each of them, like linear_sum_assignment.
+    """
+    rows, columns = cost.shape
+    row_potential = np.zeros(rows)
+    column_potential = np.zeros(columns)
+    row_for_column = np.full(columns, -1, dtype=np.int64)
+    column_for_row = np.full(rows, -1, dtype=np.int64)
+
+    for current in range(rows):
+        shortest = np.full(columns, np.inf)
+        path = np.full(columns, -1, dtype=np.int64)
+        visited = np.zeros(columns, dtype=bool)
+        visited_rows = []
+        distance = 0.0
+        row = current
+        while True:
+            visited_rows.append(row)
+            reduced = distance + cost[row] - row_potential[row] - column_potential
+            better = ~visited & (reduced < shortest)
+            path[better] = row
+            shortest[better] = reduced[better]
+
+            candidates = np.where(visited, np.inf, shortest)
+            distance = candidates.min()
+            closest = np.flatnonzero(candidates == distance)
+            free = closest[row_for_column[closest] < 0]
+            column = free[0] if len(free) else closest[0]
+            visited[column] = True
+            if row_for_column[column] < 0:
+                break
+            row = row_for_column[column]
+
+        row_potential[current] += distance
+        previous_rows = np.array(visited_rows[1:], dtype=np.int64)
+        row_potential[previous_rows] += distance - shortest[column_for_row[previous_rows]]
+        column_potential[visited] -= distance - shortest[visited]
+
+        while True:
+            row = path[column]
+            row_for_column[column] = row
+            column, column_for_row[row] = column_for_row[row], column
+            if row == current:
+                break
+
+    return np.arange(rows), column_for_row
+
+def solve_assignment(cost: np.ndarray) -> tuple:
+    """
+    Finds the assignment of rows to columns with the lowest total cost.
+
+    Uses SciPy's linear_sum_assignment when it is installed and _hungarian otherwise.
+    The matrix can be rectangular; every row or every column is assigned, whichever is fewer.
+
+    Args:
+        cost (np.ndarray): A finite cost matrix.
+
+    Returns:
+        tuple: The row indices and the column index assigned to each of them.
+    """
+    cost = np.asarray(cost, dtype="float64")
+    if cost.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(cost)
+    if cost.shape[0] > cost.shape[1]:
+        columns, rows = _hungarian(cost.T)
+        order = np.argsort(rows)
+        return rows[order], columns[order]
+    return _hungarian(cost)
+
+def assign_workers(speeds: pd.DataFrame, capacity, available: list = None) -> pd.DataFrame:
+    """
+    Assigns workers to processes so that the total expected speed is as high as possible.
+
+    Every worker is assigned to at most one process and every process gets at most its
+    capacity of workers. A worker is only assigned to a process they have an average speed on.
+    As many places as possible are filled first, and among those plans the one with the
+    highest total speed is chosen. A process with a capacity of n is solved as n identical
+    columns, so the problem stays a plain assignment problem.
+
+    Args:
+        speeds (pd.DataFrame): The result of speed_matrix.
+        capacity: The number of workers every process needs: a dict or Series keyed by process,
+            or a single number for all processes in speeds. Processes not in it get no workers.
+        available (list, optional): The workers that can be assigned, a worker listed more than once is still
+            assigned once. Defaults to None, which uses all workers in speeds.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Sirovina', 'Ime' and 'Brzina', one row per place, ordered by process
+        and speed. Places that could not be filled have no 'Ime' and no 'Brzina'.
+    """
+    if not isinstance(capacity, (dict, pd.Series)):
+        capacity = {process: capacity for process in speeds.columns}
+    capacity = {process: int(places) for process, places in dict(capacity).items() if int(places) > 0}
+
+    if available is None:
+        workers = speeds.index
+    else:
+        workers = pd.Index(list(dict.fromkeys(worker for worker in available if worker in speeds.index)))
+    processes = list(capacity)
+    values = speeds.reindex(index=workers, columns=processes).to_numpy(dtype="float64")
+
+    places = np.repeat(np.arange(len(processes)), [capacity[process] for process in processes])
+    known = ~np.isnan(values[:, places])
+    if known.any():
+        finite = values[~np.isnan(values)]
+        # A place filled with an unknown pair costs more than any plan can gain from speed.
+        penalty = (np.abs(finite).max() + 1) * (min(len(workers), len(places)) + 1)
+    else:
+        penalty = 1.0
+    cost = np.where(known, -np.nan_to_num(values[:, places]), penalty)
+
+    rows, columns = solve_assignment(cost)
+    keep = known[rows, columns]
+    rows, columns = rows[keep], columns[keep]
+
+    filled = np.bincount(places[columns], minlength=len(processes))
+    empty = np.repeat(np.arange(len(processes)), np.bincount(places, minlength=len(processes)) - filled)
+    process = np.concatenate([places[columns], empty])
+    speed = np.concatenate([values[rows, places[columns]], np.full(len(empty), np.nan)])
+    names = np.array(workers[rows].tolist() + [None] * len(empty), dtype=object)
+    order = np.lexsort((np.nan_to_num(-speed, nan=np.inf), process))
+    return pd.DataFrame({
+        "Sirovina": [processes[place] for place in process[order]],
+        "Ime": names[order],
+        "Brzina": speed[order],
+    })
+
+def plan_production(capacity: dict, workers: list = None, date_from=None, date_to=None) -> pd.DataFrame:
+    """
+    Plans the assignment of workers to processes from their stored average speeds.
+
+    Args:
+        capacity (dict): The number of workers every process needs, keyed by process.
+        workers (list, optional): The workers that are available. Defaults to None, which uses every worker with stored data.
+        date_from (optional): The first day of the date range the averages are calculated from, inclusive. Defaults to None.
+        date_to (optional): The last day of the date range the averages are calculated from, inclusive. Defaults to None.
+
+    Returns:
+        pd.DataFrame: The plan (see assign_workers).
+    """
+    aggregate, _ = load_report_aggregates(workers, list(capacity), date_from, date_to)
+    return assign_workers(speed_matrix(person_averages(aggregate)), capacity, workers)
@@ -0,0 +1,135 @@
+import os
+import threading
+from collections import OrderedDict
+import DB_manager
+
+
+def _size_of(value) -> int:
+    """
+    Estimates the memory used by a cached value.
+
+    Args:
+        value: A DataFrame, a Series, or a tuple, list or dict of them.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    if hasattr(value, "memory_usage"):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if isinstance(value, dict):
+        return sum(_size_of(item) for item in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(_size_of(item) for item in value)
+    return 64
+
+
+def _freeze(value):
+    """
+    Converts a filter value into a hashable, order-independent form.
+
+    Args:
+        value: A filter value, such as a list of workers or a date.
+
+    Returns:
+        A hashable representation of the value.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(str(item) for item in value))
+    return str(value)
+
+
+class ReportCache:
+    """
+    A least recently used cache of computed report sections.
+
+    Entries are keyed by the database file, the data version of the source table, the name of
+    the section and the report filters, so a write to the table makes all older entries
+    unreachable and two databases at the same data version do not share entries. Entries
+    are evicted when there are more than max_entries of them or they use more than max_bytes.
+    Cached values are shared between reports and must not be modified.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, version: int, section: str, filters: dict, compute):
+        """
+        Returns a cached section, computing and storing it on a miss.
+
+        Args:
+            version (int): The data version of the source table in the configured database.
+            section (str): The name of the section.
+            filters (dict): The report filters the section was computed with.
+            compute (callable): Called without arguments to compute the section on a miss.
+
+        Returns:
+            The cached or computed section.
+        """
+        key = (os.path.abspath(DB_manager.DATABASE), version, section,
+               tuple(sorted((name, _freeze(value)) for name, value in filters.items())))
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = _size_of(value)
+
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self._bytes += size
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self._bytes -= evicted_size
+                    self.evictions += 1
+
+        return value
+
+    def invalidate(self, older_than: int = None):
+        """
+        Removes cached sections.
+
+        Args:
+            older_than (int, optional): Only sections of the configured database computed for a data version
+                lower than this are removed. Defaults to None, which removes everything.
+        """
+        database = os.path.abspath(DB_manager.DATABASE)
+        with self._lock:
+            for key in [key for key in self._entries if older_than is None or (key[0] == database and key[1] < older_than)]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def statistics(self) -> dict:
+        """
+        Returns the hit and miss counts of the cache.
+
+        Returns:
+            dict: The number of hits, misses and evictions, the hit rate, and the number
+            and total size of the stored entries.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+report_cache = ReportCache()
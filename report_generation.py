@@ -1,30 +1,101 @@
 from docx import Document
 from docx.shared import Inches
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
 import os
 import pandas as pd
 from docx.enum.section import WD_ORIENTATION
-import datetime 
+import datetime
+import re
+from xml.sax.saxutils import escape
 
-def create_document(dictionary: dict):
+_BREAKS = re.compile(r"([\t\n\r])")
 
+def _run_xml(text: str) -> str:
+    """
+    Builds the XML of a run holding the text, the same way python-docx does when a cell's text is set.
+
+    Tabs become <w:tab/>, line breaks become <w:br/>, and text with leading or trailing
+    whitespace keeps it with xml:space="preserve".
+
+    Args:
+        text (str): The text of the cell.
+
+    Returns:
+        str: The <w:r> element as an XML string.
+    """
+    if not text:
+        return "<w:r/>"
+
+    parts = []
+    for piece in _BREAKS.split(text):
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece in ("\n", "\r"):
+            parts.append("<w:br/>")
+        elif piece:
+            preserve = ' xml:space="preserve"' if piece != piece.strip() else ""
+            parts.append(f"<w:t{preserve}>{escape(piece)}</w:t>")
+
+    return f"<w:r>{''.join(parts)}</w:r>"
+
+def add_dataframe_table(document: Document, dataframe: pd.DataFrame, style: str = "Table Grid"):
+    """
+    Adds a DataFrame to the document as a table with a header row.
+
+    The header row is created through python-docx. All the data rows are built as a single XML
+    fragment straight from the column arrays and appended to the table in one step, so no
+    python-docx row or cell objects are created for them. The resulting table is the same as
+    one filled in with table.add_row() and cell.text.
+
+    Args:
+        document (Document): The document the table is added to.
+        dataframe (pd.DataFrame): The data to be written into the table.
+        style (str, optional): The table style. Defaults to "Table Grid".
+
+    Returns:
+        docx.table.Table: The created table.
+    """
+    table = document.add_table(rows=1, cols=len(dataframe.columns))
+    table.style = style
+
+    hdr_cells = table.rows[0].cells
+    for i, column_name in enumerate(dataframe.columns):
+        hdr_cells[i].text = str(column_name)
+
+    if dataframe.empty:
+        return table
+
+    cell_openings = [
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{cell._tc.tcPr.find(qn("w:tcW")).get(qn("w:w"))}"/></w:tcPr><w:p>'
+        for cell in hdr_cells
+    ]
+    columns = [map(str, dataframe.iloc[:, i].tolist()) for i in range(len(dataframe.columns))]
+
+    rows_xml = "".join(
+        "<w:tr>" + "".join(opening + _run_xml(text) + "</w:p></w:tc>" for opening, text in zip(cell_openings, row)) + "</w:tr>"
+        for row in zip(*columns)
+    )
+    fragment = parse_xml(f"<w:tbl {nsdecls('w')}>{rows_xml}</w:tbl>")
+    table._tbl.extend(list(fragment))
+
+    return table
+
+def create_document(dictionary: dict, output_path: str = "test.docx", created_at: datetime.datetime = None) -> str:
+
+    created_at = datetime.datetime.now() if created_at is None else created_at
     document = Document()
-    document.add_heading(f"Izvještaj prosjeka čišćenja {datetime.datetime.now()}")
-    
+    document.add_heading(f"Izvještaj prosjeka čišćenja {created_at}")
+
     for key, value in dictionary.items():
+        document.add_heading(key, level=2)
+        if isinstance(value, str) and value.lower().endswith(".png"):
+            document.add_picture(value, width=Inches(6))
+            continue
         if isinstance(value, pd.Series):
             value = value.to_frame(name="Values").reset_index()
-        document.add_heading(key, level=2)
-
-        table = document.add_table(rows=1, cols=len(value.columns))
-        table.style = 'Table Grid'
-
-        hdr_cells = table.rows[0].cells
-        for i, column_name in enumerate(value.columns):
-            hdr_cells[i].text = column_name
 
-        for _, row in value.iterrows():
-            row_cells = table.add_row().cells
-            for i, item in enumerate(row):
-                row_cells[i].text = str(item)
+        add_dataframe_table(document, value)
 
-    document.save("test.docx")
\ No newline at end of file
+    document.save(output_path)
+    return output_path
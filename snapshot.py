@@ -0,0 +1,122 @@
+import glob
+import os
+import uuid
+import pandas as pd
+import DB_manager
+from DB_manager import *
+
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_COLUMNS = ["Datum", "Ime", "Sirovina", "Brzina"]
+
+def compact_dataframe(df: pd.DataFrame, speed_dtype: str = "float64") -> pd.DataFrame:
+    """
+    Converts production data into a compact columnar form.
+
+    'Ime' and 'Sirovina' become categoricals, so every name is stored once and the rows only
+    hold small integer codes. 'Brzina' becomes a float of the given precision and 'Datum' a datetime.
+
+    Args:
+        df (pd.DataFrame): Production data as read from the database.
+        speed_dtype (str, optional): "float64" or "float32". Defaults to "float64".
+
+    Returns:
+        pd.DataFrame: The converted DataFrame.
+    """
+    df = df.copy()
+    for column in ("Ime", "Sirovina"):
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    if "Brzina" in df.columns:
+        df["Brzina"] = pd.to_numeric(df["Brzina"], errors="coerce").astype(speed_dtype)
+    if "Datum" in df.columns:
+        df["Datum"] = pd.to_datetime(df["Datum"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    return df
+
+def snapshot_path(table_name: str, version: int, generation: str = "") -> str:
+    """
+    Returns the path of the snapshot of a table at a data version.
+
+    Snapshots are kept in the SNAPSHOT_DIR directory next to the database file, in a
+    subdirectory named after the database file, so two databases in the same directory
+    never share a snapshot, even when their tables are at the same data version. The name
+    also holds the generation of the version counter (see get_data_generation), so a database
+    that was deleted and created again does not reuse the snapshots of the old one.
+
+    Args:
+        table_name (str): The name of the table.
+        version (int): The data version of the table.
+        generation (str, optional): The generation of the version counter. Defaults to "".
+
+    Returns:
+        str: The path of the Feather file.
+    """
+    database = os.path.abspath(DB_manager.DATABASE)
+    directory = os.path.join(os.path.dirname(database), SNAPSHOT_DIR, os.path.basename(database))
+    return os.path.join(directory, f"{table_name}-{generation}-v{version}.feather")
+
+def _read_table(connection: sqlite3.Connection, table_name: str) -> pd.DataFrame:
+    """
+    Reads the snapshot columns of a table from SQLite.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the table.
+
+    Returns:
+        pd.DataFrame: The columns of SNAPSHOT_COLUMNS that exist in the table.
+    """
+    columns = [column for column in SNAPSHOT_COLUMNS if column in get_sql_column_names(connection, table_name)]
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    return pd.read_sql(f'SELECT {column_list} FROM "{table_name}"', connection)
+
+def load_production_data(table_name: str = "Brzina_Radnika", speed_dtype: str = "float64") -> pd.DataFrame:
+    """
+    Loads a production table in compact columnar form, using an on-disk snapshot when possible.
+
+    The first load after a change of the table reads it from SQLite and writes an uncompressed
+    Feather snapshot named after the data version of the table. Later loads memory-map that
+    file instead of reading SQLite row by row. Any write to the table increases its data
+    version, so an outdated snapshot is never used; older snapshot files are removed.
+    Without pyarrow installed the data is always read from SQLite.
+
+    Args:
+        table_name (str, optional): The name of the table. Defaults to "Brzina_Radnika".
+        speed_dtype (str, optional): "float64" or "float32" for the 'Brzina' column. Defaults to "float64".
+
+    Returns:
+        pd.DataFrame: The table with categorical 'Ime' and 'Sirovina', or None if the table does not exist.
+    """
+    database = get_connection()
+    if not table_exists(database, table_name):
+        return None
+
+    version = get_data_version(database, table_name)
+    path = snapshot_path(table_name, version, get_data_generation(database, table_name))
+
+    try:
+        from pyarrow import feather
+    except ImportError:
+        return compact_dataframe(_read_table(database, table_name), speed_dtype)
+
+    if os.path.exists(path):
+        data = feather.read_table(path, memory_map=True).to_pandas()
+        if "Brzina" in data.columns:
+            data["Brzina"] = data["Brzina"].astype(speed_dtype)
+        return data
+
+    data = compact_dataframe(_read_table(database, table_name))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    feather.write_feather(data, temporary_path, compression="uncompressed")
+    os.replace(temporary_path, path)
+
+    for old_path in glob.glob(snapshot_path(table_name, "*", "*")):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    if "Brzina" in data.columns:
+        data["Brzina"] = data["Brzina"].astype(speed_dtype)
+    return data
@@ -0,0 +1,294 @@
+import pandas as pd
+from DB_manager import *
+from aggregation import AGGREGATE_COLUMNS, aggregate_speeds
+from report_cache import report_cache
+
+SOURCE_TABLE = "Brzina_Radnika"
+PERSON_SUMMARY_TABLE = "Zbirno_Radnik_Proces"
+PROCESS_SUMMARY_TABLE = "Zbirno_Proces"
+ALL_TIME = "*"
+
+_SUMMARY_KEYS = {
+    PERSON_SUMMARY_TABLE: ["Ime", "Sirovina", "Mjesec"],
+    PROCESS_SUMMARY_TABLE: ["Sirovina", "Mjesec"],
+}
+
+def create_summary_tables(connection: sqlite3.Connection):
+    """
+    Creates the summary tables if they do not exist yet.
+
+    Both tables hold a running count, sum, sum of squares, minimum and maximum of 'Brzina'.
+    Zbirno_Radnik_Proces is keyed by 'Ime', 'Sirovina' and 'Mjesec', Zbirno_Proces by 'Sirovina'
+    and 'Mjesec'. Rows with 'Mjesec' set to ALL_TIME hold the totals over the whole history,
+    the other rows hold the totals of one month in "YYYY-MM" form.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+    """
+    for table_name, keys in _SUMMARY_KEYS.items():
+        key_columns = ", ".join(f'"{key}" TEXT NOT NULL' for key in keys)
+        create_table(connection, f"""
+            CREATE TABLE IF NOT EXISTS "{table_name}" (
+                {key_columns},
+                "count" INTEGER NOT NULL,
+                "sum" REAL NOT NULL,
+                "sum_sq" REAL NOT NULL,
+                "min" REAL,
+                "max" REAL,
+                PRIMARY KEY ({", ".join(f'"{key}"' for key in keys)})
+            )
+        """)
+
+def _summary_rows(df: pd.DataFrame, keys: list, date_column: str, monthly: bool) -> pd.DataFrame:
+    """
+    Aggregates new rows into the shape of a summary table.
+
+    Args:
+        df (pd.DataFrame): New rows in the form returned by prepare_for_storage.
+        keys (list): The key columns of the summary table.
+        date_column (str): The name of the date column.
+        monthly (bool): Whether per-month rows are produced next to the all-time rows.
+
+    Returns:
+        pd.DataFrame: The aggregated rows, with the key columns followed by AGGREGATE_COLUMNS.
+    """
+    group_keys = [key for key in keys if key != "Mjesec"]
+    df = df.dropna(subset=group_keys)
+    frames = [aggregate_speeds(df, by=group_keys).assign(Mjesec=ALL_TIME)]
+
+    if monthly and date_column in df.columns:
+        dated = df[df[date_column].notna()]
+        dated = dated.assign(Mjesec=dated[date_column].str[:7])
+        frames.append(aggregate_speeds(dated, by=group_keys + ["Mjesec"]))
+
+    return pd.concat(frames, ignore_index=True)[keys + AGGREGATE_COLUMNS]
+
+def update_summary_tables(connection: sqlite3.Connection, df: pd.DataFrame, date_column: str = "Datum", monthly: bool = True):
+    """
+    Adds newly ingested rows to the running totals in the summary tables.
+
+    Only the new rows are aggregated, and each aggregated row is merged into the summary
+    with an upsert, so the cost does not depend on how much history is already stored.
+    Rows with an empty key column are left out of the tables that are keyed by it,
+    the same way rebuild_summary_tables leaves them out.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        df (pd.DataFrame): The rows that were just appended, in the form returned by prepare_for_storage.
+        date_column (str, optional): The name of the date column. Defaults to "Datum".
+        monthly (bool, optional): Whether the per-month totals are updated. Defaults to True.
+    """
+    if df.empty:
+        return
+
+    create_summary_tables(connection)
+
+    for table_name, keys in _SUMMARY_KEYS.items():
+        rows = _summary_rows(df, keys, date_column, monthly)
+        column_list = ", ".join(f'"{column}"' for column in keys + AGGREGATE_COLUMNS)
+        placeholders = ", ".join("?" * len(keys + AGGREGATE_COLUMNS))
+        connection.executemany(f"""
+            INSERT INTO "{table_name}" ({column_list}) VALUES ({placeholders})
+            ON CONFLICT ({", ".join(f'"{key}"' for key in keys)}) DO UPDATE SET
+                "count" = "count" + excluded."count",
+                "sum" = "sum" + excluded."sum",
+                "sum_sq" = "sum_sq" + excluded."sum_sq",
+                "min" = MIN(COALESCE("min", excluded."min"), COALESCE(excluded."min", "min")),
+                "max" = MAX(COALESCE("max", excluded."max"), COALESCE(excluded."max", "max"))
+        """, rows.itertuples(index=False, name=None))
+
+    connection.commit()
+
+def rebuild_summary_tables(connection: sqlite3.Connection = None, date_column: str = "Datum", monthly: bool = True):
+    """
+    Recalculates the summary tables from Brzina_Radnika.
+
+    This is the only operation that reads the whole history. It should be run when the
+    summaries were created from an older database or drifted from the stored rows.
+    Rows with an empty 'Ime' or 'Sirovina' are stored, but not counted in the tables keyed by that column.
+    Rows moved to the archive database by archive_partitions are not counted either.
+    The data version of Brzina_Radnika is increased in the same transaction, so report sections
+    cached from the old summaries are not used again.
+
+    Args:
+        connection (sqlite3.Connection, optional): The connection object to the SQLite database.
+            Defaults to the connection returned by get_connection.
+        date_column (str, optional): The name of the date column. Defaults to "Datum".
+        monthly (bool, optional): Whether the per-month totals are rebuilt as well. Defaults to True.
+    """
+    connection = get_connection() if connection is None else connection
+
+    with transaction(connection):
+        remove_summary_tables(connection)
+        create_summary_tables(connection)
+
+        if not table_exists(connection, SOURCE_TABLE):
+            return
+
+        has_date = date_column in get_sql_column_names(connection, SOURCE_TABLE)
+        aggregates = 'COUNT("Brzina"), TOTAL("Brzina"), TOTAL("Brzina" * "Brzina"), MIN("Brzina"), MAX("Brzina")'
+
+        for table_name, keys in _SUMMARY_KEYS.items():
+            group_keys = ", ".join(f'"{key}"' for key in keys if key != "Mjesec")
+            keys_present = " AND ".join(f'"{key}" IS NOT NULL' for key in keys if key != "Mjesec")
+            connection.execute(f"""
+                INSERT INTO "{table_name}"
+                SELECT {group_keys}, '{ALL_TIME}', {aggregates}
+                FROM "{SOURCE_TABLE}" WHERE {keys_present} GROUP BY {group_keys}
+            """)
+            if monthly and has_date:
+                connection.execute(f"""
+                    INSERT INTO "{table_name}"
+                    SELECT {group_keys}, substr("{date_column}", 1, 7), {aggregates}
+                    FROM "{SOURCE_TABLE}" WHERE {keys_present} AND "{date_column}" IS NOT NULL
+                    GROUP BY {group_keys}, substr("{date_column}", 1, 7)
+                """)
+
+        bump_data_version(connection, SOURCE_TABLE)
+    report_cache.invalidate()
+
+def remove_summary_tables(connection: sqlite3.Connection):
+    """
+    Drops both summary tables.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+    """
+    for table_name in _SUMMARY_KEYS:
+        connection.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+    connection.commit()
+
+def _ensure_summary_tables(connection: sqlite3.Connection):
+    """
+    Builds the summary tables from Brzina_Radnika if they do not exist yet.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+    """
+    if not table_exists(connection, PERSON_SUMMARY_TABLE) or not table_exists(connection, PROCESS_SUMMARY_TABLE):
+        rebuild_summary_tables(connection)
+
+def _summary_query(table_name: str, keys: list, month: str, workers: list, materials: list,
+                   month_from: str, month_to: str) -> tuple:
+    """
+    Builds the query reading filtered rows of a summary table, adding up the months of a month range.
+
+    Args:
+        table_name (str): The name of the summary table.
+        keys (list): The key columns of the result, without 'Mjesec'.
+        month (str): The month that is read when no month range is given.
+        workers (list): Only these workers are read, or all if None.
+        materials (list): Only these processes are read, or all if None.
+        month_from (str): The first month of the range in "YYYY-MM" form, or None.
+        month_to (str): The last month of the range in "YYYY-MM" form, or None.
+
+    Returns:
+        tuple: The SELECT statement, returning the key columns followed by AGGREGATE_COLUMNS, and its parameters.
+    """
+    conditions, params = [], []
+
+    if month_from is None and month_to is None:
+        conditions.append('"Mjesec" = ?')
+        params.append(month)
+    else:
+        conditions.append(f"\"Mjesec\" <> '{ALL_TIME}'")
+        if month_from is not None:
+            conditions.append('"Mjesec" >= ?')
+            params.append(month_from)
+        if month_to is not None:
+            conditions.append('"Mjesec" <= ?')
+            params.append(month_to)
+
+    for column, values in (("Ime", workers), ("Sirovina", materials)):
+        if values is not None and column in keys:
+            condition, values = in_condition(column, values)
+            conditions.append(condition)
+            params.extend(values)
+
+    key_list = ", ".join(f'"{key}"' for key in keys)
+    return f"""
+        SELECT {key_list}, SUM("count") AS "count", SUM("sum") AS "sum", SUM("sum_sq") AS "sum_sq",
+               MIN("min") AS "min", MAX("max") AS "max"
+        FROM "{table_name}" WHERE {" AND ".join(conditions)}
+        GROUP BY {key_list} ORDER BY {key_list}
+    """, params
+
+def _read_summary(connection: sqlite3.Connection, table_name: str, keys: list, month: str,
+                  workers: list, materials: list, month_from: str, month_to: str) -> pd.DataFrame:
+    """
+    Reads filtered rows of a summary table, adding up the months of a month range.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        table_name (str): The name of the summary table.
+        keys (list): The key columns of the result, without 'Mjesec'.
+        month (str): The month that is read when no month range is given.
+        workers (list): Only these workers are read, or all if None.
+        materials (list): Only these processes are read, or all if None.
+        month_from (str): The first month of the range in "YYYY-MM" form, or None.
+        month_to (str): The last month of the range in "YYYY-MM" form, or None.
+
+    Returns:
+        pd.DataFrame: The key columns followed by AGGREGATE_COLUMNS.
+    """
+    _ensure_summary_tables(connection)
+    query, params = _summary_query(table_name, keys, month, workers, materials, month_from, month_to)
+    return pd.read_sql(query, connection, params=params)
+
+def summary_person_aggregate(connection: sqlite3.Connection, month: str = ALL_TIME, workers: list = None,
+                             materials: list = None, month_from: str = None, month_to: str = None) -> pd.DataFrame:
+    """
+    Reads the per-worker and per-process totals from the summary table.
+
+    The result has the same columns as aggregate_speeds, so every report section can be
+    derived from it without reading Brzina_Radnika. The filters are applied in SQLite.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        month (str, optional): A month in "YYYY-MM" form, or ALL_TIME for the whole history. Defaults to ALL_TIME.
+        workers (list, optional): Only these workers are read. Defaults to None, which reads all workers.
+        materials (list, optional): Only these processes are read. Defaults to None, which reads all processes.
+        month_from (str, optional): The first month of a range in "YYYY-MM" form. Overrides month. Defaults to None.
+        month_to (str, optional): The last month of a range in "YYYY-MM" form. Overrides month. Defaults to None.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Ime', 'Sirovina', 'count', 'sum', 'sum_sq', 'min' and 'max'.
+    """
+    return _read_summary(connection, PERSON_SUMMARY_TABLE, ["Ime", "Sirovina"], month, workers, materials, month_from, month_to)
+
+def summary_person_query(connection: sqlite3.Connection, month: str = ALL_TIME, workers: list = None,
+                         materials: list = None, month_from: str = None, month_to: str = None) -> tuple:
+    """
+    Builds the query summary_person_aggregate runs, so it can be used as a subquery.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        month (str, optional): A month in "YYYY-MM" form, or ALL_TIME for the whole history. Defaults to ALL_TIME.
+        workers (list, optional): Only these workers are read. Defaults to None, which reads all workers.
+        materials (list, optional): Only these processes are read. Defaults to None, which reads all processes.
+        month_from (str, optional): The first month of a range in "YYYY-MM" form. Overrides month. Defaults to None.
+        month_to (str, optional): The last month of a range in "YYYY-MM" form. Overrides month. Defaults to None.
+
+    Returns:
+        tuple: The SELECT statement and its parameters.
+    """
+    _ensure_summary_tables(connection)
+    return _summary_query(PERSON_SUMMARY_TABLE, ["Ime", "Sirovina"], month, workers, materials, month_from, month_to)
+
+def summary_process_totals(connection: sqlite3.Connection, month: str = ALL_TIME, materials: list = None,
+                           month_from: str = None, month_to: str = None) -> pd.DataFrame:
+    """
+    Reads the per-process totals from the summary table.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+        month (str, optional): A month in "YYYY-MM" form, or ALL_TIME for the whole history. Defaults to ALL_TIME.
+        materials (list, optional): Only these processes are read. Defaults to None, which reads all processes.
+        month_from (str, optional): The first month of a range in "YYYY-MM" form. Overrides month. Defaults to None.
+        month_to (str, optional): The last month of a range in "YYYY-MM" form. Overrides month. Defaults to None.
+
+    Returns:
+        pd.DataFrame: A DataFrame indexed by 'Sirovina' with columns 'count', 'sum', 'sum_sq', 'min' and 'max'.
+    """
+    totals = _read_summary(connection, PROCESS_SUMMARY_TABLE, ["Sirovina"], month, None, materials, month_from, month_to)
+    return totals.set_index("Sirovina")
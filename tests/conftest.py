@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import DB_manager
+import error
+from report_cache import report_cache
+
+
+@pytest.fixture
+def messages():
+    """Collects the error and info messages instead of showing message boxes."""
+    shown = []
+    error.set_handler(lambda title, text: shown.append((title, text)))
+    yield shown
+    error.set_handler(None)
+
+
+@pytest.fixture
+def database(tmp_path, messages):
+    """Points get_connection at an empty database in a temporary directory."""
+    original = DB_manager.DATABASE
+    path = str(tmp_path / "baza_proizvodnja.db")
+    DB_manager.configure_database(path)
+    report_cache.invalidate()
+    yield path
+    DB_manager.close_connections()
+    DB_manager.configure_database(original)
+    report_cache.invalidate()
+
+
+def production_rows(rows: list) -> pd.DataFrame:
+    """Builds production data from (date, worker, process, speed) tuples."""
+    return pd.DataFrame(rows, columns=["Datum", "Ime", "Sirovina", "Brzina"])
+
+
+@pytest.fixture
+def sample_rows() -> pd.DataFrame:
+    return production_rows([
+        ("2024-01-10 06:00:00", "Ana", "Sirovina 01", 100.0),
+        ("2024-01-10 14:00:00", "Ivan", "Sirovina 01", 80.0),
+        ("2024-01-11 06:00:00", "Ana", "Sirovina 02", 50.0),
+        ("2024-02-05 06:00:00", "Ivan", "Sirovina 02", 70.0),
+        ("2024-02-06 06:00:00", "Marko", "Sirovina 01", 90.0),
+        ("2024-03-01 06:00:00", "Ana", "Sirovina 01", 110.0),
+    ])
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import background
+import export
+import functions
+from background import run_in_background, cancel_job
+from functions import append_data_to_database, generate_report
+
+
+class FakeRoot:
+    """Runs the callbacks scheduled with after, like the Tk mainloop, until none are left."""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, callback):
+        self.scheduled.append(callback)
+
+    def run(self):
+        while self.scheduled:
+            time.sleep(0.01)
+            self.scheduled.pop(0)()
+
+
+def run_report(monkeypatch, export_report, tmp_path) -> list:
+    monkeypatch.setattr(export, "export_report", export_report)
+    closed, outcome = [], []
+    close_connections = background.close_connections
+    monkeypatch.setattr(background, "close_connections", lambda: (closed.append(threading.current_thread().name), close_connections()))
+
+    root = FakeRoot()
+    run_in_background(root, "report", generate_report, 1, 1, 0, 0, 0, 0, output_path=str(tmp_path / "izvjestaj.docx"),
+                      on_done=lambda path: outcome.append(("done", path)),
+                      on_cancel=lambda: outcome.append(("cancelled", None)),
+                      on_error=lambda exception: outcome.append(("error", exception)))
+    root.run()
+    for thread in threading.enumerate():
+        if thread.name == "report":
+            thread.join()
+    assert closed == ["report"]
+    return outcome
+
+
+def test_a_cancel_during_the_write_still_reports_the_written_file(database, monkeypatch, tmp_path, sample_rows):
+    append_data_to_database(sample_rows, "Brzina_Radnika")
+
+    def export_report(data_dict, output_path, created_at=None, appendix=None):
+        cancel_job("report")
+        open(output_path, "w").close()
+
+    assert run_report(monkeypatch, export_report, tmp_path) == [("done", str(tmp_path / "izvjestaj.docx"))]
+
+
+def test_a_cancel_before_the_write_stops_the_report(database, monkeypatch, tmp_path, sample_rows):
+    append_data_to_database(sample_rows, "Brzina_Radnika")
+    written = []
+    build_report_data = functions.build_report_data
+
+    def cancelled_while_building(*args, **kwargs):
+        cancel_job("report")
+        return build_report_data(*args, **kwargs)
+
+    monkeypatch.setattr(functions, "build_report_data", cancelled_while_building)
+
+    assert run_report(monkeypatch, lambda data_dict, output_path, *args: written.append(output_path), tmp_path) == [("cancelled", None)]
+    assert written == []
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from batch_reports import generate_reports, month_end_specs
+from conftest import production_rows
+from functions import append_data_to_database
+
+TABLE = "Brzina_Radnika"
+
+
+def test_month_end_specs_cover_every_worker_and_process(database, sample_rows, tmp_path):
+    append_data_to_database(sample_rows, TABLE)
+
+    specs = month_end_specs("2024-01", str(tmp_path / "izvjestaji"))
+
+    names = [os.path.basename(spec["output_path"]) for spec in specs]
+    assert names == ["2024-01_radnik_Ana.docx", "2024-01_radnik_Ivan.docx",
+                     "2024-01_proces_Sirovina_01.docx", "2024-01_proces_Sirovina_02.docx"]
+    assert specs[0]["workers"] == ["Ana"]
+    assert (specs[0]["date_from"], specs[0]["date_to"]) == ("2024-01-01", "2024-01-31")
+
+
+def test_names_that_give_the_same_file_name_get_a_suffix(database, tmp_path):
+    append_data_to_database(production_rows([
+        ("2024-01-10 06:00:00", "Ana Marić", "Sirovina 01", 100.0),
+        ("2024-01-10 07:00:00", "Ana_Marić", "Sirovina 01", 90.0),
+        ("2024-01-10 08:00:00", "ANA MARIĆ", "Sirovina 01", 80.0),
+    ]), TABLE)
+
+    specs = month_end_specs("2024-01", str(tmp_path))
+    paths = [spec["output_path"] for spec in specs if "workers" in spec]
+
+    assert len({path.casefold() for path in paths}) == 3
+    assert sorted(os.path.basename(path) for path in paths) == [
+        "2024-01_radnik_ANA_MARIĆ.docx", "2024-01_radnik_Ana_Marić_2.docx", "2024-01_radnik_Ana_Marić_3.docx",
+    ]
+
+
+def test_duplicate_output_paths_are_rejected_before_anything_is_written(database, sample_rows, tmp_path):
+    append_data_to_database(sample_rows, TABLE)
+    path = str(tmp_path / "isti.docx")
+
+    with pytest.raises(ValueError):
+        generate_reports([{"output_path": path, "workers": ["Ana"]}, {"output_path": path, "workers": ["Ivan"]}], max_workers=1)
+    assert not os.path.exists(path)
+
+
+def test_batch_writes_every_report(database, sample_rows, tmp_path):
+    append_data_to_database(sample_rows, TABLE)
+    specs = month_end_specs("2024-02", str(tmp_path))
+
+    paths = generate_reports(specs, max_workers=1)
+
+    assert paths == [spec["output_path"] for spec in specs]
+    assert all(os.path.getsize(path) > 0 for path in paths)
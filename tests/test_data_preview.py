@@ -0,0 +1,101 @@
+import pytest
+
+from conftest import production_rows
+from DB_manager import get_connection
+from data_preview import PageWindow
+from functions import append_data_to_database, fetch_preview_page
+
+TABLE = "Brzina_Radnika"
+
+
+@pytest.fixture
+def preview_rows(database):
+    rows = [(f"2024-01-{day:02d} 06:00:00", f"Radnik {number % 4}", f"Sirovina {number % 3}", float(number))
+            for number, day in enumerate([3, 1, 2, 2, 2, 5, 4, 1, 3, 2, 2, 5], start=1)]
+    rows += [(None, "Radnik 9", "Sirovina 1", 200.0), (None, "Radnik 8", "Sirovina 2", 201.0)]
+    append_data_to_database(production_rows(rows), TABLE, watermark=None)
+
+
+def all_pages(sort_column: str, descending: bool, page_size: int) -> list:
+    rows, cursor, pages = [], None, 0
+    while True:
+        columns, page, cursor = fetch_preview_page(TABLE, sort_column, descending, cursor, page_size)
+        rows += page
+        pages += 1
+        assert len(page) <= page_size
+        if cursor is None:
+            return columns, rows
+        assert pages < 100
+
+
+def expected(sort_column: str, descending: bool) -> list:
+    order = "DESC" if descending else "ASC"
+    # SQLite sorts NULL first ascending and last descending, as the preview does.
+    return get_connection().execute(
+        f'SELECT "Datum", "Ime", "Sirovina", "Brzina" FROM "{TABLE}" ORDER BY "{sort_column}" {order}, rowid {order}'
+    ).fetchall()
+
+
+@pytest.mark.parametrize("sort_column", ["Datum", "Ime", "Sirovina"])
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("page_size", [1, 3, 5, 14, 50])
+def test_pages_cover_every_row_once_in_order(preview_rows, sort_column, descending, page_size):
+    columns, rows = all_pages(sort_column, descending, page_size)
+
+    assert columns == ["Datum", "Ime", "Sirovina", "Brzina"]
+    assert rows == expected(sort_column, descending)
+
+
+def test_unknown_sort_column_is_rejected(preview_rows):
+    with pytest.raises(ValueError):
+        fetch_preview_page(TABLE, "Brzina")
+
+
+def test_missing_table_gives_an_empty_page(database):
+    assert fetch_preview_page(TABLE) == ([], [], None)
+
+
+def read_page(window: PageWindow, index: int, sort_column: str, page_size: int) -> list:
+    _, rows, next_cursor = fetch_preview_page(TABLE, sort_column, False, window.cursor(index), page_size)
+    window.add(index, rows, next_cursor)
+    return rows
+
+
+@pytest.mark.parametrize("max_pages", [1, 2, 3])
+def test_page_window_keeps_a_bounded_number_of_pages(preview_rows, max_pages):
+    page_size = 3
+    rows = expected("Datum", False)
+    window = PageWindow(max_pages)
+
+    index = 0
+    while index is not None:
+        read_page(window, index, "Datum", page_size)
+        assert len(window.pages) <= max_pages
+        shown = [row for _, page in window.pages for row in page]
+        first = window.first_page() * page_size
+        assert shown == rows[first:first + len(shown)]
+        index = window.next_page()
+    assert shown[-1] == rows[-1]
+
+    index = window.previous_page()
+    while index is not None:
+        read_page(window, index, "Datum", page_size)
+        assert len(window.pages) <= max_pages
+        shown = [row for _, page in window.pages for row in page]
+        assert shown == rows[window.first_page() * page_size:][:len(shown)]
+        index = window.previous_page()
+    assert window.first_page() == 0
+    assert shown[0] == rows[0]
+    assert window.next_page() == (None if max_pages * page_size >= len(rows) else max_pages)
+
+
+def test_page_window_returns_the_dropped_page():
+    window = PageWindow(max_pages=2)
+
+    assert window.add(0, ["a"], ("2024", 1)) == []
+    assert window.add(1, ["b"], ("2024", 2)) == []
+    assert window.add(2, ["c"], None) == ["a"]
+    assert window.next_page() is None
+    assert window.previous_page() == 0
+    assert window.add(0, ["a"], ("2024", 1)) == ["c"]
+    assert window.next_page() == 2
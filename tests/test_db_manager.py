@@ -0,0 +1,66 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from DB_manager import get_connection, insert_rows, transaction
+
+
+@pytest.fixture
+def table(database):
+    connection = get_connection()
+    connection.execute('CREATE TABLE "Test" ("Kljuc" TEXT PRIMARY KEY, "A" INTEGER, "B" REAL)')
+    return connection
+
+
+def read(connection) -> list:
+    return connection.execute('SELECT * FROM "Test" ORDER BY "Kljuc"').fetchall()
+
+
+def test_insert_rows_accepts_dataframes_arrays_and_tuples(table):
+    insert_rows(table, "Test", pd.DataFrame({"Kljuc": ["a"], "A": [1], "B": [1.5]}))
+    insert_rows(table, "Test", np.array([[2, 2.5]]), columns=["A", "B"])
+    insert_rows(table, "Test", iter([("c", 3, None)]), columns=["Kljuc", "A", "B"], batch_size=1)
+
+    assert read(table) == [(None, 2, 2.5), ("a", 1, 1.5), ("c", 3, None)]
+
+
+def test_insert_rows_conflict_modes(table):
+    insert_rows(table, "Test", [("a", 1, 1.0)], columns=["Kljuc", "A", "B"])
+
+    with pytest.raises(sqlite3.IntegrityError):
+        insert_rows(table, "Test", [("a", 2, 2.0)], columns=["Kljuc", "A", "B"])
+    insert_rows(table, "Test", [("a", 3, 3.0)], columns=["Kljuc", "A", "B"], on_conflict="ignore")
+    assert read(table) == [("a", 1, 1.0)]
+
+    insert_rows(table, "Test", [("a", 4, None)], columns=["Kljuc", "A", "B"], on_conflict="update", conflict_columns=["Kljuc"])
+    assert read(table) == [("a", 4, None)]
+
+
+def test_insert_rows_rolls_back_a_failed_batch(table):
+    with pytest.raises(sqlite3.IntegrityError):
+        insert_rows(table, "Test", [("a", 1, 1.0), ("a", 2, 2.0)], columns=["Kljuc", "A", "B"])
+    assert read(table) == []
+
+
+def test_update_without_conflict_columns_is_rejected(table):
+    with pytest.raises(ValueError, match="conflict_columns"):
+        insert_rows(table, "Test", [("a", 1, 1.0)], columns=["Kljuc", "A", "B"], on_conflict="update")
+
+
+def test_unknown_conflict_mode_and_missing_columns_are_rejected(table):
+    with pytest.raises(ValueError, match="on_conflict"):
+        insert_rows(table, "Test", [("a", 1, 1.0)], columns=["Kljuc", "A", "B"], on_conflict="merge")
+    with pytest.raises(ValueError, match="columns"):
+        insert_rows(table, "Test", [("a", 1, 1.0)])
+
+
+def test_nested_transactions_roll_back_together(table):
+    with pytest.raises(RuntimeError):
+        with transaction(table):
+            insert_rows(table, "Test", [("a", 1, 1.0)], columns=["Kljuc", "A", "B"])
+            with transaction(table):
+                insert_rows(table, "Test", [("b", 2, 2.0)], columns=["Kljuc", "A", "B"])
+            raise RuntimeError
+    assert read(table) == []
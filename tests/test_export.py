@@ -0,0 +1,69 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from export import export_report, _pdf_text
+
+CREATED_AT = datetime.datetime(2024, 2, 1, 8, 0)
+CROATIAN = "čćšžđ ČĆŠŽĐ"
+
+
+def sections() -> dict:
+    return {
+        "Prosjek po osobi": pd.DataFrame({"Ime": ["Đurđa Čačić", "Ivan"], "Sirovina": ["Sirovina 01"] * 2, "Brzina": [101.5, 80.25]}),
+        "Prosjek po procesu": pd.Series([90.0], index=pd.Index(["Sirovina 01"], name="Sirovina")),
+        "Radnik's rezultati": pd.DataFrame({"Ime": ["Ana"], "Brzina": [1.0]}),
+    }
+
+
+def appendix(rows: int) -> tuple:
+    columns = ["Datum", "Ime", "Sirovina", "Brzina"]
+    batch = [("2024-01-10 06:00:00", f"Radnik {number} {CROATIAN}", "Sirovina 01", float(number)) for number in range(rows)]
+    return columns, iter([batch[:rows // 2], batch[rows // 2:]])
+
+
+def test_pdf_keeps_croatian_letters(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    path = str(tmp_path / "izvjestaj.pdf")
+
+    export_report(sections(), path, CREATED_AT, appendix(300))
+
+    reader = pypdf.PdfReader(path)
+    text = "\n".join(page.extract_text() for page in reader.pages)
+    assert "Izvještaj prosjeka čišćenja" in text
+    assert "Đurđa Čačić" in text
+    assert f"Radnik 299 {CROATIAN}" in text
+    assert len(reader.pages) > 1
+
+
+def test_pdf_text_uses_the_extra_glyphs_and_escapes():
+    assert _pdf_text("č(ć)\\") == b"\x9d\\(\x90\\)\\\\"
+    assert _pdf_text("ő ˆ") == b"o ?"
+
+
+def test_xlsx_has_one_sheet_per_section_and_links_that_resolve(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    path = str(tmp_path / "izvjestaj.xlsx")
+
+    export_report(sections(), path, CREATED_AT, appendix(10))
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ["Sadržaj", "Prosjek po osobi", "Prosjek po procesu", "Radnik's rezultati",
+                                   "Prilog - sirovi podaci"]
+    contents = workbook["Sadržaj"]
+    for row in range(4, 8):
+        link = contents.cell(row, 2).hyperlink.location
+        sheet = link.rsplit("!", 1)[0]
+        assert sheet.startswith("'") and sheet.endswith("'")
+        assert sheet[1:-1].replace("''", "'") in workbook.sheetnames
+    assert contents.cell(6, 2).hyperlink.location == "'Radnik''s rezultati'!A1"
+
+    raw = workbook["Prilog - sirovi podaci"]
+    assert raw.max_row == 11
+    assert raw.cell(2, 1).value == datetime.datetime(2024, 1, 10, 6, 0)
+
+
+def test_appendix_is_rejected_for_word_documents(tmp_path):
+    with pytest.raises(ValueError):
+        export_report(sections(), str(tmp_path / "izvjestaj.docx"), CREATED_AT, appendix(1))
@@ -0,0 +1,106 @@
+import pandas as pd
+
+from conftest import production_rows
+from DB_manager import get_connection
+from functions import (add_data_to_database, append_data_to_database, excel_to_dateframe, row_fingerprints,
+                       stream_file_to_database, FINGERPRINT_COLUMN)
+
+TABLE = "Brzina_Radnika"
+
+
+def stored_count() -> int:
+    return get_connection().execute(f'SELECT COUNT(*) FROM "{TABLE}"').fetchone()[0]
+
+
+def test_first_upload_stores_every_row(database, sample_rows):
+    assert append_data_to_database(sample_rows, TABLE) == len(sample_rows)
+    assert stored_count() == len(sample_rows)
+
+
+def test_duplicate_rows_are_skipped_by_fingerprint(database, sample_rows):
+    append_data_to_database(sample_rows, TABLE)
+
+    assert append_data_to_database(sample_rows, TABLE) == 0
+    assert append_data_to_database(sample_rows, TABLE, watermark=None) == 0
+    assert stored_count() == len(sample_rows)
+
+    fingerprints = get_connection().execute(f'SELECT COUNT(DISTINCT "{FINGERPRINT_COLUMN}") FROM "{TABLE}"').fetchone()[0]
+    assert fingerprints == len(sample_rows)
+
+
+def test_repeated_rows_within_one_upload_are_all_stored(database, sample_rows):
+    doubled = production_rows(list(sample_rows.itertuples(index=False)) * 2)
+
+    assert append_data_to_database(doubled, TABLE) == len(doubled)
+    assert append_data_to_database(doubled, TABLE, watermark=None) == 0
+    assert append_data_to_database(sample_rows, TABLE, watermark=None) == 0
+    assert stored_count() == len(doubled)
+
+
+def test_repeated_rows_split_over_chunks_are_all_stored(database, sample_rows, tmp_path):
+    path = tmp_path / "podaci.csv"
+    pd.concat([sample_rows, sample_rows.iloc[:2]]).to_csv(path, index=False)
+
+    assert stream_file_to_database(str(path), chunk_size=4) == len(sample_rows) + 2
+    assert stream_file_to_database(str(path), chunk_size=5) == 0
+    assert stored_count() == len(sample_rows) + 2
+
+
+def test_backfilled_fingerprints_match_new_uploads(database, sample_rows, tmp_path):
+    # A table from before fingerprints, replaced on upload, with whole-number speeds stored as integers.
+    legacy = pd.concat([sample_rows, sample_rows.iloc[:1]]).astype({"Brzina": "int64"})
+    add_data_to_database(legacy, TABLE)
+    path = tmp_path / "podaci.csv"
+    legacy.to_csv(path, index=False)
+
+    assert append_data_to_database(legacy, TABLE, watermark=None) == 0
+    assert stream_file_to_database(str(path)) == 0
+    assert append_data_to_database(sample_rows.astype({"Brzina": "float64"}), TABLE, watermark=None) == 0
+    assert stored_count() == len(legacy)
+
+    stored = pd.read_sql(f'SELECT * FROM "{TABLE}" ORDER BY rowid', get_connection())
+    assert stored[FINGERPRINT_COLUMN].tolist() == row_fingerprints(legacy).tolist()
+
+
+def test_rows_before_the_last_stored_date_are_skipped(database, sample_rows):
+    append_data_to_database(sample_rows, TABLE)
+    new = production_rows([
+        ("2023-12-31 06:00:00", "Ana", "Sirovina 01", 1.0),
+        ("2024-03-01 06:00:00", "Ivan", "Sirovina 01", 2.0),
+        ("2024-03-02 06:00:00", "Marko", "Sirovina 02", 3.0),
+    ])
+
+    assert append_data_to_database(new, TABLE) == 2
+    assert stored_count() == len(sample_rows) + 2
+
+
+def test_watermark_none_only_checks_fingerprints(database, sample_rows):
+    append_data_to_database(sample_rows, TABLE)
+    late = production_rows([("2023-12-31 06:00:00", "Ana", "Sirovina 01", 1.0)])
+
+    assert append_data_to_database(late, TABLE, watermark=None) == 1
+
+
+def test_empty_input_returns_without_a_message(database, messages, sample_rows):
+    assert append_data_to_database(sample_rows.iloc[:0], TABLE) == 0
+    assert messages == []
+
+
+def test_streaming_shows_no_message_per_chunk(database, messages, sample_rows, tmp_path):
+    path = tmp_path / "podaci.csv"
+    sample_rows.to_csv(path, index=False)
+    empty = tmp_path / "prazno.csv"
+    sample_rows.iloc[:0].to_csv(empty, index=False)
+
+    assert stream_file_to_database(str(path), chunk_size=2) == len(sample_rows)
+    assert stream_file_to_database(str(path), chunk_size=2) == 0
+    assert stream_file_to_database(str(empty)) == 0
+    assert messages == []
+
+
+def test_an_empty_workbook_shows_one_message(database, messages, sample_rows, tmp_path):
+    path = tmp_path / "prazno.xlsx"
+    sample_rows.iloc[:0].to_excel(path, index=False)
+
+    assert excel_to_dateframe(str(path)).empty
+    assert messages == [("Info", "No data was selected")]
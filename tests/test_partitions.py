@@ -0,0 +1,79 @@
+import os
+import sqlite3
+
+import DB_manager
+from DB_manager import get_connection
+from functions import append_data_to_database, load_report_aggregates, load_report_rows
+from summaries import rebuild_summary_tables
+from partitions import archive_partitions, archive_path, list_partitions
+
+TABLE = "Brzina_Radnika"
+
+
+def archived_rows(path: str) -> list:
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(f'SELECT "Datum", "Ime" FROM "{TABLE}" ORDER BY "Datum"').fetchall()
+    finally:
+        connection.close()
+
+
+def test_rows_are_partitioned_by_month(database, sample_rows):
+    append_data_to_database(sample_rows, TABLE)
+
+    partitions = list_partitions(get_connection(), TABLE)
+    assert partitions["Mjesec"].tolist() == ["2024-01", "2024-02", "2024-03"]
+    assert partitions["Broj redaka"].tolist() == [3, 2, 1]
+
+
+def test_archive_moves_old_months_next_to_the_configured_database(database, sample_rows, tmp_path):
+    append_data_to_database(sample_rows, TABLE)
+
+    assert archive_path() == str(tmp_path / "arhiva_proizvodnja.db")
+    assert archive_partitions("2024-02") == 3
+    assert list_partitions(get_connection(), TABLE)["Mjesec"].tolist() == ["2024-02", "2024-03"]
+    assert [name for _, name in archived_rows(archive_path())] == ["Ana", "Ivan", "Ana"]
+
+    # Archived months are left out of the summaries as well.
+    aggregate, _ = load_report_aggregates()
+    assert aggregate["count"].sum() == len(sample_rows) - 3
+
+
+def test_databases_in_one_directory_have_their_own_archive(database, sample_rows, tmp_path):
+    append_data_to_database(sample_rows, TABLE)
+    archive_partitions("2024-02")
+    first_archive = archive_path()
+
+    DB_manager.configure_database(str(tmp_path / "druga_baza.db"))
+    append_data_to_database(sample_rows.iloc[3:], TABLE)
+    archive_partitions("2024-03")
+
+    assert archive_path() != first_archive
+    assert os.path.dirname(archive_path()) == str(tmp_path)
+    assert len(archived_rows(first_archive)) == 3
+    assert len(archived_rows(archive_path())) == 2
+
+
+def test_archiving_twice_does_not_duplicate_rows(database, sample_rows):
+    append_data_to_database(sample_rows, TABLE)
+    archive_partitions("2024-02")
+
+    assert archive_partitions("2024-02") == 0
+    assert len(archived_rows(archive_path())) == 3
+
+
+def test_reports_agree_after_archiving_and_a_rebuild(database, sample_rows):
+    append_data_to_database(sample_rows, TABLE)
+    archive_partitions("2024-02")
+    archived = load_report_aggregates()
+    whole_months = load_report_aggregates(date_from="2024-01-01", date_to="2024-03-31")
+    days = load_report_aggregates(date_from="2024-01-01", date_to="2024-03-15")
+
+    rebuild_summary_tables()
+    rebuilt = load_report_aggregates()
+
+    for aggregate, process_total in (whole_months, days, rebuilt):
+        assert aggregate[["Ime", "Sirovina", "count", "sum"]].values.tolist() == \
+            archived[0][["Ime", "Sirovina", "count", "sum"]].values.tolist()
+        assert process_total["count"].to_dict() == archived[1]["count"].to_dict()
+    assert archived[1].loc["Sirovina 01", "count"] == len(load_report_rows(materials=["Sirovina 01"])) == 2
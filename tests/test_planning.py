@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import planning
+from planning import assign_workers, solve_assignment, _hungarian
+
+
+@pytest.fixture
+def speeds() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"S1": [100.0, 80.0, np.nan], "S2": [50.0, 70.0, 60.0]},
+        index=pd.Index(["Ana", "Ivan", "Marko"], name="Ime"),
+    )
+
+
+@pytest.mark.skipif(planning.linear_sum_assignment is None, reason="SciPy is not installed")
+@pytest.mark.parametrize("shape", [(1, 1), (5, 5), (4, 9), (9, 4), (30, 30)])
+def test_hungarian_matches_scipy(monkeypatch, shape):
+    generator = np.random.default_rng(sum(shape))
+    for cost in (generator.random(shape) * 100, generator.integers(0, 3, shape).astype(float)):
+        rows, columns = solve_assignment(cost)
+        expected = cost[rows, columns].sum()
+
+        monkeypatch.setattr(planning, "linear_sum_assignment", None)
+        rows, columns = solve_assignment(cost)
+        monkeypatch.undo()
+
+        assert len(rows) == min(shape)
+        assert len(set(columns.tolist())) == len(columns)
+        assert cost[rows, columns].sum() == pytest.approx(expected)
+
+
+def test_hungarian_assigns_every_row():
+    rows, columns = _hungarian(np.array([[4.0, 1.0, 3.0], [2.0, 0.0, 5.0]]))
+
+    assert rows.tolist() == [0, 1]
+    assert columns.tolist() == [1, 0]
+
+
+def test_assignment_maximizes_total_speed(speeds):
+    plan = assign_workers(speeds, {"S1": 1, "S2": 1})
+
+    assert dict(zip(plan["Sirovina"], plan["Ime"])) == {"S1": "Ana", "S2": "Ivan"}
+    assert plan["Brzina"].sum() == 170.0
+
+
+def test_duplicate_available_workers_fill_one_place(speeds):
+    plan = assign_workers(speeds, {"S1": 2}, ["Ana", "Ana"])
+
+    assert plan["Ime"].iloc[0] == "Ana"
+    assert plan["Ime"].isna().tolist() == [False, True]
+    assert plan["Brzina"].isna().tolist() == [False, True]
+
+
+def test_unknown_pairs_are_never_assigned(speeds):
+    plan = assign_workers(speeds, {"S1": 2}, ["Marko", "Ivan"])
+
+    assert plan["Ime"].iloc[0] == "Ivan"
+    assert plan["Ime"].isna().tolist() == [False, True]
+    assert "Marko" not in plan["Ime"].tolist()
+
+
+def test_unknown_workers_and_empty_capacity_are_ignored(speeds):
+    plan = assign_workers(speeds, {"S1": 0, "S2": 1}, ["Petra", "Marko"])
+
+    assert plan.to_dict("records") == [{"Sirovina": "S2", "Ime": "Marko", "Brzina": 60.0}]
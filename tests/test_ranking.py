@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import functions
+from aggregation import workers_by_process
+from conftest import production_rows
+from functions import append_data_to_database, load_worker_ranking
+
+TABLE = "Brzina_Radnika"
+
+
+@pytest.fixture
+def ranked_rows(database):
+    rng = np.random.default_rng(3)
+    rows = [(f"2024-{month:02d}-{day:02d} 06:00:00", f"Radnik {worker:02d}", f"Sirovina {process}",
+             float(rng.integers(50, 150)))
+            for month in (1, 2) for day in range(1, 6) for worker in range(12) for process in range(3)
+            if rng.random() < 0.6]
+    # Two workers with the same average, which are ranked by name.
+    rows += [("2024-01-15 06:00:00", "Zora", "Sirovina 9", 100.0), ("2024-01-15 06:00:00", "Ana", "Sirovina 9", 100.0)]
+    append_data_to_database(production_rows(rows), TABLE)
+    return production_rows(rows)
+
+
+def full_ranking(rows: pd.DataFrame, top_n: int, fastest: bool) -> pd.DataFrame:
+    averages = rows.groupby(["Sirovina", "Ime"], as_index=False)["Brzina"].mean()
+    averages = averages.sort_values(["Sirovina", "Brzina", "Ime"], ascending=[True, not fastest, True])
+    averages["Rang"] = averages.groupby("Sirovina").cumcount() + 1
+    averages["Brzina"] = averages["Brzina"].round(2)
+    return averages[averages["Rang"] <= top_n][["Sirovina", "Rang", "Ime", "Brzina"]].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("fastest", [True, False])
+@pytest.mark.parametrize("top_n", [1, 3, 100])
+def test_ranking_matches_a_full_sort(ranked_rows, fastest, top_n):
+    ranking = load_worker_ranking(top_n, fastest)
+
+    pd.testing.assert_frame_equal(ranking, full_ranking(ranked_rows, top_n, fastest), check_dtype=False)
+
+
+@pytest.mark.parametrize("date_from, date_to", [("2024-01-01", "2024-01-31"), ("2024-01-02", "2024-02-03")])
+def test_ranking_of_whole_months_and_of_days(ranked_rows, date_from, date_to):
+    dates = pd.to_datetime(ranked_rows["Datum"])
+    in_range = ranked_rows[(dates >= date_from) & (dates < pd.Timestamp(date_to) + pd.Timedelta(days=1))]
+
+    ranking = load_worker_ranking(2, True, date_from=date_from, date_to=date_to)
+
+    pd.testing.assert_frame_equal(ranking, full_ranking(in_range, 2, True), check_dtype=False)
+
+
+def test_ties_are_ranked_by_name(ranked_rows):
+    ranking = load_worker_ranking(2, True, materials=["Sirovina 9"])
+
+    assert ranking["Ime"].tolist() == ["Ana", "Zora"]
+
+
+def test_ranking_without_window_functions(ranked_rows, monkeypatch):
+    expected = load_worker_ranking(3, False)
+    monkeypatch.setattr(functions.sqlite3, "sqlite_version_info", (3, 24, 0))
+
+    fallback = load_worker_ranking(3, False)
+
+    assert fallback.groupby("Sirovina")["Brzina"].apply(list).to_dict() == expected.groupby("Sirovina")["Brzina"].apply(list).to_dict()
+
+
+def test_workers_by_process_top_n_matches_a_sort():
+    person_average = pd.DataFrame({
+        "Ime": ["A", "B", "C", "D", "E"], "Sirovina": ["X", "X", "X", "Y", "Y"], "Brzina": [3.0, np.nan, 5.0, 1.0, 2.0],
+    })
+
+    fastest = workers_by_process(person_average, ascending=False, top_n=2)
+    slowest = workers_by_process(person_average, ascending=True, top_n=5)
+    everyone = workers_by_process(person_average, ascending=True)
+
+    assert fastest["X"]["Ime"].tolist() == ["C", "A"]
+    assert slowest["X"]["Ime"].tolist() == everyone["X"]["Ime"].tolist() == ["A", "C", "B"]
+    assert workers_by_process(person_average, ascending=False, top_n=0)["Y"].empty
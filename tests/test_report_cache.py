@@ -0,0 +1,67 @@
+import pandas as pd
+
+import DB_manager
+from DB_manager import get_connection, get_data_version
+from functions import append_data_to_database, generate_report
+from report_cache import ReportCache, report_cache
+from summaries import PERSON_SUMMARY_TABLE, SOURCE_TABLE, rebuild_summary_tables
+
+
+def test_hits_misses_and_filter_order():
+    cache = ReportCache()
+    calls = []
+    compute = lambda: calls.append(1) or pd.Series([1.0])
+
+    cache.get_or_compute(1, "sekcija", {"workers": ["Ana", "Ivan"]}, compute)
+    cache.get_or_compute(1, "sekcija", {"workers": ["Ivan", "Ana"]}, compute)
+    cache.get_or_compute(2, "sekcija", {"workers": ["Ana", "Ivan"]}, compute)
+
+    assert len(calls) == 2
+    assert cache.statistics()["hits"] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ReportCache(max_entries=2)
+    for version in (1, 2, 1, 3):
+        cache.get_or_compute(version, "sekcija", {}, lambda: pd.Series([1.0]))
+
+    assert cache.statistics()["entries"] == 2
+    assert cache.statistics()["evictions"] == 1
+    cache.invalidate(older_than=3)
+    assert cache.statistics()["entries"] == 1
+
+
+def test_entries_are_not_shared_between_databases(database, tmp_path):
+    cache = ReportCache()
+    first = cache.get_or_compute(1, "sekcija", {}, lambda: "prva")
+    DB_manager.configure_database(str(tmp_path / "druga_baza.db"))
+    second = cache.get_or_compute(1, "sekcija", {}, lambda: "druga")
+
+    assert (first, second) == ("prva", "druga")
+
+
+def test_rebuild_bumps_the_data_version(database, sample_rows, tmp_path):
+    append_data_to_database(sample_rows, SOURCE_TABLE)
+    version = get_data_version(get_connection(), SOURCE_TABLE)
+
+    rebuild_summary_tables()
+
+    assert get_data_version(get_connection(), SOURCE_TABLE) == version + 1
+
+
+def test_report_after_a_rebuild_uses_the_fixed_summaries(database, sample_rows, tmp_path):
+    append_data_to_database(sample_rows, SOURCE_TABLE)
+    output_path = str(tmp_path / "izvjestaj.xlsx")
+    generate_report(1, 0, 0, 0, 0, 0, date_from="2024-01-01", date_to="2024-03-31", output_path=output_path)
+    stale_misses = report_cache.statistics()["misses"]
+
+    # Drift the summaries away from the stored rows, as an older version could have left them.
+    connection = get_connection()
+    connection.execute(f'UPDATE "{PERSON_SUMMARY_TABLE}" SET "sum" = "sum" * 2')
+    connection.commit()
+    rebuild_summary_tables()
+    generate_report(1, 0, 0, 0, 0, 0, date_from="2024-01-01", date_to="2024-03-31", output_path=output_path)
+
+    assert report_cache.statistics()["misses"] > stale_misses
+    averages = pd.read_excel(output_path, sheet_name="Prosjek po osobi", header=2).set_index(["Ime", "Sirovina"])
+    assert averages.loc[("Ana", "Sirovina 01"), "Brzina"] == 105.0
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+import DB_manager
+from DB_manager import get_connection, get_data_version, get_data_generation
+from functions import append_data_to_database
+from snapshot import load_production_data, snapshot_path
+
+pytest.importorskip("pyarrow")
+TABLE = "Brzina_Radnika"
+
+
+def current_snapshot() -> str:
+    connection = get_connection()
+    return snapshot_path(TABLE, get_data_version(connection, TABLE), get_data_generation(connection, TABLE))
+
+
+def test_snapshot_is_written_and_reused(database, sample_rows):
+    append_data_to_database(sample_rows, TABLE)
+
+    data = load_production_data()
+    path = current_snapshot()
+    assert os.path.exists(path)
+    assert len(data) == len(sample_rows)
+    assert str(data["Ime"].dtype) == "category"
+
+    os.utime(path, (0, 0))
+    assert load_production_data()["Brzina"].sum() == sample_rows["Brzina"].sum()
+
+
+def test_a_write_replaces_the_snapshot(database, sample_rows):
+    append_data_to_database(sample_rows.iloc[:3], TABLE)
+    load_production_data()
+    old_path = current_snapshot()
+    append_data_to_database(sample_rows.iloc[3:], TABLE)
+
+    assert len(load_production_data()) == len(sample_rows)
+    assert not os.path.exists(old_path)
+
+
+def test_databases_in_one_directory_do_not_share_snapshots(database, tmp_path, sample_rows):
+    append_data_to_database(sample_rows.iloc[:2], TABLE)
+    first = load_production_data()
+    first_path = current_snapshot()
+
+    DB_manager.configure_database(str(tmp_path / "druga_baza.db"))
+    append_data_to_database(sample_rows, TABLE)
+    second = load_production_data()
+
+    assert current_snapshot() != first_path
+    assert len(first) == 2
+    assert len(second) == len(sample_rows)
+
+
+def test_snapshot_follows_the_configured_database(database):
+    assert snapshot_path(TABLE, 1).startswith(os.path.dirname(database))
+
+
+def test_a_recreated_database_does_not_reuse_snapshots(database, sample_rows):
+    append_data_to_database(sample_rows.iloc[:1], TABLE)
+    load_production_data()
+    old_path = current_snapshot()
+
+    DB_manager.close_connections()
+    os.remove(database)
+    append_data_to_database(sample_rows.iloc[1:2], TABLE)
+    data = load_production_data()
+
+    assert current_snapshot() != old_path
+    assert data["Ime"].tolist() == [sample_rows["Ime"].iloc[1]]
+
+
+def test_version_table_without_generations_is_upgraded(database, sample_rows):
+    connection = get_connection()
+    connection.execute('CREATE TABLE "Verzije_Podataka" ("Tablica" TEXT PRIMARY KEY, "Verzija" INTEGER NOT NULL)')
+    connection.execute('INSERT INTO "Verzije_Podataka" VALUES (?, 3)', (TABLE,))
+    connection.commit()
+    assert get_data_generation(connection, TABLE) == ""
+
+    append_data_to_database(sample_rows, TABLE)
+
+    assert get_data_version(connection, TABLE) > 3
+    assert get_data_generation(connection, TABLE) != ""
+    assert len(load_production_data()) == len(sample_rows)
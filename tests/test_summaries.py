@@ -0,0 +1,84 @@
+import pandas as pd
+import pandas.testing as pdt
+
+from conftest import production_rows
+from DB_manager import get_connection
+from functions import append_data_to_database, load_report_aggregates, load_worker_ranking
+from summaries import PERSON_SUMMARY_TABLE, PROCESS_SUMMARY_TABLE, rebuild_summary_tables
+
+TABLE = "Brzina_Radnika"
+
+
+def read_summaries() -> dict:
+    connection = get_connection()
+    return {
+        table_name: pd.read_sql(f'SELECT * FROM "{table_name}"', connection)
+                      .sort_values(keys).reset_index(drop=True)
+        for table_name, keys in ((PERSON_SUMMARY_TABLE, ["Ime", "Sirovina", "Mjesec"]),
+                                 (PROCESS_SUMMARY_TABLE, ["Sirovina", "Mjesec"]))
+    }
+
+
+def assert_same_summaries(first: dict, second: dict):
+    for table_name in first:
+        pdt.assert_frame_equal(first[table_name], second[table_name], check_exact=False)
+
+
+def test_incremental_updates_match_a_rebuild(database, sample_rows):
+    append_data_to_database(sample_rows.iloc[:3], TABLE)
+    append_data_to_database(sample_rows.iloc[3:], TABLE)
+    incremental = read_summaries()
+
+    rebuild_summary_tables()
+
+    assert_same_summaries(incremental, read_summaries())
+    totals = incremental[PROCESS_SUMMARY_TABLE].set_index(["Sirovina", "Mjesec"])
+    assert totals.loc[("Sirovina 01", "*"), "count"] == 4
+    assert totals.loc[("Sirovina 01", "*"), "sum"] == 380.0
+
+
+def test_rows_without_a_name_are_left_out_of_both_paths(database, sample_rows):
+    blank = production_rows([
+        ("2024-03-02 06:00:00", None, "Sirovina 01", 60.0),
+        ("2024-03-03 06:00:00", "Ana", None, 40.0),
+    ])
+
+    append_data_to_database(sample_rows, TABLE)
+    assert append_data_to_database(blank, TABLE) == 2
+    incremental = read_summaries()
+
+    rebuild_summary_tables()
+    rebuilt = read_summaries()
+
+    assert_same_summaries(incremental, rebuilt)
+    assert rebuilt[PERSON_SUMMARY_TABLE][["Ime", "Sirovina"]].notna().all().all()
+    process = rebuilt[PROCESS_SUMMARY_TABLE].set_index(["Sirovina", "Mjesec"])
+    assert process.loc[("Sirovina 01", "*"), "count"] == 5
+
+
+def test_first_upload_with_a_blank_name_is_stored(database, sample_rows):
+    rows = pd.concat([sample_rows, production_rows([("2024-03-02 06:00:00", None, "Sirovina 01", 60.0)])])
+
+    assert append_data_to_database(rows, TABLE) == len(rows)
+    assert get_connection().execute(f'SELECT COUNT(*) FROM "{TABLE}"').fetchone()[0] == len(rows)
+
+
+def test_partial_month_ranges_leave_out_rows_without_a_name(database, sample_rows):
+    append_data_to_database(pd.concat([sample_rows, production_rows([
+        ("2024-03-02 06:00:00", None, "Sirovina 01", 60.0),
+        ("2024-03-03 06:00:00", "Ana", None, 40.0),
+    ])]), TABLE)
+
+    partial_aggregate, partial_total = load_report_aggregates(date_from="2024-01-01", date_to="2024-03-15")
+    whole_aggregate, whole_total = load_report_aggregates(date_from="2024-01-01", date_to="2024-03-31")
+
+    assert partial_aggregate[["Ime", "Sirovina"]].notna().all().all()
+    pdt.assert_frame_equal(partial_aggregate.reset_index(drop=True),
+                           whole_aggregate[partial_aggregate.columns].reset_index(drop=True),
+                           check_exact=False, check_dtype=False)
+    pdt.assert_frame_equal(partial_total, whole_total[partial_total.columns], check_exact=False, check_dtype=False)
+    assert partial_total.loc["Sirovina 01", "count"] == 5
+
+    ranking = load_worker_ranking(date_from="2024-01-01", date_to="2024-03-15")
+    assert ranking[["Ime", "Sirovina"]].notna().all().all()
+    assert len(ranking) == len(partial_aggregate)
@@ -0,0 +1,116 @@
+import os
+
+import pandas as pd
+import pytest
+
+import UI
+import watcher
+from conftest import production_rows
+from DB_manager import get_connection
+from functions import append_data_to_database
+from partitions import archive_partitions, archive_path
+from watcher import FolderWatcher
+
+TABLE = "Brzina_Radnika"
+
+
+def stored_count() -> int:
+    return get_connection().execute(f'SELECT COUNT(*) FROM "{TABLE}"').fetchone()[0]
+
+
+def drop_file(directory, name: str, rows) -> str:
+    """Writes rows as a CSV file that is old enough to be ingested on the first scan."""
+    path = os.path.join(directory, name)
+    rows.to_csv(path, index=False)
+    os.utime(path, (0, 0))
+    return path
+
+
+@pytest.fixture
+def folder(tmp_path):
+    directory = tmp_path / "ulaz"
+    directory.mkdir()
+    return str(directory)
+
+
+@pytest.fixture
+def folder_watcher(folder):
+    folder_watcher = FolderWatcher(folder, max_workers=1)
+    yield folder_watcher
+    folder_watcher.close()
+
+
+def test_files_with_the_same_content_are_ingested_once(database, folder, folder_watcher, sample_rows):
+    drop_file(folder, "a.csv", sample_rows.iloc[:3])
+    drop_file(folder, "b.csv", sample_rows.iloc[3:])
+    drop_file(folder, "kopija.csv", sample_rows.iloc[:3])
+
+    ingested, rows_added = folder_watcher.scan()
+
+    assert len(ingested) == 2
+    assert rows_added == len(sample_rows)
+    assert folder_watcher.scan() == ([], 0)
+    assert FolderWatcher(folder, max_workers=1).scan() == ([], 0)
+    assert stored_count() == len(sample_rows)
+
+
+def test_rows_repeated_in_a_new_file_are_skipped(database, folder, folder_watcher, sample_rows):
+    drop_file(folder, "a.csv", sample_rows)
+    folder_watcher.scan()
+
+    later = production_rows([("2024-03-02 06:00:00", "Ivan", "Sirovina 02", 75.0)])
+    drop_file(folder, "b.csv", pd.concat([sample_rows.iloc[:2], later]))
+
+    assert folder_watcher.scan()[1] == 1
+    assert stored_count() == len(sample_rows) + 1
+
+
+def test_archived_rows_are_not_ingested_again(database, folder, folder_watcher, sample_rows):
+    append_data_to_database(sample_rows, TABLE)
+    assert archive_partitions("2024-03") == 5
+    assert os.path.exists(archive_path())
+
+    drop_file(folder, "ponovno.csv", sample_rows)
+    assert folder_watcher.scan()[1] == 0
+    assert append_data_to_database(sample_rows, TABLE, watermark=None) == 0
+    assert stored_count() == 1
+
+
+def test_everything_archived_keeps_rows_out(database, sample_rows):
+    append_data_to_database(sample_rows, TABLE)
+    archive_partitions("2025-01")
+
+    assert stored_count() == 0
+    assert append_data_to_database(sample_rows, TABLE) == 0
+
+
+def test_watch_folder_counts_files_across_scans(monkeypatch):
+    class FakeWatcher:
+        def __init__(self, directory):
+            pass
+
+        def watch(self, progress=None, stop=None):
+            for done, total, failed in ((2, 3, 0), (2, 3, 1), (1, 2, 0), (2, 2, 0)):
+                progress(done, total, failed)
+
+    monkeypatch.setattr(watcher, "FolderWatcher", FakeWatcher)
+    reported = []
+
+    assert UI.watch_folder("ulaz", reported.append) == 4
+    assert reported == [2, 2, 3, 4]
+
+
+def test_files_that_fail_are_not_counted_as_ingested(database, messages, folder, folder_watcher, sample_rows):
+    drop_file(folder, "a.csv", sample_rows)
+    broken = os.path.join(folder, "neispravno.xlsx")
+    with open(broken, "wb") as file:
+        file.write(b"not a workbook")
+    os.utime(broken, (0, 0))
+    reported = []
+
+    ingested, _ = folder_watcher.scan(lambda *values: reported.append(values))
+
+    assert len(ingested) == 1
+    assert reported[-1] == (1, 2, 1)
+    assert all(done <= 1 for done, _, _ in reported)
+    assert [title for title, _ in messages] == ["Error"]
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+def _truncate(dates: pd.Series, unit: str) -> pd.Series:
+    """
+    Truncates datetimes to the start of their day or month with a NumPy cast.
+
+    Args:
+        dates (pd.Series): A datetime Series.
+        unit (str): "D" for days or "M" for months.
+
+    Returns:
+        pd.Series: The truncated datetimes with the same index.
+    """
+    truncated = dates.to_numpy(dtype="datetime64[ns]").astype(f"datetime64[{unit}]").astype("datetime64[ns]")
+    return pd.Series(truncated, index=dates.index)
+
+def _monthly(df: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """
+    Calculates the average 'Brzina' per month for every group of keys.
+
+    Args:
+        df (pd.DataFrame): Production data with a datetime 'Datum' column.
+        keys (list): The columns to group by next to the month.
+
+    Returns:
+        pd.DataFrame: The key columns, 'Mjesec' in "YYYY-MM" form and the average 'Brzina' rounded to 2 decimal places.
+    """
+    months = _truncate(df["Datum"], "M")
+    monthly = (
+        df[keys + ["Brzina"]].assign(Mjesec=months)
+        .groupby(keys + ["Mjesec"], observed=True)["Brzina"]
+        .mean()
+        .round(2)
+        .reset_index()
+    )
+    monthly["Mjesec"] = monthly["Mjesec"].dt.strftime("%Y-%m")
+    return monthly[keys + ["Mjesec", "Brzina"]]
+
+def monthly_averages_per_worker(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculates the average 'Brzina' of every worker on every process for each month.
+
+    Args:
+        df (pd.DataFrame): Production data with columns 'Datum', 'Ime', 'Sirovina' and 'Brzina'.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Ime', 'Sirovina', 'Mjesec' and 'Brzina'.
+    """
+    return _monthly(df, ["Ime", "Sirovina"])
+
+def monthly_averages_per_process(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculates the average 'Brzina' of every process for each month.
+
+    Args:
+        df (pd.DataFrame): Production data with columns 'Datum', 'Sirovina' and 'Brzina'.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Sirovina', 'Mjesec' and 'Brzina'.
+    """
+    return _monthly(df, ["Sirovina"])
+
+def rolling_averages_per_worker(df: pd.DataFrame, window: str = "30D") -> pd.DataFrame:
+    """
+    Calculates a rolling average of 'Brzina' for every worker on every process.
+
+    The rows are first reduced to a daily sum and count per worker and process. The rolling
+    sums of both are divided afterwards, so every measurement in the window has the same
+    weight no matter how many were taken on one day.
+
+    Args:
+        df (pd.DataFrame): Production data with columns 'Datum', 'Ime', 'Sirovina' and 'Brzina'.
+        window (str, optional): The length of the window as a pandas offset, for example "7D" or "30D". Defaults to "30D".
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Ime', 'Sirovina', 'Datum' and 'Brzina', one row
+        per worker, process and day the worker was on the process.
+    """
+    daily = (
+        df[["Ime", "Sirovina", "Brzina"]].assign(Datum=_truncate(df["Datum"], "D"))
+        .groupby(["Ime", "Sirovina", "Datum"], observed=True)["Brzina"]
+        .agg(["sum", "count"])
+        .reset_index(level=["Ime", "Sirovina"])
+    )
+    rolled = daily.groupby(["Ime", "Sirovina"], observed=True)[["sum", "count"]].rolling(window).sum()
+
+    result = rolled.reset_index()
+    result["Brzina"] = (result["sum"] / result["count"]).round(2)
+    return result[["Ime", "Sirovina", "Datum", "Brzina"]]
+
+def latest_rolling_averages(df: pd.DataFrame, window: str = "30D") -> pd.DataFrame:
+    """
+    Returns the rolling average of every worker and process on the last day they worked on it.
+
+    Args:
+        df (pd.DataFrame): Production data with columns 'Datum', 'Ime', 'Sirovina' and 'Brzina'.
+        window (str, optional): The length of the window as a pandas offset. Defaults to "30D".
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Ime', 'Sirovina', 'Datum' and 'Brzina'.
+    """
+    rolling = rolling_averages_per_worker(df, window)
+    latest = rolling.groupby(["Ime", "Sirovina"], observed=True)["Datum"].idxmax()
+    result = rolling.loc[latest.to_numpy()].reset_index(drop=True)
+    result["Datum"] = result["Datum"].dt.strftime("%Y-%m-%d")
+    return result
+
+def worker_trends(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fits a least-squares line through the speeds of every worker on every process over time.
+
+    The slope is calculated from per-group sums of x, y, x*y and x*x, where x is the time in
+    days, so all groups are fitted in one groupby pass. Speeds on different processes are not
+    comparable, which is why the trend is calculated per process and not only per worker.
+
+    Args:
+        df (pd.DataFrame): Production data with columns 'Datum', 'Ime', 'Sirovina' and 'Brzina'.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'Ime', 'Sirovina', 'Broj mjerenja', 'Trend (po danu)'
+        and 'Trend (po mjesecu)'. The trend is NaN when all measurements were taken at the same time.
+    """
+    data = df[["Ime", "Sirovina", "Datum", "Brzina"]].dropna(subset=["Datum", "Brzina"])
+    x = ((data["Datum"] - data["Datum"].min()) / pd.Timedelta(days=1)).to_numpy(dtype="float64")
+    y = data["Brzina"].to_numpy(dtype="float64")
+
+    sums = (
+        pd.DataFrame({"Ime": data["Ime"], "Sirovina": data["Sirovina"], "n": 1.0, "x": x, "y": y, "xy": x * y, "xx": x * x})
+        .groupby(["Ime", "Sirovina"], observed=True)
+        .sum()
+    )
+    denominator = sums["n"] * sums["xx"] - sums["x"] ** 2
+    slope = (sums["n"] * sums["xy"] - sums["x"] * sums["y"]) / denominator.where(denominator > 1e-9, np.nan)
+
+    result = pd.DataFrame({
+        "Broj mjerenja": sums["n"].astype("int64"),
+        "Trend (po danu)": slope.round(4),
+        "Trend (po mjesecu)": (slope * 30).round(2),
+    })
+    return result.reset_index()
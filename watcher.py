@@ -0,0 +1,258 @@
+import datetime
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import pandas as pd
+from DB_manager import *
+from error import error
+from functions import read_file_in_chunks, coerce_types, append_data_to_database, row_fingerprints, FINGERPRINT_COLUMN
+from instrumentation import stage
+
+FILE_TABLE = "Ucitane_Datoteke"
+FILE_EXTENSIONS = (".xlsx", ".csv")
+SETTLE_SECONDS = 2.0
+WRITE_CHUNK_SIZE = 50000
+PARSE_AHEAD = 2
+MIN_BATCH_FILES = 16
+
+def file_fingerprint(path: str) -> str:
+    """
+    Calculates the SHA-256 hash of a file's content, reading it in blocks.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        str: The hash as a hexadecimal string.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _create_file_table(connection: sqlite3.Connection):
+    """
+    Creates the table of ingested files, keyed by the hash of their content.
+
+    Args:
+        connection (sqlite3.Connection): The connection object to the SQLite database.
+    """
+    create_table(connection, f"""
+        CREATE TABLE IF NOT EXISTS "{FILE_TABLE}" (
+            "Otisak" TEXT PRIMARY KEY, "Putanja" TEXT NOT NULL, "Redaka" INTEGER NOT NULL, "Ucitano" TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+def is_file_ingested(fingerprint: str) -> bool:
+    """
+    Checks whether a file with the same content was already ingested.
+
+    Args:
+        fingerprint (str): The hash of the file (see file_fingerprint).
+
+    Returns:
+        bool: True if the hash is in the table of ingested files.
+    """
+    database = get_connection()
+    if not table_exists(database, FILE_TABLE):
+        return False
+    return database.execute(f'SELECT 1 FROM "{FILE_TABLE}" WHERE "Otisak" = ?', (fingerprint,)).fetchone() is not None
+
+def _parse_file(path: str, chunk_size: int) -> pd.DataFrame:
+    """
+    Reads and converts a whole file inside a pool process.
+
+    Args:
+        path (str): The path to the .xlsx or .csv file.
+        chunk_size (int): The number of rows read at a time.
+
+    Returns:
+        pd.DataFrame: The rows of the file converted with coerce_types, with the fingerprints of the
+        file as one upload, so the files of a batch can be appended together.
+    """
+    chunks = [coerce_types(chunk) for chunk in read_file_in_chunks(path, chunk_size)]
+    if not chunks:
+        return pd.DataFrame()
+    data = pd.concat(chunks, ignore_index=True)
+    data[FINGERPRINT_COLUMN] = row_fingerprints(data)
+    return data
+
+def _store_files(files: list, table_name: str) -> int:
+    """
+    Appends the rows of parsed files and records the files, all in one transaction.
+
+    Writing the files that are ready together pays the fixed cost of an append, such as the
+    summary table update, once per batch instead of once per file. The rows are appended
+    without the last-date filter, because files of a backlog are not ingested in date order.
+    Rows already in the table or its archive, or in another file of the batch, are still skipped
+    by their fingerprints.
+
+    Args:
+        files (list): Tuples of the path, the hash and the parsed rows of every file.
+        table_name (str): The table the rows are appended to.
+
+    Returns:
+        int: The number of rows that were added to the table.
+    """
+    database = get_connection()
+    _create_file_table(database)
+    frames = [data for _, _, data in files if not data.empty]
+    data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    rows_added = 0
+    ingested_at = datetime.datetime.now().isoformat(timespec="seconds")
+
+    with stage("watch.store", files=len(files)) as record, transaction(database):
+        for start in range(0, len(data), WRITE_CHUNK_SIZE):
+            rows_added += append_data_to_database(data.iloc[start:start + WRITE_CHUNK_SIZE], table_name, watermark=None)
+        database.executemany(
+            f'INSERT OR REPLACE INTO "{FILE_TABLE}" VALUES (?, ?, ?, ?)',
+            [(fingerprint, os.path.abspath(path), len(rows), ingested_at) for path, fingerprint, rows in files],
+        )
+        record["rows"] = rows_added
+    return rows_added
+
+class FolderWatcher:
+    """
+    Ingests the .xlsx and .csv files dropped into a directory.
+
+    Files are parsed in a bounded pool of processes, so a backlog of files uses all cores,
+    while the rows are written to SQLite only by the thread that calls scan. The files parsed
+    while the previous batch was being written are written together in one transaction.
+    A file is skipped when a file with the same content was ingested before. A file that did
+    not change since the last scan is skipped without being read again; a new file is only
+    ingested once its size stayed the same between two scans, so a file that is still being
+    copied into the directory is not read halfway. Files last modified more than SETTLE_SECONDS
+    ago are ingested on the first scan, so a backlog does not wait for a second one. A file that
+    could not be ingested is tried again when it changes.
+    """
+
+    def __init__(self, directory: str, table_name: str = "Brzina_Radnika", max_workers: int = None, chunk_size: int = 50000):
+        self.directory = directory
+        self.table_name = table_name
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.known = {}
+        self.pending = {}
+        self.executor = None
+
+    def _ready_files(self) -> list:
+        """
+        Lists the files that are new or changed since the last scan and are no longer growing.
+
+        Returns:
+            list: The paths and the (size, modification time) of the files, sorted by path.
+        """
+        ready, pending = [], {}
+        settled = time.time_ns() - int(SETTLE_SECONDS * 1e9)
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                name = entry.name.lower()
+                if not entry.is_file() or not name.endswith(FILE_EXTENSIONS) or entry.name.startswith(("~$", ".")):
+                    continue
+                stat = entry.stat()
+                state = (stat.st_size, stat.st_mtime_ns)
+                if self.known.get(entry.path) == state:
+                    continue
+                if self.pending.get(entry.path) == state or stat.st_mtime_ns < settled:
+                    ready.append((entry.path, state))
+                else:
+                    pending[entry.path] = state
+        self.pending = pending
+        return sorted(ready)
+
+    def scan(self, progress=None) -> tuple:
+        """
+        Ingests the files that are ready.
+
+        Args:
+            progress (callable, optional): Called after every batch of files with the number of files that were
+                ingested, the total and the number of files that could not be ingested. Defaults to None.
+
+        Returns:
+            tuple: The paths of the ingested files and the number of rows they added.
+        """
+        files, fingerprints = [], set()
+        for path, state in self._ready_files():
+            try:
+                fingerprint = file_fingerprint(path)
+            except OSError as exception:
+                error(f"{path}: {exception}")
+                continue
+            self.known[path] = state
+            if fingerprint in fingerprints or is_file_ingested(fingerprint):
+                continue
+            fingerprints.add(fingerprint)
+            files.append((path, fingerprint))
+
+        ingested, rows_added = [], 0
+        if not files:
+            return ingested, rows_added
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+        waiting = iter(files)
+        running = {}
+        failed = 0
+        # Only a bounded number of files is parsed ahead of the writer, so a backlog does not pile up in memory.
+        def submit():
+            for path, fingerprint in waiting:
+                running[self.executor.submit(_parse_file, path, self.chunk_size)] = (path, fingerprint)
+                if len(running) >= max(PARSE_AHEAD * self.max_workers, MIN_BATCH_FILES):
+                    break
+
+        with stage("watch", directory=self.directory, files=len(files)) as record:
+            submit()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                batch = []
+                for future in done:
+                    path, fingerprint = running.pop(future)
+                    try:
+                        batch.append((path, fingerprint, future.result()))
+                    except Exception as exception:
+                        error(f"{path}: {exception}")
+                        failed += 1
+                submit()
+
+                if batch:
+                    try:
+                        rows_added += _store_files(batch, self.table_name)
+                        ingested.extend(path for path, _, _ in batch)
+                    except Exception as exception:
+                        error(f"{', '.join(path for path, _, _ in batch)}: {exception}")
+                        failed += len(batch)
+                if progress is not None:
+                    progress(len(ingested), len(files), failed)
+            record["rows"] = rows_added
+        return ingested, rows_added
+
+    def watch(self, interval: float = 5.0, progress=None, stop=None):
+        """
+        Scans the directory every interval seconds until stop returns True.
+
+        Args:
+            interval (float, optional): The number of seconds between scans. Defaults to 5.0.
+            progress (callable, optional): Passed to scan. Defaults to None.
+            stop (callable, optional): Checked before every scan. Defaults to None, which watches until interrupted.
+        """
+        stopped = (lambda: False) if stop is None else stop
+        try:
+            while not stopped():
+                self.scan(progress)
+                deadline = time.monotonic() + interval
+                while time.monotonic() < deadline and not stopped():
+                    time.sleep(min(0.2, interval))
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Stops the pool of processes.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,145 @@
+import customtkinter as ctk
+
+class VirtualCheckList(ctk.CTkFrame):
+    """
+    A searchable list of checkboxes that only creates widgets for the visible rows.
+
+    A fixed number of checkboxes is created once. Scrolling and searching only change which
+    names they show, so opening and scrolling the list costs the same for ten names as for
+    ten thousand. The checked names are kept in a set, not in the widgets.
+    """
+
+    def __init__(self, master, items: list, selected=(), visible_rows: int = 15, **kwargs):
+        super().__init__(master, **kwargs)
+        self.items = list(items)
+        self.selected = set(selected) & set(self.items)
+        self.filtered = self.items
+        self.offset = 0
+        self.visible_rows = visible_rows
+        self._keys = {item: str(item).casefold() for item in self.items}
+        self._query = ""
+
+        self.search_entry = ctk.CTkEntry(self, placeholder_text="Pretraži", width=300)
+        self.search_entry.grid(row = 0, column = 0, columnspan = 2, padx = 5, pady = 5, sticky = "ew")
+        self.search_entry.bind("<KeyRelease>", lambda event: self.search(self.search_entry.get()))
+
+        self.rows_frame = ctk.CTkFrame(self)
+        self.rows_frame.grid(row = 1, column = 0, padx = 5, pady = 5, sticky = "nsew")
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row = 1, column = 1, padx = 5, pady = 5, sticky = "ns")
+
+        self.count_label = ctk.CTkLabel(self, text="")
+        self.count_label.grid(row = 2, column = 0, columnspan = 2, padx = 5, pady = 5)
+
+        self.variables = []
+        self.checkboxes = []
+        for row in range(visible_rows):
+            variable = ctk.IntVar(value=0)
+            checkbox = ctk.CTkCheckBox(self.rows_frame, text="", width=300, onvalue=1, offvalue=0, variable=variable,
+                                       command=lambda row=row: self._on_toggle(row))
+            checkbox.grid(row = row, column = 0, padx = 5, pady = 2, sticky = "w")
+            self.variables.append(variable)
+            self.checkboxes.append(checkbox)
+
+        for widget in [self.rows_frame] + self.checkboxes:
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", lambda event: self.scroll(-1))
+            widget.bind("<Button-5>", lambda event: self.scroll(1))
+
+        self.render()
+
+    def search(self, query: str):
+        """
+        Shows only the names containing the query, ignoring case.
+
+        When the query extends the previous one, only the names that matched the previous
+        query are searched again.
+
+        Args:
+            query (str): The text to search for.
+        """
+        query = query.strip().casefold()
+        source = self.filtered if self._query and query.startswith(self._query) else self.items
+        self.filtered = [item for item in source if query in self._keys[item]] if query else self.items
+        self._query = query
+        self.offset = 0
+        self.render()
+
+    def scroll(self, rows: int):
+        """
+        Scrolls the list.
+
+        Args:
+            rows (int): The number of rows to scroll, negative to scroll up.
+        """
+        self.offset = max(0, min(self.offset + rows, max(len(self.filtered) - self.visible_rows, 0)))
+        self.render()
+
+    def _on_mousewheel(self, event):
+
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, action: str, value, unit: str = None):
+
+        if action == "moveto":
+            self.offset = 0
+            self.scroll(round(float(value) * len(self.filtered)))
+        elif action == "scroll":
+            self.scroll(int(value) * (self.visible_rows if unit == "pages" else 1))
+
+    def _on_toggle(self, row: int):
+
+        item = self.filtered[self.offset + row]
+        if self.variables[row].get() == 1:
+            self.selected.add(item)
+        else:
+            self.selected.discard(item)
+        self._update_count()
+
+    def _update_count(self):
+
+        self.count_label.configure(text=f"Odabrano {len(self.selected)} od {len(self.items)}")
+
+    def render(self):
+        """
+        Shows the names at the current scroll position in the checkboxes.
+        """
+        for row, (checkbox, variable) in enumerate(zip(self.checkboxes, self.variables)):
+            index = self.offset + row
+            if index < len(self.filtered):
+                item = self.filtered[index]
+                checkbox.configure(text=str(item))
+                variable.set(1 if item in self.selected else 0)
+                checkbox.grid()
+            else:
+                checkbox.grid_remove()
+
+        if self.filtered:
+            self.scrollbar.set(self.offset / len(self.filtered), min((self.offset + self.visible_rows) / len(self.filtered), 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self._update_count()
+
+    def select_all(self):
+        """
+        Checks every name that matches the current search.
+        """
+        self.selected.update(self.filtered)
+        self.render()
+
+    def clear(self):
+        """
+        Unchecks every name.
+        """
+        self.selected.clear()
+        self.render()
+
+    def get_selected(self) -> list:
+        """
+        Returns the checked names.
+
+        Returns:
+            list: The checked names in the order of the list.
+        """
+        return [item for item in self.items if item in self.selected]